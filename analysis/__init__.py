@@ -0,0 +1 @@
+"""数据分析模块"""
@@ -0,0 +1,72 @@
+"""Aho-Corasick automaton: every occurrence of a set of keywords in one pass over the text"""
+
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+def fold(text: str) -> str:
+    """Keywords and texts are compared NFKC-normalized and lowercased, so full-width and case variants match"""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+class AhoCorasick:
+    """
+    A trie of the folded keywords with failure links
+    Scanning a text costs one step per character plus one per match, whatever the number of keywords.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = list(dict.fromkeys(folded for folded in map(fold, keywords) if folded))
+        """Distinct folded keywords, search() returns indexes into this list"""
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._output[state] += (index,)
+
+        # Breadth first, a state's failure link points to a shallower state whose links are already set
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                # Keywords ending here include those ending at the longest proper suffix in the trie
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def search(self, text: str) -> Set[int]:
+        """Indexes of the keywords occurring in the text, which is folded first"""
+        goto, fail, output = self._goto, self._fail, self._output
+        found: Set[int] = set()
+        state = 0
+        for char in fold(text):
+            while True:
+                next_state = goto[state].get(char)
+                if next_state is not None:
+                    state = next_state
+                    break
+                if not state:
+                    break
+                state = fail[state]
+            if output[state]:
+                found.update(output[state])
+        return found
@@ -0,0 +1,91 @@
+"""MinHash signatures of character shingles, and a banded LSH index over them"""
+
+import random
+import unicodedata
+import zlib
+from array import array
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+Signature = Tuple[int, ...]
+
+
+def normalize(text: str) -> str:
+    """Lowercased letters and digits only, punctuation, symbols and spaces dropped"""
+    return "".join(char for char in unicodedata.normalize("NFKC", text).lower() if unicodedata.category(char)[0] in "LN")
+
+
+def shingles(text: str, size: int = 2) -> Set[str]:
+    """Character n-grams of the normalized text, a text shorter than n is its own shingle"""
+    normalized = normalize(text)
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[start : start + size] for start in range(len(normalized) - size + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+
+class MinHasher:
+    """Signatures whose agreement rate estimates the Jaccard similarity of the shingle sets"""
+
+    def __init__(self, num_perm: int = 32, seed: int = 1, cache_size: int = 1 << 17):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        # Universal hashing (a * x + b) mod p over crc32 of each shingle stands in for a random permutation
+        self.permutations = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME)) for _ in range(num_perm)]
+        # The bigrams of a language are few next to the titles made of them, each is hashed once
+        self._hashes = lru_cache(maxsize=cache_size)(self._hash)
+
+    def _hash(self, shingle: str) -> array:
+        value = zlib.crc32(shingle.encode("utf-8"))
+        return array("I", [((a * value + b) % MERSENNE_PRIME) & MAX_HASH for a, b in self.permutations])
+
+    def signature(self, shingle_set: Iterable[str]) -> Signature:
+        rows = [self._hashes(shingle) for shingle in shingle_set]
+        if not rows:
+            return (MAX_HASH,) * self.num_perm
+        return tuple(map(min, zip(*rows)))
+
+
+class LSHIndex:
+    """
+    Signatures split into bands of rows; two keys become candidates when they agree on every row of a band
+    With b bands of r rows, a pair of Jaccard similarity s is a candidate with probability 1 - (1 - s^r)^b.
+    """
+
+    def __init__(self, bands: int, rows: int):
+        self.bands = bands
+        self.rows = rows
+        self._buckets: List[Dict[Sequence[int], List[int]]] = [{} for _ in range(bands)]
+
+    def query_and_insert(self, key: int, signature: Signature) -> Set[int]:
+        """Keys already indexed that share a band with the signature, then index it"""
+        candidates: Set[int] = set()
+        for band, buckets in enumerate(self._buckets):
+            band_key = signature[band * self.rows : (band + 1) * self.rows]
+            bucket = buckets.get(band_key)
+            if bucket is None:
+                buckets[band_key] = [key]
+            else:
+                candidates.update(bucket)
+                bucket.append(key)
+        return candidates
+
+    def query(self, signature: Signature) -> Set[int]:
+        """Keys indexed that share a band with the signature"""
+        candidates: Set[int] = set()
+        for band, buckets in enumerate(self._buckets):
+            candidates.update(buckets.get(signature[band * self.rows : (band + 1) * self.rows], ()))
+        return candidates
+
+    def insert(self, key: int, signature: Signature):
+        for band, buckets in enumerate(self._buckets):
+            buckets.setdefault(signature[band * self.rows : (band + 1) * self.rows], []).append(key)
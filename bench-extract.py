@@ -0,0 +1,76 @@
+"""基准测试：对比整页正则提取与流式扫描提取（百度、凤凰网录制页面）
+
+uv run bench-extract.py [--repeat 20] [--chunk-size 16384]
+"""
+
+import argparse
+import json
+import re
+import statistics
+import time
+
+from config import cfg
+from fetcher.baidu import BaiduFetcher
+from fetcher.ifeng import IfengFetcher
+from fetcher.replay import load_fixtures
+
+# The extraction each fetcher used before streaming
+REGEX_EXTRACTORS = {
+    "baidu": (re.compile(r"<!--s-data:(.*?)-->", re.DOTALL), BaiduFetcher.scanner),
+    "ifeng": (re.compile(r"var\s+allData\s*=\s*(\{[\s\S]*?\});"), IfengFetcher.scanner),
+}
+
+
+def extract_with_regex(body: bytes, pattern: re.Pattern) -> object:
+    match = pattern.search(body.decode("utf-8", errors="replace"))
+    return json.loads(match.group(1))
+
+
+def extract_with_scanner(body: bytes, scanner_factory, chunk_size: int) -> tuple:
+    scanner = scanner_factory()
+    for offset in range(0, len(body), chunk_size):
+        if scanner.feed(body[offset : offset + chunk_size]):
+            return json.loads(scanner.payload), scanner.bytes_scanned
+    raise ValueError("payload not found")
+
+
+def median_ms(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regex vs streaming extraction of embedded payloads")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--chunk-size", type=int, default=16 * 1024, help="模拟网络分块大小")
+    args = parser.parse_args()
+
+    print(f"Fixtures: {cfg.fixtures_dir}, repeat={args.repeat}, chunk={args.chunk_size}B\n")
+    print(f"{'source':<8}{'fixture':<26}{'page':>10}{'regex':>10}{'stream':>10}{'speedup':>9}{'bytes read':>12}  same")
+
+    for source_id, (pattern, scanner_factory) in REGEX_EXTRACTORS.items():
+        fixtures = load_fixtures(cfg.fixtures_dir, source_id)
+        if not fixtures:
+            print(f"{source_id:<8}(no fixtures)")
+            continue
+
+        for fixture in fixtures:
+            body = fixture.body
+            regex_data = extract_with_regex(body, pattern)
+            stream_data, bytes_read = extract_with_scanner(body, scanner_factory, args.chunk_size)
+
+            regex_ms = median_ms(lambda: extract_with_regex(body, pattern), args.repeat)
+            stream_ms = median_ms(lambda: extract_with_scanner(body, scanner_factory, args.chunk_size), args.repeat)
+            print(
+                f"{source_id:<8}{fixture.body_path.stem:<26}{len(body) / 1024:>8.1f}KB"
+                f"{regex_ms:>8.2f}ms{stream_ms:>8.2f}ms{regex_ms / stream_ms:>8.1f}x"
+                f"{bytes_read / len(body):>11.0%}  {regex_data == stream_data}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""基准测试：测量启动时的导入耗时，以及每个源首次使用时的加载耗时
+
+uv run bench-import.py [--module main] [--top 15] [--eager]
+"""
+
+import argparse
+import importlib
+import subprocess
+import sys
+import time
+
+
+def import_times(module: str, eager: bool) -> list[tuple[int, int, str]]:
+    """Run `-X importtime` in a fresh interpreter, returns (self_us, cumulative_us, module) rows"""
+    code = f"import {module}"
+    if eager:
+        from fetcher.registry import FetcherRegistry
+
+        # -X importtime only reports import statements, not importlib.import_module
+        modules = {FetcherRegistry._load_manifest()[source_id].split(":")[0] for source_id in FetcherRegistry.list_source_ids()}
+        code += "".join(f"\nimport {name}" for name in sorted(modules))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        # One space separates the column, deeper indentation marks nested imports
+        rows.append((int(self_us), int(cumulative_us), name[1:].rstrip()))
+    return rows
+
+
+def measure_first_use(module: str):
+    """Time discovery and the first FetcherRegistry.get of each source after the startup import"""
+    importlib.import_module(module)
+    from fetcher.registry import FetcherRegistry
+
+    start = time.perf_counter()
+    source_ids = FetcherRegistry.list_source_ids()
+    print(f"\n发现 {len(source_ids)} 个源: {(time.perf_counter() - start) * 1000:.2f}ms")
+
+    for source_id in source_ids:
+        start = time.perf_counter()
+        FetcherRegistry.get(source_id)
+        print(f"  {source_id:<14} 首次加载 {(time.perf_counter() - start) * 1000:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure startup import time")
+    parser.add_argument("--module", default="main", help="module imported at startup")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest imports to list")
+    parser.add_argument("--eager", action="store_true", help="also load every source, as the old eager registry did")
+    args = parser.parse_args()
+
+    rows = import_times(args.module, args.eager)
+    top_level = [row for row in rows if not row[2].startswith(" ")]
+    total_ms = sum(cumulative for _, cumulative, _ in top_level) / 1000
+    fetcher_modules = [row for row in rows if row[2].strip().startswith("fetcher.")]
+
+    print(f"import {args.module}{' + all sources' if args.eager else ''}: {total_ms:.1f}ms, {len(rows)} modules")
+    print(f"fetcher.* modules imported: {len(fetcher_modules)}")
+    for self_us, cumulative_us, name in fetcher_modules:
+        print(f"  {name.strip():<24} self {self_us / 1000:6.2f}ms  cumulative {cumulative_us / 1000:6.2f}ms")
+
+    print(f"\n最慢的 {args.top} 个顶层导入:")
+    for self_us, cumulative_us, name in sorted(top_level, key=lambda row: -row[1])[: args.top]:
+        print(f"  {name.strip():<24} {cumulative_us / 1000:7.2f}ms")
+
+    measure_first_use(args.module)
+
+
+if __name__ == "__main__":
+    main()
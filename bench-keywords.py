@@ -0,0 +1,100 @@
+"""基准测试：关键词监控在一轮抓取上的匹配耗时，Aho-Corasick 对比逐个关键词查找
+
+A fetch cycle is every board of every source once: 6 sources x 50 items, a third with a
+description. Keywords are 2 to 4 CJK characters or Latin words; one item in ten contains one.
+
+uv run bench-keywords.py [--keywords 100 1000 5000 10000]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+from analysis.keywords import AhoCorasick, fold
+from fetcher.models import Trend
+from storage.monitor import KeywordMonitor
+
+SOURCE_IDS = ["baidu", "toutiao", "ifeng", "cailian", "wallstreetcn", "jin10"]
+
+
+def random_words(rng: random.Random, count: int) -> List[str]:
+    words = []
+    for _ in range(count):
+        if rng.random() < 0.2:
+            words.append("".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(3, 8))))
+        else:
+            words.append("".join(chr(0x4E00 + rng.randrange(3000)) for _ in range(rng.randint(2, 4))))
+    return words
+
+
+def fetch_cycle(rng: random.Random, keywords: List[str]) -> dict:
+    boards = {}
+    for source_id in SOURCE_IDS:
+        items = []
+        for rank in range(50):
+            words = random_words(rng, rng.randint(4, 8))
+            if rng.random() < 0.1:
+                words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+            description = "".join(random_words(rng, rng.randint(10, 30))) if rng.random() < 0.33 else None
+            items.append(Trend(id=f"{source_id}-{rank}", title="".join(words), url=f"https://www.example.com/{rank}", description=description))
+        boards[source_id] = items
+    return boards
+
+
+def naive_match(keywords: List[str], boards: dict) -> int:
+    folded = [fold(keyword) for keyword in keywords]
+    matched = 0
+    for items in boards.values():
+        for item in items:
+            text = fold(f"{item.title}\n{item.description}" if item.description else item.title)
+            matched += any(keyword in text for keyword in folded)
+    return matched
+
+
+def automaton_match(automaton: AhoCorasick, boards: dict) -> int:
+    matched = 0
+    for items in boards.values():
+        for item in items:
+            matched += bool(automaton.search(f"{item.title}\n{item.description}" if item.description else item.title))
+    return matched
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keyword matching on a fetch cycle")
+    parser.add_argument("--keywords", type=int, nargs="*", default=[100, 1000, 5000, 10000])
+    args = parser.parse_args()
+
+    print(f"{'keywords':<10}{'build':>10}{'automaton':>12}{'naive':>10}{'monitor':>10}{'matched':>10}")
+    for count in args.keywords:
+        rng = random.Random(count)
+        keywords = random_words(rng, count)
+        boards = fetch_cycle(rng, keywords)
+
+        automaton, build = timed(AhoCorasick, keywords)
+        matched, automaton_time = timed(automaton_match, automaton, boards)
+        naive_matched, naive_time = timed(naive_match, keywords, boards)
+        assert matched == naive_matched, (matched, naive_matched)
+
+        # The whole ingest path: 100 subscriptions sharing the keywords, matches written to SQLite
+        monitor = KeywordMonitor(Path(tempfile.mkdtemp()) / "monitor.db")
+        for start in range(0, count, max(1, count // 100)):
+            monitor.subscribe("", keywords[start : start + max(1, count // 100)])
+        monitor.matcher()
+        now = datetime(2025, 1, 1, 12)
+        _, monitor_time = timed(lambda: [monitor.match(source_id, now, items) for source_id, items in boards.items()])
+
+        print(f"{count:<10}{build:>8.1f}ms{automaton_time:>10.1f}ms{naive_time:>8.1f}ms{monitor_time:>8.1f}ms{matched:>10}")
+
+
+if __name__ == "__main__":
+    main()
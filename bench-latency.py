@@ -0,0 +1,123 @@
+"""基准测试：抓取周期进行时首页 / 的响应延迟（p50/p99），对比阻塞任务在事件循环内执行与交给执行器
+
+录制：FETCH_MODE=record uv run test-fetch.py
+测试：uv run bench-latency.py [--cycles 20] [--history 96] [--interval 0.02] [--modes inline thread process]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def seed_history(temp_dir: Path, snapshots: int):
+    """Copy each board snapshot to earlier minutes of the day with reshuffled ranks, as a day of polling leaves behind"""
+    rng = random.Random(42)
+    for latest_file in temp_dir.glob("*/_latest.json"):
+        source_dir = latest_file.parent
+        with open(source_dir / json.loads(latest_file.read_text())["file"], "r", encoding="utf-8") as f:
+            data = json.load(f)
+        day = data["timestamp"][:10].replace("-", "")
+        for minute in range(snapshots):
+            rng.shuffle(data["items"])
+            with open(source_dir / f"{day}_{minute // 60:02d}{minute % 60:02d}.json", "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+async def probe(cycles: int, interval: float, history: int) -> list[float]:
+    """Request / in a loop while fetch + aggregate cycles run on the same event loop"""
+    import httpx
+
+    import web.render
+    from config import cfg
+    from executor import BlockingExecutor
+    from fetcher.http_client import HttpClientManager
+    from main import app
+    from scheduler import aggregate_today, fetch_all_sources
+
+    # The dashboard reads data/ next to the code, point it at the scratch directory instead
+    web.render.DATA_DIR = cfg.data_dir.resolve()
+
+    async def run_cycles():
+        for _ in range(cycles):
+            await fetch_all_sources()
+            await aggregate_today()
+
+    # One cycle up front so / renders a real page and the pool is warm
+    await fetch_all_sources()
+    await aggregate_today()
+
+    seed_history(cfg.temp_dir, history)
+
+    # Requests arrive on a fixed schedule, latency counts from the arrival, so time spent
+    # waiting for a blocked loop is included as a real client would see it
+    latencies = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        cycle_task = asyncio.create_task(run_cycles())
+        arrival = time.perf_counter()
+        while not cycle_task.done():
+            await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+            response = await client.get("/")
+            latencies.append((time.perf_counter() - arrival) * 1000)
+            response.raise_for_status()
+            arrival += interval
+        await cycle_task
+
+    await HttpClientManager.aclose()
+    BlockingExecutor.shutdown()
+    return latencies
+
+
+def percentile(values: list[float], q: float) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] if len(values) > 1 else values[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard latency during a fetch cycle")
+    parser.add_argument("--cycles", type=int, default=20, help="测量期间的抓取+聚合周期数")
+    parser.add_argument("--history", type=int, default=96, help="当天已有的快照数")
+    parser.add_argument("--interval", type=float, default=0.02, help="探测请求间隔（秒）")
+    parser.add_argument("--modes", nargs="+", default=["inline", "thread", "process"], choices=["inline", "thread", "process"])
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        latencies = asyncio.run(probe(args.cycles, args.interval, args.history))
+        print(json.dumps(latencies))
+        return
+
+    from config import cfg
+
+    fixtures_dir = cfg.fixtures_dir.resolve()
+    if not any(fixtures_dir.glob("*/*.json")):
+        sys.exit(f"No fixtures in {fixtures_dir}, record them first: FETCH_MODE=record uv run test-fetch.py")
+
+    print(f"Fixtures: {fixtures_dir}, {args.history} snapshots of history, {args.cycles} cycles, probe every {args.interval * 1000:.0f}ms\n")
+    for mode in args.modes:
+        # A fresh interpreter and working directory per mode: config is read at import and data paths are relative
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, "EXECUTOR_MODE": mode, "FETCH_MODE": "replay", "FIXTURES_DIR": str(fixtures_dir)}
+            output = subprocess.run(
+                [sys.executable, str(Path(__file__).resolve()), "--measure", "--cycles", str(args.cycles), "--interval", str(args.interval), "--history", str(args.history)],
+                cwd=tmp,
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        latencies = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{mode:<8} {len(latencies):5d} requests  "
+            f"p50 {percentile(latencies, 50):7.2f}ms  p99 {percentile(latencies, 99):7.2f}ms  max {max(latencies):7.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
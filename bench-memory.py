@@ -0,0 +1,129 @@
+"""基准测试：多周快照聚合时的峰值内存（普通 dataclass vs slots + 字符串驻留）
+
+uv run bench-memory.py [--days 21] [--snapshots 48] [--items 50]
+"""
+
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional
+
+SOURCE_IDS = ["baidu", "toutiao", "ifeng", "cailian", "wallstreetcn", "jin10"]
+
+
+@dataclass
+class LegacyTrend:
+    """The Trend layout before slots"""
+
+    id: str
+    title: str
+    url: str
+    description: Optional[str] = None
+    score: Optional[int] = None
+
+
+def generate_snapshots(temp_dir: Path, days: int, snapshots: int, items: int):
+    """Boards that drift slowly: each poll reshuffles a few ranks and replaces a few items"""
+    rng = random.Random(42)
+    start = date(2025, 1, 1)
+    for source_id in SOURCE_IDS:
+        source_dir = temp_dir / source_id
+        source_dir.mkdir(parents=True)
+        next_topic = 0
+        board = []
+        for day in range(days):
+            day_str = (start + timedelta(days=day)).strftime("%Y%m%d")
+            for snapshot in range(snapshots):
+                while len(board) < items:
+                    board.append(next_topic)
+                    next_topic += 1
+                rng.shuffle(board[: items // 5])
+                payload = {
+                    "source": source_id,
+                    "timestamp": f"{day_str} {snapshot:04d}",
+                    "items": [
+                        {
+                            "id": f"https://www.example.com/{source_id}/topic/{topic}",
+                            "title": f"{source_id} 热点话题标题示例第 {topic} 条，附带一些常见的描述性文字",
+                            "url": f"https://www.example.com/{source_id}/topic/{topic}",
+                            "description": f"话题 {topic} 的摘要描述，通常有几十个字符长" * 2,
+                            "score": 100000 - topic,
+                        }
+                        for topic in board
+                    ],
+                }
+                with open(source_dir / f"{day_str}_{snapshot // 2:02d}{snapshot % 2 * 30:02d}.json", "w", encoding="utf-8") as f:
+                    json.dump(payload, f, ensure_ascii=False)
+                for _ in range(rng.randint(0, 3)):
+                    board.pop(rng.randrange(len(board)))
+
+
+def measure(temp_dir: Path, mode: str, days: int):
+    """Load every day of every source and keep it alive, as DailyAggregator.generate keeps items_list"""
+    from storage.cache import CacheStorage
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    storage = CacheStorage(temp_dir)
+    retained = []
+    start = date(2025, 1, 1)
+
+    for day in range(days):
+        day_str = (start + timedelta(days=day)).strftime("%Y-%m-%d")
+        for source_id in SOURCE_IDS:
+            if mode == "legacy":
+                items_list = []
+                for json_file in sorted((temp_dir / source_id).glob(f"{day_str.replace('-', '')}_*.json")):
+                    with open(json_file, "r", encoding="utf-8") as f:
+                        items_list.append([LegacyTrend(**item) for item in json.load(f)["items"]])
+            else:
+                items_list = storage.load_day(source_id, day_str)
+            retained.append(items_list)
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    total_items = sum(len(items) for items_list in retained for items in items_list)
+    print(json.dumps({"peak_kb": peak - baseline, "items": total_items}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak RSS of a multi-week aggregation")
+    parser.add_argument("--days", type=int, default=21)
+    parser.add_argument("--snapshots", type=int, default=48, help="每源每天快照数")
+    parser.add_argument("--items", type=int, default=50, help="每个快照条目数")
+    parser.add_argument("--measure", choices=["legacy", "compact"], help=argparse.SUPPRESS)
+    parser.add_argument("--temp-dir", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.temp_dir, args.measure, args.days)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        temp_dir = Path(tmp)
+        print(f"Generating {args.days} days x {len(SOURCE_IDS)} sources x {args.snapshots} snapshots x {args.items} items...")
+        generate_snapshots(temp_dir, args.days, args.snapshots, args.items)
+
+        results = {}
+        for mode in ("legacy", "compact"):
+            # A fresh interpreter per mode so the peaks do not contaminate each other
+            output = subprocess.run(
+                [sys.executable, __file__, "--measure", mode, "--temp-dir", str(temp_dir), "--days", str(args.days)],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:<8} peak RSS +{results[mode]['peak_kb'] / 1024:.1f} MB for {results[mode]['items']} items")
+
+        ratio = results["legacy"]["peak_kb"] / max(results["compact"]["peak_kb"], 1)
+        print(f"\nPeak RSS reduced {ratio:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
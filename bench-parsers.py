@@ -0,0 +1,64 @@
+"""基准测试：基于录制的上游响应测量各源解析耗时与内存分配
+
+uv run bench-parsers.py [--source baidu] [--repeat 20]
+"""
+
+import argparse
+import statistics
+import time
+import tracemalloc
+
+from config import cfg
+from fetcher.registry import FetcherRegistry
+from fetcher.replay import load_fixtures
+
+
+def bench_parse(source_id: str, body: bytes, repeat: int) -> dict:
+    fetcher_instance = FetcherRegistry.get(source_id)
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = fetcher_instance.parse(body)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fetcher_instance.parse(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "items": len(items),
+        "median_ms": statistics.median(timings) * 1000,
+        "max_ms": max(timings) * 1000,
+        "peak_kb": peak / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parser throughput benchmark on recorded fixtures")
+    parser.add_argument("--source", action="append", help="只测试指定源，可重复")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    source_ids = args.source or FetcherRegistry.list_source_ids()
+    print(f"Fixtures: {cfg.fixtures_dir}, repeat={args.repeat}\n")
+    print(f"{'source':<14}{'fixture':<26}{'payload':>10}{'items':>7}{'median':>10}{'max':>10}{'peak alloc':>12}")
+
+    for source_id in source_ids:
+        fixtures = load_fixtures(cfg.fixtures_dir, source_id)
+        if not fixtures:
+            print(f"{source_id:<14}(no fixtures)")
+            continue
+
+        for fixture in fixtures:
+            body = fixture.body
+            result = bench_parse(source_id, body, args.repeat)
+            print(
+                f"{source_id:<14}{fixture.body_path.stem:<26}{len(body) / 1024:>8.1f}KB{result['items']:>7}"
+                f"{result['median_ms']:>8.2f}ms{result['max_ms']:>8.2f}ms{result['peak_kb']:>10.1f}KB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""基准测试：快照排名，逐话题累计对比数组分组归约
+
+Boards of 50 items drift as consecutive polls do, a few topics leave and enter each snapshot,
+and a share of the sources carry scores. Every run checks both give the same ranking.
+
+uv run bench-scoring.py [--snapshots 1000 10000 30000 100000] [--items 50]
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List
+
+from fetcher.models import Trend
+from storage.aggregator import MAX_ITEMS_PER_SOURCE, accumulate_trends, rank_topic_stats
+from storage.scoring import encode_snapshots, rank_snapshots, score_topics
+
+
+def generate_snapshots(rng: random.Random, count: int, items: int, scored: bool) -> List[List[Trend]]:
+    trends: Dict[int, Trend] = {}
+    board = list(range(items))
+    next_topic = items
+    snapshots = []
+    for _ in range(count):
+        for _ in range(rng.randint(0, 3)):
+            board.pop(rng.randrange(len(board)))
+        while len(board) < items:
+            board.insert(rng.randrange(len(board) + 1), next_topic)
+            next_topic += 1
+        if rng.random() < 0.5:
+            rng.shuffle(board[: items // 5])
+        snapshot = []
+        for topic in board:
+            # Polls repeat the same objects, as TrendInterner shares them
+            if topic not in trends or (scored and rng.random() < 0.2):
+                trends[topic] = Trend(
+                    id=f"topic-{topic}",
+                    title=f"热点话题 {topic}",
+                    url=f"https://www.example.com/{topic}",
+                    score=rng.randint(10_000, 5_000_000) if scored else None,
+                )
+            snapshot.append(trends[topic])
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def reference(snapshots: List[List[Trend]]) -> List[Trend]:
+    topic_stats: Dict[str, Dict] = {}
+    for items in snapshots:
+        accumulate_trends(topic_stats, items)
+    return rank_topic_stats(topic_stats)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ranking a source's snapshots")
+    parser.add_argument("--snapshots", type=int, nargs="*", default=[1000, 10000, 30000, 100000])
+    parser.add_argument("--items", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'snapshots':<11}{'scores':<8}{'topics':>8}{'python':>11}{'numpy':>11}{'encode':>11}{'reduce':>11}{'speedup':>9}")
+    for count in args.snapshots:
+        for scored in (False, True):
+            snapshots = generate_snapshots(random.Random(count), count, args.items, scored)
+            expected, python_time = timed(reference, snapshots)
+            ranked, numpy_time = timed(rank_snapshots, snapshots, MAX_ITEMS_PER_SOURCE)
+            assert ranked == expected
+
+            encoded, encode_time = timed(encode_snapshots, snapshots)
+            _, reduce_time = timed(score_topics, encoded)
+            print(
+                f"{count:<11}{'yes' if scored else 'no':<8}{len(encoded.topics):>8}"
+                f"{python_time:>9.1f}ms{numpy_time:>9.1f}ms{encode_time:>9.1f}ms{reduce_time:>9.1f}ms{python_time / numpy_time:>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""基准测试：全文搜索索引的写入速度、磁盘占用与查询延迟
+
+Titles are drawn from a Zipf-distributed vocabulary, so common words occur in tens of
+thousands of entries as they do in real headlines. Queries cover frequent, mid-frequency and
+rare words, two-word queries, one-character queries, and filters by date range and source.
+
+uv run bench-search.py [--days 365] [--sources 10] [--topics 150]
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from itertools import accumulate
+from pathlib import Path
+from typing import List
+
+from fetcher.models import Trend
+from storage.search import SearchIndex
+
+SOURCE_IDS = ["baidu", "toutiao", "ifeng", "weibo", "zhihu", "douyin", "bilibili", "thepaper", "cailian", "wallstreetcn", "jin10", "36kr"]
+
+
+def vocabulary(rng: random.Random, size: int) -> List[str]:
+    """Words of 2 to 4 common CJK characters, most frequent first"""
+    return ["".join(chr(0x4E00 + rng.randrange(3000)) for _ in range(rng.randint(2, 4))) for _ in range(size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the full-text search index")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--sources", type=int, default=10)
+    parser.add_argument("--topics", type=int, default=150, help="每个源每天的新话题数")
+    parser.add_argument("--queries", type=int, default=50, help="每类查询的次数")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    words = vocabulary(rng, 20000)
+    weights = list(accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    index = SearchIndex(Path(tempfile.mkdtemp()) / "search.db")
+    start = date(2025, 1, 1)
+    source_ids = SOURCE_IDS[: args.sources]
+
+    began = time.perf_counter()
+    entries = 0
+    for offset in range(args.days):
+        day = (start + timedelta(days=offset)).isoformat()
+        for source_id in source_ids:
+            items = [
+                Trend(
+                    id=f"{day}-{topic}",
+                    title="".join(rng.choices(words, cum_weights=weights, k=rng.randint(4, 8))),
+                    url=f"https://www.example.com/{source_id}/{day}/{topic}",
+                    description="".join(rng.choices(words, cum_weights=weights, k=rng.randint(8, 20))) if rng.random() < 0.3 else None,
+                )
+                for topic in range(args.topics)
+            ]
+            entries += index.add_trends(source_id, day, items)
+    build = time.perf_counter() - began
+    size = sum(path.stat().st_size for path in index.db_path.parent.iterdir())
+    print(f"Indexed {entries} entries over {args.days} days in {build:.1f}s ({entries / build:.0f}/s), {size / 1e6:.1f}MB on disk")
+
+    # A second pass over the same boards, as repeated polls do, finds nothing to write
+    began = time.perf_counter()
+    index.add_trends(source_ids[0], start.isoformat(), [Trend(id=f"{start.isoformat()}-{topic}", title="x", url="u") for topic in range(args.topics)])
+    print(f"Re-indexing a changed board: {(time.perf_counter() - began) * 1000:.1f}ms\n")
+
+    last_day = (start + timedelta(days=args.days - 1)).isoformat()
+    month_ago = (start + timedelta(days=max(0, args.days - 30))).isoformat()
+    cases = [
+        ("frequent word", lambda: {"query": rng.choice(words[:20])}),
+        ("mid-frequency word", lambda: {"query": rng.choice(words[200:2000])}),
+        ("rare word", lambda: {"query": rng.choice(words[10000:])}),
+        ("two words", lambda: {"query": f"{rng.choice(words[:200])} {rng.choice(words[:200])}"}),
+        ("one character", lambda: {"query": rng.choice(words[:20])[0]}),
+        ("frequent, last 30 days", lambda: {"query": rng.choice(words[:20]), "date_from": month_ago, "date_to": last_day}),
+        ("frequent, one source", lambda: {"query": rng.choice(words[:20]), "source_ids": [source_ids[-1]]}),
+        ("frequent, page 10", lambda: {"query": rng.choice(words[:20]), "page": 10}),
+    ]
+    # Ranked matches, at most MAX_CANDIDATES
+    print(f"{'query':<24}{'ranked':>10}{'p50':>10}{'p95':>10}")
+    for name, make in cases:
+        timings = []
+        matches = []
+        for _ in range(args.queries):
+            kwargs = make()
+            began = time.perf_counter()
+            result = index.search(**kwargs)
+            timings.append((time.perf_counter() - began) * 1000)
+            matches.append(result["total"])
+        timings.sort()
+        print(f"{name:<24}{statistics.median(matches):>10.0f}{statistics.median(timings):>8.1f}ms{timings[int(len(timings) * 0.95) - 1]:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""基准测试：新闻去重，近重复索引对比逐条 SequenceMatcher 比较
+
+Candidates are headlines of a shared vocabulary, each story told 1 to 4 times with the edits
+another source would make: a prefix, a swapped verb, a trailing clause added or dropped, a
+character or punctuation changed. The reference is the pairwise selection the index replaces;
+agreement counts the candidates both keep or both drop, and whether the selections are equal.
+
+uv run bench-selector.py [--candidates 1000 2000 5000] [--reference-max 2000] [--thresholds 0.7 0.8 0.85 0.9]
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List
+
+from summary.selector import SIMILARITY_THRESHOLD, calculate_similarity, select_distinct
+
+SUBJECTS = ["国务院", "央行", "证监会", "外交部", "国家统计局", "苹果公司", "华为", "特斯拉", "比亚迪", "上海", "深圳", "气象台", "中国航天", "英伟达"]
+ACTIONS = ["发布", "宣布", "回应", "公布", "启动", "暂停", "上调", "下调", "推出", "召开"]
+DETAILS = ["涉及金额超千亿", "下周正式实施", "多地同步跟进", "市场反应强烈", "专家解读来了", "为近五年首次", "附最新进展", "官方回应"]
+PREFIXES = ["突发：", "快讯｜", "刚刚！", "【重磅】"]
+SWAPS = {"发布": "公布", "宣布": "发布", "上调": "提高", "下调": "降低", "推出": "发布", "暂停": "叫停"}
+
+
+def vocabulary(rng: random.Random, size: int) -> List[str]:
+    """Random words of 2 to 4 common CJK characters standing in for names, places and terms"""
+    return ["".join(chr(0x4E00 + rng.randrange(3000)) for _ in range(rng.randint(2, 4))) for _ in range(size)]
+
+
+def variant(title: str, rng: random.Random) -> str:
+    """The same story as another source might title it, one or two edits away"""
+    for _ in range(rng.randint(1, 2)):
+        edit = rng.randrange(5)
+        if edit == 0:
+            title = rng.choice(PREFIXES) + title
+        elif edit == 1:
+            for word, replacement in SWAPS.items():
+                if word in title:
+                    title = title.replace(word, replacement, 1)
+                    break
+        elif edit == 2:
+            title = f"{title}，{rng.choice(DETAILS)}"
+        elif edit == 3 and "，" in title:
+            title = title.rsplit("，", 1)[0]
+        else:
+            position = rng.randrange(len(title))
+            title = title[:position] + rng.choice("，、 的了") + title[position + 1 :]
+    return title
+
+
+def generate_candidates(count: int, seed: int) -> List[Dict]:
+    """Candidates in selection order"""
+    rng = random.Random(seed)
+    words = vocabulary(rng, max(200, count // 4))
+    titles: List[str] = []
+    while len(titles) < count:
+        base = f"{rng.choice(SUBJECTS)}{rng.choice(ACTIONS)}{''.join(rng.sample(words, 2))}"
+        base += "".join(f"，{detail}" for detail in rng.sample(DETAILS, rng.randint(0, 2)))
+        titles.append(base)
+        titles += [variant(base, rng) for _ in range(rng.randint(0, 3))]
+    rng.shuffle(titles)
+    return [{"title": title, "url": f"https://www.example.com/{index}", "rank": index + 1} for index, title in enumerate(titles[:count])]
+
+
+def pairwise_select(candidates: List[Dict], top_n: int, threshold: float) -> List[Dict]:
+    """The selection before the index: every candidate compared with every selected title"""
+    selected: List[Dict] = []
+    for candidate in candidates:
+        if all(calculate_similarity(candidate["title"], chosen["title"]) < threshold for chosen in selected):
+            selected.append(candidate)
+            if len(selected) >= top_n:
+                break
+    return selected
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark near-duplicate selection")
+    parser.add_argument("--candidates", type=int, nargs="*", default=[1000, 2000, 5000, 20000])
+    parser.add_argument("--reference-max", type=int, default=2000, help="更多候选时不再跑逐条比较")
+    parser.add_argument("--thresholds", type=float, nargs="*", default=[0.7, 0.8, SIMILARITY_THRESHOLD, 0.9])
+    args = parser.parse_args()
+
+    print(f"{'candidates':<12}{'threshold':>10}{'selected':>10}{'index':>10}{'pairwise':>10}{'agreement':>11}{'equal':>7}")
+    for count in args.candidates:
+        candidates = generate_candidates(count, seed=count)
+        for threshold in args.thresholds:
+            # Every candidate is decided, top_n is not reached
+            selected, index_time = timed(select_distinct, candidates, count, threshold)
+            if count > args.reference_max:
+                print(f"{count:<12}{threshold:>10.2f}{len(selected):>10}{index_time:>9.2f}s{'-':>10}{'-':>11}{'-':>7}")
+                continue
+            expected, pairwise_time = timed(pairwise_select, candidates, count, threshold)
+            kept = {id(candidate) for candidate in selected}
+            expected_kept = {id(candidate) for candidate in expected}
+            agreement = sum((id(candidate) in kept) == (id(candidate) in expected_kept) for candidate in candidates) / count
+            print(
+                f"{count:<12}{threshold:>10.2f}{len(selected):>10}{index_time:>9.2f}s{pairwise_time:>9.1f}s"
+                f"{agreement:>10.2%}{'yes' if selected == expected else 'no':>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
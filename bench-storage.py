@@ -0,0 +1,134 @@
+"""基准测试：各存储后端的写入、按天读取、聚合、列出数据源与话题历史查询耗时，以及磁盘占用
+
+uv run bench-storage.py [--days 7] [--snapshots 96] [--items 50] [--backends files segments delta sqlite]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from fetcher.models import Trend
+from storage.aggregator import DailyAggregator
+from storage.base import STORAGE_BACKENDS, TrendStorage, create_storage
+
+SOURCE_IDS = ["baidu", "toutiao", "ifeng"]
+
+
+def generate_boards(days: int, snapshots: int, items: int) -> Dict[str, List[tuple[datetime, List[Trend]]]]:
+    """Boards that drift slowly and sometimes repeat, as consecutive polls do"""
+    rng = random.Random(42)
+    start = datetime(2025, 1, 1)
+    step = timedelta(minutes=24 * 60 // snapshots)
+    boards = {}
+    for source_id in SOURCE_IDS:
+        next_topic = 0
+        board: List[int] = []
+        timeline = []
+        for index in range(days * snapshots):
+            while len(board) < items:
+                board.append(next_topic)
+                next_topic += 1
+            if rng.random() < 0.7:
+                rng.shuffle(board[: items // 5])
+            timeline.append(
+                (
+                    start + step * index,
+                    [
+                        Trend(
+                            id=f"{source_id}-{topic}",
+                            title=f"{source_id} 热点话题标题示例第 {topic} 条",
+                            url=f"https://www.example.com/{source_id}/topic/{topic}",
+                            score=100000 - topic,
+                        )
+                        for topic in board
+                    ],
+                )
+            )
+            for _ in range(rng.randint(0, 2)):
+                board.pop(rng.randrange(len(board)))
+        boards[source_id] = timeline
+    return boards
+
+
+def disk_usage(path: Path) -> tuple[int, int]:
+    files = [file for file in path.rglob("*") if file.is_file()]
+    return len(files), sum(file.stat().st_size for file in files)
+
+
+def topic_history(storage: TrendStorage, source_id: str, topic_id: str) -> int:
+    """Snapshots a topic appeared in, through an index where the backend has one"""
+    if hasattr(storage, "history"):
+        return len(storage.history(source_id, topic_id))
+    return sum(
+        any(item.id == topic_id for item in items)
+        for date in storage.dates(source_id)
+        for items in storage.load_day(source_id, date)
+    )
+
+
+def bench(backend: str, base_path: Path, state_path: Path, boards: Dict[str, List[tuple[datetime, List[Trend]]]], days: int) -> Dict[str, float]:
+    storage = create_storage(base_path, backend)
+    results = {}
+
+    start = time.perf_counter()
+    for source_id, timeline in boards.items():
+        for now, items in timeline:
+            storage.append(source_id, now, items)
+    results["write_ms"] = (time.perf_counter() - start) * 1000 / sum(len(timeline) for timeline in boards.values())
+
+    dates = [(datetime(2025, 1, 1) + timedelta(days=day)).strftime("%Y-%m-%d") for day in range(days)]
+    storage = create_storage(base_path, backend)  # cold interner, as a fresh aggregation run
+    start = time.perf_counter()
+    snapshot_count = sum(len(storage.load_day(source_id, date)) for date in dates for source_id in storage.sources(date))
+    results["load_day_ms"] = (time.perf_counter() - start) * 1000 / (len(dates) * len(SOURCE_IDS))
+    results["snapshots"] = snapshot_count
+
+    # A full day's aggregation from a cold store, through the deltas where the backend keeps them
+    aggregator = DailyAggregator(base_path, state_path, state_path)
+    aggregator.storage = create_storage(base_path, backend)
+    start = time.perf_counter()
+    for date in dates:
+        for source_id in SOURCE_IDS:
+            aggregator.aggregate_source(source_id, date)
+    results["aggregate_ms"] = (time.perf_counter() - start) * 1000 / (len(dates) * len(SOURCE_IDS))
+
+    start = time.perf_counter()
+    for date in dates:
+        storage.sources(date)
+    results["sources_ms"] = (time.perf_counter() - start) * 1000 / len(dates)
+
+    start = time.perf_counter()
+    results["history_hits"] = topic_history(storage, SOURCE_IDS[0], f"{SOURCE_IDS[0]}-3")
+    results["history_ms"] = (time.perf_counter() - start) * 1000
+
+    results["files"], results["bytes"] = disk_usage(base_path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare storage backends")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--snapshots", type=int, default=96, help="每源每天快照数")
+    parser.add_argument("--items", type=int, default=50, help="每个快照条目数")
+    parser.add_argument("--backends", nargs="+", default=list(STORAGE_BACKENDS), choices=list(STORAGE_BACKENDS))
+    args = parser.parse_args()
+
+    print(f"Generating {args.days} days x {len(SOURCE_IDS)} sources x {args.snapshots} snapshots x {args.items} items...\n")
+    boards = generate_boards(args.days, args.snapshots, args.items)
+
+    print(f"{'backend':<10}{'write/snap':>12}{'load_day':>12}{'aggregate':>12}{'sources':>10}{'history':>12}{'files':>8}{'size':>10}")
+    for backend in args.backends:
+        with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as state_tmp:
+            r = bench(backend, Path(tmp), Path(state_tmp), boards, args.days)
+        print(
+            f"{backend:<10}{r['write_ms']:>10.2f}ms{r['load_day_ms']:>10.1f}ms{r['aggregate_ms']:>10.1f}ms{r['sources_ms']:>8.2f}ms"
+            f"{r['history_ms']:>10.1f}ms{r['files']:>8}{r['bytes'] / 1024 / 1024:>8.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""基准测试：跨平台故事聚类的准确率、召回率与耗时
+
+The labelled sample is generated: each story is a headline rewritten the way different
+platforms phrase it (prefixes, trailing clauses, reordered clauses, dropped or swapped
+words), mixed with unrelated headlines sharing the same vocabulary.
+Precision and recall are counted over pairs of titles put in the same cluster.
+
+uv run bench-stories.py [--stories 300] [--scale 1000 10000 30000]
+"""
+
+import argparse
+import random
+import time
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Callable, List, Tuple
+
+from analysis.minhash import jaccard, shingles
+from analysis.stories import SIMILARITY_THRESHOLD, cluster_titles
+
+SUBJECTS = ["国务院", "央行", "证监会", "外交部", "教育部", "国家统计局", "苹果公司", "华为", "特斯拉", "比亚迪", "上海", "深圳", "杭州", "成都", "气象台", "国足", "中国航天", "OpenAI", "英伟达", "小米"]
+ACTIONS = ["发布", "宣布", "回应", "公布", "启动", "暂停", "上调", "下调", "推出", "召开", "批准", "否认"]
+OBJECTS = ["新一轮降准", "房地产新政", "年度财报", "新款手机", "暴雨红色预警", "芯片出口管制", "高考改革方案", "消费券发放", "自动驾驶测试", "载人飞船发射", "世界杯预选赛名单", "人工智能监管办法", "存款利率调整", "新能源汽车补贴", "就业数据", "电池技术突破"]
+DETAILS = ["涉及金额超千亿", "下周正式实施", "多地同步跟进", "市场反应强烈", "专家解读来了", "网友热议", "为近五年首次", "附最新进展", "官方回应", "持续关注"]
+PREFIXES = ["", "", "突发：", "快讯｜", "刚刚！", "【重磅】", "热搜："]
+SWAPS = {"发布": "公布", "宣布": "发布", "上调": "提高", "下调": "降低", "推出": "发布", "暂停": "叫停"}
+
+
+def vocabulary(rng: random.Random, size: int) -> List[str]:
+    """Random words of 2 to 4 common CJK characters standing in for names, places and terms"""
+    return ["".join(chr(0x4E00 + rng.randrange(3000)) for _ in range(rng.randint(2, 4))) for _ in range(size)]
+
+
+def headline(rng: random.Random, words: List[str]) -> List[str]:
+    """Clauses of a base headline; stories of the same subject and object are the hard negatives"""
+    clauses = [f"{rng.choice(SUBJECTS)}{rng.choice(ACTIONS)}{rng.choice(words)}{rng.choice(OBJECTS)}"]
+    clauses += rng.sample(DETAILS, rng.randint(0, 2))
+    return clauses
+
+
+def rewrite(clauses: List[str], rng: random.Random) -> str:
+    """The same story as another platform might title it"""
+    clauses = list(clauses)
+    if len(clauses) > 1 and rng.random() < 0.3:
+        clauses = [clauses[0]] + rng.sample(clauses[1:], len(clauses) - 1)
+    if len(clauses) > 1 and rng.random() < 0.3:
+        clauses.pop()
+    if rng.random() < 0.3:
+        clauses.append(rng.choice(DETAILS))
+    text = "，".join(clauses)
+    for word, replacement in SWAPS.items():
+        if word in text and rng.random() < 0.3:
+            text = text.replace(word, replacement, 1)
+    return rng.choice(PREFIXES) + text
+
+
+def labelled_sample(stories: int, seed: int = 7) -> List[Tuple[str, int]]:
+    """(title, story label), 1 to 5 titles per story"""
+    rng = random.Random(seed)
+    words = vocabulary(rng, 200)
+    sample = []
+    seen = set()
+    label = 0
+    while label < stories:
+        clauses = headline(rng, words)
+        if clauses[0] in seen:
+            continue
+        seen.add(clauses[0])
+        for _ in range(rng.randint(1, 5)):
+            sample.append((rewrite(clauses, rng), label))
+        label += 1
+    rng.shuffle(sample)
+    return sample
+
+
+def scale_sample(size: int, seed: int) -> List[str]:
+    """Unlabelled titles over a wide vocabulary, 1 to 5 variants per story, for timing"""
+    rng = random.Random(seed)
+    words = vocabulary(rng, 5000)
+    titles: List[str] = []
+    while len(titles) < size:
+        clauses = ["".join(rng.sample(words, rng.randint(3, 5)))] + rng.sample(DETAILS, rng.randint(0, 1))
+        titles += [rewrite(clauses, rng) for _ in range(rng.randint(1, 5))]
+    return titles[:size]
+
+
+def pair_metrics(groups: List[List[int]], labels: List[int]) -> Tuple[float, float]:
+    """Pairwise precision and recall of a clustering against the labels"""
+
+    def pairs(count: int) -> int:
+        return count * (count - 1) // 2
+
+    predicted = sum(pairs(len(group)) for group in groups)
+    actual = sum(pairs(count) for count in Counter(labels).values())
+    correct = sum(pairs(count) for group in groups for count in Counter(labels[index] for index in group).values())
+    return (correct / predicted if predicted else 1.0), (correct / actual if actual else 1.0)
+
+
+def pairwise_clusters(titles: List[str], similar: Callable[[str, str], bool]) -> List[List[int]]:
+    """Reference clustering comparing every pair, O(n²)"""
+    parents = list(range(len(titles)))
+
+    def find(index: int) -> int:
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    for i in range(len(titles)):
+        for j in range(i):
+            if find(i) != find(j) and similar(titles[i], titles[j]):
+                parents[find(j)] = find(i)
+    groups = {}
+    for index in range(len(titles)):
+        groups.setdefault(find(index), []).append(index)
+    return list(groups.values())
+
+
+def timed(func: Callable, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cross-source story clustering")
+    parser.add_argument("--stories", type=int, default=300, help="标注样本中的故事数")
+    parser.add_argument("--scale", type=int, nargs="*", default=[1000, 10000, 30000], help="计时用的标题数")
+    args = parser.parse_args()
+
+    sample = labelled_sample(args.stories)
+    titles = [title for title, _ in sample]
+    labels = [label for _, label in sample]
+    print(f"Labelled sample: {len(titles)} titles, {args.stories} stories\n")
+
+    shingle_sets = {title: shingles(title) for title in titles}
+    methods = [
+        ("minhash+lsh", lambda: cluster_titles(titles)),
+        ("exact jaccard", lambda: pairwise_clusters(titles, lambda a, b: jaccard(shingle_sets[a], shingle_sets[b]) >= SIMILARITY_THRESHOLD)),
+        ("sequencematcher", lambda: pairwise_clusters(titles, lambda a, b: SequenceMatcher(None, a.lower(), b.lower()).ratio() >= 0.85)),
+    ]
+    print(f"{'method':<18}{'precision':>10}{'recall':>10}{'time':>12}")
+    for name, method in methods:
+        groups, elapsed = timed(method)
+        precision, recall = pair_metrics(groups, labels)
+        print(f"{name:<18}{precision:>10.3f}{recall:>10.3f}{elapsed * 1000:>10.0f}ms")
+
+    print(f"\n{'titles':<10}{'minhash+lsh':>14}{'stories':>10}")
+    for size in args.scale:
+        scaled = scale_sample(size, seed=size)
+        groups, elapsed = timed(cluster_titles, scaled)
+        print(f"{len(scaled):<10}{elapsed * 1000:>12.0f}ms{len(groups):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,38 @@
 import os
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Dict, List
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Base polling interval per source in seconds, fast-moving flash news starts out polled more often
+DEFAULT_POLL_INTERVALS = {
+    "jin10": 120,
+    "wallstreetcn": 300,
+    "cailian": 600,
+    "baidu": 600,
+    "toutiao": 600,
+    "ifeng": 1800,
+}
+
+
+def parse_intervals(value: str) -> Dict[str, int]:
+    """Parse `source=seconds` pairs, e.g. jin10=60,ifeng=3600"""
+    intervals = {}
+    for pair in value.split(","):
+        if "=" not in pair:
+            continue
+        source_id, seconds = pair.split("=", 1)
+        intervals[source_id.strip()] = int(seconds)
+    return intervals
+
+
+def parse_list(value: str) -> List[str]:
+    """Parse a comma separated list, e.g. baidu,jin10"""
+    return [item.strip() for item in value.split(",") if item.strip()]
+
 
 @dataclass
 class Config:
@@ -13,6 +40,10 @@ class Config:
 
     # Summary generation
     enable_summary: bool
+    # Stories summarized within this many days before are not summarized again, 0 disables the check;
+    # with follow-ups on, the same story under a new URL is kept and marked as a follow-up
+    summary_lookback_days: int
+    summary_follow_ups: bool
 
     # Reader API
     reader_api_endpoint: str
@@ -23,26 +54,94 @@ class Config:
     llm_model: str
     llm_api_base: str
 
+    # Sources, an empty enabled list means every discovered source
+    enabled_sources: List[str]
+    disabled_sources: List[str]
+
+    # Fetching
+    fetch_concurrency: int
+    fetch_source_timeout: float
+    fetch_run_timeout: float
+    # live, record (save raw responses to fixtures_dir) or replay (serve them offline)
+    fetch_mode: str
+    fetch_retries: int
+    fetch_retry_base_delay: float
+    fetch_retry_max_delay: float
+    breaker_failure_threshold: int
+    breaker_cooldown: int
+
+    # Blocking work: inline, thread or process
+    executor_mode: str
+    executor_workers: int
+
+    # Snapshot storage: files (one JSON file per snapshot), segments (one JSON Lines file per source per day),
+    # delta (keyframes and the changes between them) or sqlite
+    storage_backend: str
+    # delta backend: a changed snapshot is written in full every this many changed snapshots
+    delta_keyframe_interval: int
+    # Closed days are archived daily at compact_hour; raw data older than retention_days is deleted, 0 keeps it forever
+    retention_days: int
+    compact_hour: int
+
+    # Polling
+    poll_intervals: Dict[str, int]
+    poll_default_interval: int
+    poll_min_interval: int
+    poll_max_interval: int
+    poll_jitter: float
+    aggregate_debounce: int
+    aggregate_max_delay: int
+
     # Paths
     data_dir: Path
     summaries_dir: Path
     audio_dir: Path
     temp_dir: Path
+    state_dir: Path
+    fixtures_dir: Path
 
     @classmethod
     def from_env(cls) -> "Config":
         """Load configuration from environment variables"""
         return cls(
             enable_summary=os.getenv("ENABLE_SUMMARY", "0") == "1",
+            summary_lookback_days=int(os.getenv("SUMMARY_LOOKBACK_DAYS", "7")),
+            summary_follow_ups=os.getenv("SUMMARY_FOLLOW_UPS", "0") == "1",
             reader_api_endpoint=os.getenv("READER_API_ENDPOINT", "https://api.shuyanai.com/v1/reader"),
             reader_api_key=os.getenv("READER_API_KEY", ""),
             llm_api_key=os.getenv("LLM_API_KEY", ""),
             llm_model=os.getenv("LLM_MODEL", ""),
             llm_api_base=os.getenv("LLM_API_BASE", ""),
+            enabled_sources=parse_list(os.getenv("ENABLED_SOURCES", "")),
+            disabled_sources=parse_list(os.getenv("DISABLED_SOURCES", "")),
+            fetch_concurrency=int(os.getenv("FETCH_CONCURRENCY", "6")),
+            fetch_source_timeout=float(os.getenv("FETCH_SOURCE_TIMEOUT", "20")),
+            fetch_run_timeout=float(os.getenv("FETCH_RUN_TIMEOUT", "60")),
+            fetch_mode=os.getenv("FETCH_MODE", "live"),
+            fetch_retries=int(os.getenv("FETCH_RETRIES", "2")),
+            fetch_retry_base_delay=float(os.getenv("FETCH_RETRY_BASE_DELAY", "1")),
+            fetch_retry_max_delay=float(os.getenv("FETCH_RETRY_MAX_DELAY", "8")),
+            breaker_failure_threshold=int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3")),
+            breaker_cooldown=int(os.getenv("BREAKER_COOLDOWN", "900")),
+            executor_mode=os.getenv("EXECUTOR_MODE", "thread"),
+            executor_workers=int(os.getenv("EXECUTOR_WORKERS", "4")),
+            storage_backend=os.getenv("STORAGE_BACKEND", "files"),
+            delta_keyframe_interval=int(os.getenv("DELTA_KEYFRAME_INTERVAL", "32")),
+            retention_days=int(os.getenv("RETENTION_DAYS", "0")),
+            compact_hour=int(os.getenv("COMPACT_HOUR", "4")),
+            poll_intervals={**DEFAULT_POLL_INTERVALS, **parse_intervals(os.getenv("POLL_INTERVALS", ""))},
+            poll_default_interval=int(os.getenv("POLL_DEFAULT_INTERVAL", "1800")),
+            poll_min_interval=int(os.getenv("POLL_MIN_INTERVAL", "60")),
+            poll_max_interval=int(os.getenv("POLL_MAX_INTERVAL", "3600")),
+            poll_jitter=float(os.getenv("POLL_JITTER", "0.1")),
+            aggregate_debounce=int(os.getenv("AGGREGATE_DEBOUNCE", "120")),
+            aggregate_max_delay=int(os.getenv("AGGREGATE_MAX_DELAY", "600")),
             data_dir=Path("data"),
             summaries_dir=Path("data/summaries"),
             audio_dir=Path("data/audio"),
             temp_dir=Path("temp"),
+            state_dir=Path("data/state"),
+            fixtures_dir=Path(os.getenv("FIXTURES_DIR", "fixtures")),
         )
 
 
@@ -0,0 +1,60 @@
+"""Runs CPU and disk-bound stages off the event loop shared by the web server and the scheduler"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from config import cfg
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+
+
+class BlockingExecutor:
+    """
+    Process-wide pool for blocking work
+
+    EXECUTOR_MODE=thread keeps the loop responsive while parsing and file I/O run,
+    process also runs them in parallel but needs picklable callables and arguments,
+    inline runs everything on the loop as before.
+    """
+
+    _pool: Executor | None = None
+
+    @classmethod
+    async def run(cls, func: Callable[..., T], *args) -> T:
+        if cfg.executor_mode == INLINE:
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(cls._get_pool(), functools.partial(func, *args))
+
+    @classmethod
+    def shutdown(cls):
+        if cls._pool is not None:
+            cls._pool.shutdown(wait=True, cancel_futures=True)
+            cls._pool = None
+
+    @classmethod
+    def _get_pool(cls) -> Executor:
+        if cls._pool is None:
+            workers = max(1, cfg.executor_workers)
+            if cfg.executor_mode == PROCESS:
+                # Forking a process that runs an event loop and worker threads is unsafe
+                cls._pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                cls._pool = ThreadPoolExecutor(workers, thread_name_prefix="blocking")
+            logger.debug(f"Blocking executor created: {cfg.executor_mode}, {workers} workers")
+        return cls._pool
+
+
+async def run_blocking(func: Callable[..., T], *args) -> T:
+    """Run `func(*args)` in the blocking executor"""
+    return await BlockingExecutor.run(func, *args)
@@ -1,17 +1,23 @@
-from .baidu import BaiduFetcher
-from .cailian import CailianFetcher
-from .ifeng import IfengFetcher
-from .jin10 import Jin10Fetcher
-from .toutiao import ToutiaoFetcher
-from .wallstreetcn import WallstreetcnFetcher
+import importlib
+
 from .registry import FetcherRegistry
 
-FetcherRegistry.register(BaiduFetcher())
-FetcherRegistry.register(ToutiaoFetcher())
-FetcherRegistry.register(IfengFetcher())
-FetcherRegistry.register(CailianFetcher())
-FetcherRegistry.register(WallstreetcnFetcher())
-FetcherRegistry.register(Jin10Fetcher())
+# Fetcher modules are imported on first access, sources are discovered through FetcherRegistry
+_LAZY_CLASSES = {
+    "BaiduFetcher": ".baidu",
+    "ToutiaoFetcher": ".toutiao",
+    "IfengFetcher": ".ifeng",
+    "CailianFetcher": ".cailian",
+    "WallstreetcnFetcher": ".wallstreetcn",
+    "Jin10Fetcher": ".jin10",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_CLASSES:
+        return getattr(importlib.import_module(_LAZY_CLASSES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "BaiduFetcher",
@@ -22,4 +28,3 @@ __all__ = [
     "Jin10Fetcher",
     "FetcherRegistry",
 ]
-
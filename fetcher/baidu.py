@@ -1,11 +1,11 @@
 import json
-import re
 from typing import List
 from urllib.parse import unquote
 
-import httpx
+from executor import run_blocking
 
 from .base import BaseFetcher
+from .extract import EmbeddedPayloadScanner, extract_payload
 from .models import Trend
 
 
@@ -19,16 +19,18 @@ class BaiduFetcher(BaseFetcher):
     async def fetch(self) -> List[Trend]:
         url = "https://top.baidu.com/board?tab=realtime"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            raw_data = response.text
+        payload = await self.get_embedded(url, self.scanner())
+        return await run_blocking(self.parse_payload, payload)
 
-        match = re.search(r"<!--s-data:(.*?)-->", raw_data, re.DOTALL)
-        if not match:
-            raise ValueError("无法从页面中提取数据")
+    @staticmethod
+    def scanner() -> EmbeddedPayloadScanner:
+        return EmbeddedPayloadScanner(start=rb"<!--s-data:", end=b"-->")
 
-        data = json.loads(match.group(1))
+    def parse(self, content: bytes) -> List[Trend]:
+        return self.parse_payload(extract_payload(content, self.scanner()))
+
+    def parse_payload(self, payload: bytes) -> List[Trend]:
+        data = json.loads(payload)
         cards = data.get("data", {}).get("cards", [])
         if not cards:
             return []
@@ -1,19 +1,96 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Dict, List, Optional
 
+import httpx
+
+from .extract import EmbeddedPayloadScanner
+from .http_client import DEFAULT_TIMEOUT, HttpClientManager
 from .models import Trend
 
 
+class NotModified(Exception):
+    """Upstream reports the board unchanged since the previous fetch"""
+
+
 class BaseFetcher(ABC):
+    timeout: float = DEFAULT_TIMEOUT
+    """Request timeout in seconds"""
+
+    conditional: bool = True
+    """Whether to send ETag / Last-Modified validators"""
+
+    incremental: bool = False
+    """Items carry increasing numeric ids, only those above the high-water mark are stored"""
+
+    def __init__(self):
+        self._validators: Dict[str, str] = {}
+
     @property
     @abstractmethod
     def source_id(self) -> str:
         pass
 
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled keep-alive client for this source"""
+        return HttpClientManager.get(self.source_id, timeout=self.timeout)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        """GET through the pooled client, raising NotModified on 304"""
+        headers = self._request_headers(kwargs.pop("headers", None))
+        response = await self.client.get(url, headers=headers, **kwargs)
+        self._check_response(response)
+        return response
+
+    async def get_embedded(self, url: str, scanner: EmbeddedPayloadScanner, **kwargs) -> bytes:
+        """Stream a page and stop reading as soon as the scanner has the embedded payload"""
+        headers = self._request_headers(kwargs.pop("headers", None))
+        async with self.client.stream("GET", url, headers=headers, **kwargs) as response:
+            self._check_response(response)
+            async for chunk in response.aiter_bytes():
+                if scanner.feed(chunk):
+                    return scanner.payload
+        raise ValueError("无法从页面中提取数据")
+
+    def _request_headers(self, headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+        headers = dict(headers or {})
+        if self.conditional:
+            headers.update(self._validators)
+        return headers
+
+    def _check_response(self, response: httpx.Response):
+        if response.status_code == 304:
+            raise NotModified(self.source_id)
+        response.raise_for_status()
+
+        if self.conditional:
+            self._remember_validators(response)
+
+    def _remember_validators(self, response: httpx.Response):
+        validators = {}
+        if etag := response.headers.get("ETag"):
+            validators["If-None-Match"] = etag
+        if last_modified := response.headers.get("Last-Modified"):
+            validators["If-Modified-Since"] = last_modified
+        self._validators = validators
+
+    def reset_validators(self):
+        """Force the next request to download the full payload"""
+        self._validators = {}
+
     @abstractmethod
     async def fetch(self) -> List[Trend]:
         """
         Fetch trending topics
         Returns: List[Trend] - List of trending topics
+        Raises: NotModified - upstream confirmed nothing changed
+        """
+        pass
+
+    @abstractmethod
+    def parse(self, content: bytes) -> List[Trend]:
+        """
+        Parse a raw upstream response body, no network access
+        Returns: List[Trend] - List of trending topics
         """
         pass
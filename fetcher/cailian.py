@@ -1,8 +1,9 @@
 import hashlib
+import json
 from typing import List
 from urllib.parse import urlencode
 
-import httpx
+from executor import run_blocking
 
 from .base import BaseFetcher
 from .models import Trend
@@ -11,6 +12,8 @@ from .models import Trend
 class CailianFetcher(BaseFetcher):
     """财联社"""
 
+    incremental = True
+
     @property
     def source_id(self) -> str:
         return "cailian"
@@ -41,10 +44,11 @@ class CailianFetcher(BaseFetcher):
             "Referer": "https://www.cls.cn/",
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, headers=headers)
-            response.raise_for_status()
-            data = response.json()
+        response = await self.get(url, params=params, headers=headers)
+        return await run_blocking(self.parse, response.content)
+
+    def parse(self, content: bytes) -> List[Trend]:
+        data = json.loads(content)
 
         items_data = data.get("data", [])
         if not items_data:
@@ -0,0 +1,129 @@
+"""Incremental extraction of JSON payloads embedded in HTML pages"""
+
+import re
+from typing import Optional
+
+# Only these bytes can change the nesting state, everything in between is skipped by the regex engine
+STRUCTURE_PATTERN = re.compile(rb'[{}\[\]"]')
+STRING_PATTERN = re.compile(rb'["\\]')
+
+# Bytes kept from the previous chunk so a start marker split across chunks is still found
+MARKER_OVERLAP = 256
+
+
+class EmbeddedPayloadScanner:
+    """
+    Locates an embedded payload in a byte stream fed chunk by chunk
+
+    The payload starts right after `start` and ends either at the `end` terminator
+    or, when `end` is None, where the JSON object/array opened after `start` closes.
+    """
+
+    def __init__(self, start: bytes, end: Optional[bytes] = None):
+        self.start_pattern = re.compile(start)
+        self.end = end
+        self.bytes_scanned = 0
+        self._buffer = bytearray()
+        self._payload_start: Optional[int] = None
+        self._payload_end: Optional[int] = None
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+
+    @property
+    def complete(self) -> bool:
+        return self._payload_end is not None
+
+    @property
+    def payload(self) -> bytes:
+        if not self.complete:
+            raise ValueError("payload not complete")
+        return bytes(self._buffer[self._payload_start : self._payload_end])
+
+    def feed(self, chunk: bytes) -> bool:
+        """Consume the next chunk, returns True once the payload is complete"""
+        if self.complete:
+            return True
+        self.bytes_scanned += len(chunk)
+        self._buffer += chunk
+
+        if self._payload_start is None and not self._find_start():
+            return False
+
+        if self.end is not None:
+            self._find_terminator()
+        else:
+            self._find_balanced_end()
+        return self.complete
+
+    def _find_start(self) -> bool:
+        match = self.start_pattern.search(self._buffer)
+        if not match:
+            # Nothing before the marker is needed, keep only a tail that may hold its beginning
+            del self._buffer[:-MARKER_OVERLAP]
+            return False
+
+        del self._buffer[: match.end()]
+        self._payload_start = 0
+        self._pos = 0
+        return True
+
+    def _find_terminator(self):
+        index = self._buffer.find(self.end, self._pos)
+        if index >= 0:
+            self._payload_end = index
+        else:
+            self._pos = max(0, len(self._buffer) - len(self.end) + 1)
+
+    def _find_balanced_end(self):
+        buffer = self._buffer
+        pos = self._pos
+
+        while True:
+            if self._in_string:
+                match = STRING_PATTERN.search(buffer, pos)
+                if not match:
+                    pos = len(buffer)
+                    break
+                index = match.start()
+                if buffer[index] == 0x5C:  # backslash escapes the next byte
+                    if index + 1 >= len(buffer):
+                        pos = index
+                        break
+                    pos = index + 2
+                    continue
+                self._in_string = False
+                pos = index + 1
+                continue
+
+            match = STRUCTURE_PATTERN.search(buffer, pos)
+            if not match:
+                pos = len(buffer)
+                break
+            index = match.start()
+            byte = buffer[index]
+            pos = index + 1
+
+            if self._depth == 0 and byte not in (0x7B, 0x5B):
+                raise ValueError("无法从页面中提取数据")
+
+            if byte == 0x22:  # "
+                self._in_string = True
+            elif byte in (0x7B, 0x5B):  # { [
+                if self._depth == 0:
+                    self._payload_start = index
+                self._depth += 1
+            else:  # } ]
+                self._depth -= 1
+                if self._depth == 0:
+                    self._payload_end = pos
+                    break
+
+        self._pos = pos
+
+
+def extract_payload(content: bytes, scanner: EmbeddedPayloadScanner) -> bytes:
+    """Run a scanner over a complete response body"""
+    if not scanner.feed(content):
+        raise ValueError("无法从页面中提取数据")
+    return scanner.payload
@@ -0,0 +1,114 @@
+"""Process-wide pooled HTTP clients shared by fetchers and the reader"""
+
+import asyncio
+import logging
+from typing import Dict, Set, Tuple
+
+import httpx
+
+from config import cfg
+
+from .replay import RecordingTransport, ReplayTransport
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_TIMEOUT = 10.0
+CONNECT_TIMEOUT = 5.0
+
+# Each pool talks to a single upstream, so these limits are effectively per host
+MAX_CONNECTIONS_PER_HOST = 10
+MAX_KEEPALIVE_PER_HOST = 5
+KEEPALIVE_EXPIRY = 120.0
+
+
+class HttpClientManager:
+    """Keeps one keep-alive AsyncClient per upstream for the lifetime of the process"""
+
+    _clients: Dict[str, Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+    # Replaced clients being closed, referenced until their close completes
+    _closing: Set[asyncio.Task] = set()
+    _ssl_context = None
+
+    @classmethod
+    def get(cls, name: str, timeout: float = DEFAULT_TIMEOUT) -> httpx.AsyncClient:
+        """Return the pooled client for `name`, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        entry = cls._clients.get(name)
+        # Clients are bound to the loop that opened their connections
+        if entry is not None and entry[0] is loop and not entry[1].is_closed:
+            return entry[1]
+        if entry is not None and not entry[1].is_closed:
+            # The replaced pool would otherwise keep its connections until garbage collection
+            cls._close_replaced(name, entry[0], entry[1], loop)
+
+        client = cls._create_client(name, timeout)
+        cls._clients[name] = (loop, client)
+        logger.debug(f"HTTP client created: {name} (http2={HTTP2_AVAILABLE}, timeout={timeout}s)")
+        return client
+
+    @classmethod
+    def _close_replaced(cls, name: str, old_loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop):
+        """Close a client of another loop: on that loop while another thread still runs it, else on this one"""
+        if old_loop.is_running() and not old_loop.is_closed():
+            asyncio.run_coroutine_threadsafe(cls._close_client(name, client), old_loop)
+            return
+        task = loop.create_task(cls._close_client(name, client))
+        cls._closing.add(task)
+        task.add_done_callback(cls._closing.discard)
+
+    @staticmethod
+    async def _close_client(name: str, client: httpx.AsyncClient):
+        try:
+            await client.aclose()
+            logger.debug(f"HTTP client closed: {name}")
+        except Exception as e:
+            # The connections of a closed loop cannot be shut down cleanly, their sockets are released on collection
+            logger.debug(f"Failed to close replaced HTTP client {name}: {e}")
+
+    @classmethod
+    def _create_client(cls, name: str, timeout: float) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            transport=cls._create_transport(name),
+            timeout=httpx.Timeout(timeout, connect=min(timeout, CONNECT_TIMEOUT)),
+        )
+
+    @classmethod
+    def _create_transport(cls, name: str) -> httpx.AsyncBaseTransport:
+        if cfg.fetch_mode == "replay":
+            return ReplayTransport(cfg.fixtures_dir, name)
+
+        if cls._ssl_context is None:
+            # Loading the CA bundle is costly, share one context across all pools
+            cls._ssl_context = httpx.create_ssl_context()
+
+        transport = httpx.AsyncHTTPTransport(
+            http2=HTTP2_AVAILABLE,
+            verify=cls._ssl_context,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS_PER_HOST,
+                max_keepalive_connections=MAX_KEEPALIVE_PER_HOST,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+        )
+        if cfg.fetch_mode == "record":
+            return RecordingTransport(cfg.fixtures_dir, name, transport)
+        return transport
+
+    @classmethod
+    async def aclose(cls):
+        """Close every pooled client"""
+        clients, cls._clients = cls._clients, {}
+        for name, (loop, client) in clients.items():
+            if loop is not asyncio.get_running_loop() or loop.is_closed():
+                continue
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close HTTP client {name}: {e}")
@@ -1,16 +1,19 @@
 import json
-import re
 from typing import List
 
-import httpx
+from executor import run_blocking
 
 from .base import BaseFetcher
+from .extract import EmbeddedPayloadScanner, extract_payload
 from .models import Trend
 
 
 class IfengFetcher(BaseFetcher):
     """凤凰网"""
 
+    # The embedded data lives in the full homepage, which is much larger than the other payloads
+    timeout = 20.0
+
     @property
     def source_id(self) -> str:
         return "ifeng"
@@ -18,16 +21,18 @@ class IfengFetcher(BaseFetcher):
     async def fetch(self) -> List[Trend]:
         url = "https://www.ifeng.com"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            html = response.text
+        payload = await self.get_embedded(url, self.scanner())
+        return await run_blocking(self.parse_payload, payload)
+
+    @staticmethod
+    def scanner() -> EmbeddedPayloadScanner:
+        return EmbeddedPayloadScanner(start=rb"var\s+allData\s*=\s*")
 
-        match = re.search(r"var\s+allData\s*=\s*(\{[\s\S]*?\});", html)
-        if not match:
-            raise ValueError("无法从页面中提取数据")
+    def parse(self, content: bytes) -> List[Trend]:
+        return self.parse_payload(extract_payload(content, self.scanner()))
 
-        data = json.loads(match.group(1))
+    def parse_payload(self, payload: bytes) -> List[Trend]:
+        data = json.loads(payload)
         raw_news = data.get("hotNews1", [])
         if not raw_news:
             return []
@@ -3,7 +3,7 @@ import re
 import time
 from typing import List
 
-import httpx
+from executor import run_blocking
 
 from .base import BaseFetcher
 from .models import Trend
@@ -12,6 +12,8 @@ from .models import Trend
 class Jin10Fetcher(BaseFetcher):
     """金十数据"""
 
+    incremental = True
+
     @property
     def source_id(self) -> str:
         return "jin10"
@@ -20,10 +22,11 @@ class Jin10Fetcher(BaseFetcher):
         timestamp = int(time.time() * 1000)
         url = f"https://www.jin10.com/flash_newest.js?t={timestamp}"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            raw_data = response.text
+        response = await self.get(url)
+        return await run_blocking(self.parse, response.content)
+
+    def parse(self, content: bytes) -> List[Trend]:
+        raw_data = content.decode("utf-8", errors="replace")
 
         json_str = (
             raw_data.replace("var newest = ", "")
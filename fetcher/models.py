@@ -1,10 +1,11 @@
 """数据模型定义"""
 
+import sys
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
 
-@dataclass
+@dataclass(slots=True)
 class Trend:
     """Trending topics 热搜"""
 
@@ -22,3 +23,41 @@ class Trend:
 
     score: Optional[int] = None
     """热度分数"""
+
+
+class TrendInterner:
+    """
+    Shares one Trend object, and one copy of its strings, for every identical item
+    seen across snapshots, which repeat most of their items poll after poll
+    """
+
+    def __init__(self):
+        self._trends: Dict[Tuple, Trend] = {}
+        self._date: Optional[str] = None
+
+    def scope(self, date: str):
+        """
+        Share objects within one day: moving to another date drops the ones kept so far,
+        so the interner of a long-lived store stays the size of a day's distinct items
+        """
+        if date != self._date:
+            self._trends = {}
+            self._date = date
+
+    def trend(self, data: Dict[str, Any]) -> Trend:
+        key = (data["id"], data["title"], data["url"], data.get("description"), data.get("score"))
+        trend = self._trends.get(key)
+        if trend is None:
+            description = data.get("description")
+            trend = Trend(
+                id=sys.intern(data["id"]),
+                title=sys.intern(data["title"]),
+                url=sys.intern(data["url"]),
+                description=sys.intern(description) if description is not None else None,
+                score=data.get("score"),
+            )
+            self._trends[key] = trend
+        return trend
+
+    def __len__(self) -> int:
+        return len(self._trends)
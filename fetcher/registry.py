@@ -1,25 +1,82 @@
-from typing import Dict, List
+import importlib
+import logging
+import time
+from importlib.metadata import entry_points
+from typing import TYPE_CHECKING, Dict, List
 
-from .base import BaseFetcher
+if TYPE_CHECKING:
+    from .base import BaseFetcher
+
+logger = logging.getLogger(__name__)
+
+# Built-in sources: source_id -> "module:Class", imported only when the source is first used
+BUILTIN_FETCHERS = {
+    "baidu": "fetcher.baidu:BaiduFetcher",
+    "toutiao": "fetcher.toutiao:ToutiaoFetcher",
+    "ifeng": "fetcher.ifeng:IfengFetcher",
+    "cailian": "fetcher.cailian:CailianFetcher",
+    "wallstreetcn": "fetcher.wallstreetcn:WallstreetcnFetcher",
+    "jin10": "fetcher.jin10:Jin10Fetcher",
+}
+
+# Third-party packages can add sources by declaring entry points in this group, e.g.
+# [project.entry-points."briefy.fetchers"]
+# weibo = "briefy_weibo:WeiboFetcher"
+ENTRY_POINT_GROUP = "briefy.fetchers"
 
 
 class FetcherRegistry:
-    _fetchers: Dict[str, BaseFetcher] = {}
+    _fetchers: Dict[str, "BaseFetcher"] = {}
+    _manifest: Dict[str, str] | None = None
 
     @classmethod
-    def register(cls, fetcher: BaseFetcher):
+    def register(cls, fetcher: "BaseFetcher"):
         cls._fetchers[fetcher.source_id] = fetcher
 
     @classmethod
-    def get(cls, source_id: str) -> BaseFetcher:
+    def declare(cls, source_id: str, target: str):
+        """Declare a source as "module:Class" without importing it"""
+        cls._load_manifest()[source_id] = target
+
+    @classmethod
+    def get(cls, source_id: str) -> "BaseFetcher":
         if source_id not in cls._fetchers:
-            raise ValueError(f"Source '{source_id}' not registered")
+            if source_id not in cls.list_source_ids():
+                raise ValueError(f"Source '{source_id}' not registered or disabled")
+            cls.register(cls._instantiate(source_id, cls._load_manifest()[source_id]))
         return cls._fetchers[source_id]
 
     @classmethod
-    def all(cls) -> Dict[str, BaseFetcher]:
-        return cls._fetchers.copy()
+    def all(cls) -> Dict[str, "BaseFetcher"]:
+        return {source_id: cls.get(source_id) for source_id in cls.list_source_ids()}
 
     @classmethod
     def list_source_ids(cls) -> List[str]:
-        return list(cls._fetchers.keys())
+        from config import cfg
+
+        source_ids = list(cls._load_manifest())
+        source_ids += [source_id for source_id in cls._fetchers if source_id not in source_ids]
+        if cfg.enabled_sources:
+            source_ids = [source_id for source_id in source_ids if source_id in cfg.enabled_sources]
+        return [source_id for source_id in source_ids if source_id not in cfg.disabled_sources]
+
+    @classmethod
+    def _load_manifest(cls) -> Dict[str, str]:
+        if cls._manifest is None:
+            manifest = dict(BUILTIN_FETCHERS)
+            for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+                manifest[entry_point.name] = entry_point.value
+            cls._manifest = manifest
+        return cls._manifest
+
+    @staticmethod
+    def _instantiate(source_id: str, target: str) -> "BaseFetcher":
+        module_name, _, class_name = target.partition(":")
+        start = time.perf_counter()
+        fetcher_class = getattr(importlib.import_module(module_name), class_name)
+        fetcher = fetcher_class()
+        logger.debug(f"Loaded fetcher {source_id} from {target} in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+        if fetcher.source_id != source_id:
+            raise ValueError(f"Fetcher {target} reports source_id '{fetcher.source_id}', declared as '{source_id}'")
+        return fetcher
@@ -0,0 +1,107 @@
+"""Record raw upstream responses to fixture files and replay them without network"""
+
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Recorded bodies are stored decoded, so the transfer headers no longer describe them
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+@dataclass
+class Fixture:
+    """A recorded upstream response"""
+
+    method: str
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    body_path: Path
+
+    @property
+    def body(self) -> bytes:
+        return self.body_path.read_bytes()
+
+    def matches(self, request: httpx.Request) -> bool:
+        recorded = httpx.URL(self.url)
+        return (
+            self.method == request.method
+            and recorded.host == request.url.host
+            and recorded.path == request.url.path
+        )
+
+
+def load_fixtures(fixtures_dir: Path, name: str) -> List[Fixture]:
+    """All recordings of one source, oldest first"""
+    fixtures = []
+    for meta_file in sorted((fixtures_dir / name).glob("*.json")):
+        with open(meta_file, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        fixtures.append(
+            Fixture(
+                method=meta["method"],
+                url=meta["url"],
+                status_code=meta["status_code"],
+                headers=meta["headers"],
+                body_path=meta_file.with_suffix(".body"),
+            )
+        )
+    return fixtures
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Passes requests to the network and writes every response to `fixtures_dir/name/`"""
+
+    def __init__(self, fixtures_dir: Path, name: str, transport: httpx.AsyncBaseTransport):
+        self.directory = fixtures_dir / name
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.transport.handle_async_request(request)
+        # Decode through a client-side Response so gzip/br bodies are stored as plain bytes
+        decoded = httpx.Response(response.status_code, headers=response.headers, stream=response.stream, request=request)
+        body = await decoded.aread()
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS}
+
+        stem = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.directory.joinpath(f"{stem}.body").write_bytes(body)
+        with open(self.directory / f"{stem}.json", "w", encoding="utf-8") as f:
+            meta = {
+                "method": request.method,
+                "url": str(request.url),
+                "status_code": response.status_code,
+                "headers": headers,
+            }
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        logger.debug(f"Recorded {request.url} -> {self.directory / stem}")
+
+        return httpx.Response(response.status_code, headers=headers, content=body, request=request)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Serves recorded responses, matching on method, host and path"""
+
+    def __init__(self, fixtures_dir: Path, name: str):
+        self.name = name
+        self.fixtures = load_fixtures(fixtures_dir, name)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        candidates = [fixture for fixture in self.fixtures if fixture.matches(request)]
+        if not candidates:
+            raise httpx.ConnectError(f"No recorded response for {request.method} {request.url} ({self.name})", request=request)
+
+        # Prefer an exact URL match, otherwise the most recent recording of the same endpoint
+        exact = [fixture for fixture in candidates if fixture.url == str(request.url)]
+        fixture = (exact or candidates)[-1]
+        return httpx.Response(fixture.status_code, headers=fixture.headers, content=fixture.body, request=request)
@@ -0,0 +1,144 @@
+"""Per-source circuit breakers and retry with backoff"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+from config import cfg
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+BREAKERS_FILENAME = "breakers.json"
+
+
+@dataclass
+class CircuitBreaker:
+    """Stops calling a source after repeated failures until a cooldown has passed"""
+
+    state: str = CLOSED
+    failures: int = 0
+    """连续失败次数"""
+
+    opened_at: float = 0.0
+    """Unix time the breaker last opened"""
+
+    def __post_init__(self):
+        # Unix time the half-open breaker let its probe through, not persisted: no probe outlives the process
+        self.probe_started: Optional[float] = None
+
+    def allow_request(self) -> bool:
+        """Whether the source may be called now, an expired open breaker lets one probe through at a time"""
+        now = time.time()
+        if self.state == OPEN and now - self.opened_at >= cfg.breaker_cooldown:
+            self.state = HALF_OPEN
+        if self.state == OPEN:
+            return False
+        if self.state == HALF_OPEN:
+            # A probe that never reported back is given up after another cooldown
+            if self.probe_started is not None and now - self.probe_started < cfg.breaker_cooldown:
+                return False
+            self.probe_started = now
+        return True
+
+    def record_success(self) -> bool:
+        """Returns True if the state changed"""
+        changed = self.state != CLOSED or self.failures > 0
+        self.state = CLOSED
+        self.failures = 0
+        self.probe_started = None
+        return changed
+
+    def record_failure(self) -> bool:
+        """Returns True if the breaker opened"""
+        self.failures += 1
+        self.probe_started = None
+        if self.state == HALF_OPEN or self.failures >= cfg.breaker_failure_threshold:
+            self.state = OPEN
+            self.opened_at = time.time()
+            return True
+        return False
+
+
+class CircuitBreakerRegistry:
+    """Breakers of all sources, persisted so an outage is remembered across restarts"""
+
+    _breakers: Dict[str, CircuitBreaker] | None = None
+
+    @classmethod
+    def get(cls, source_id: str) -> CircuitBreaker:
+        breakers = cls._load()
+        if source_id not in breakers:
+            breakers[source_id] = CircuitBreaker()
+        return breakers[source_id]
+
+    @classmethod
+    def record_success(cls, source_id: str):
+        if cls.get(source_id).record_success():
+            logger.info(f"🔌 {source_id}: circuit closed")
+            cls._save()
+
+    @classmethod
+    def record_failure(cls, source_id: str):
+        breaker = cls.get(source_id)
+        if breaker.record_failure():
+            logger.warning(f"🔌 {source_id}: circuit open for {cfg.breaker_cooldown}s after {breaker.failures} failures")
+        cls._save()
+
+    @classmethod
+    def _path(cls) -> Path:
+        return cfg.state_dir / BREAKERS_FILENAME
+
+    @classmethod
+    def _load(cls) -> Dict[str, CircuitBreaker]:
+        if cls._breakers is None:
+            cls._breakers = {}
+            if cls._path().exists():
+                try:
+                    with open(cls._path(), "r", encoding="utf-8") as f:
+                        cls._breakers = {source_id: CircuitBreaker(**state) for source_id, state in json.load(f).items()}
+                except (OSError, ValueError, TypeError) as e:
+                    logger.warning(f"Failed to load circuit breaker state: {e}")
+        return cls._breakers
+
+    @classmethod
+    def _save(cls):
+        path = cls._path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({source_id: asdict(breaker) for source_id, breaker in cls._load().items()}, f, indent=2)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Network errors, timeouts, 429 and 5xx are worth another attempt, parse errors and other 4xx are not"""
+    if isinstance(error, httpx.HTTPStatusError):
+        status_code = error.response.status_code
+        return status_code == 429 or status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+async def call_with_retry(func: Callable[[], Awaitable[T]], source_id: str = "") -> T:
+    """Call `func`, retrying retryable errors with exponential backoff and full jitter"""
+    attempt = 0
+    while True:
+        try:
+            return await func()
+        except Exception as e:
+            if attempt >= cfg.fetch_retries or not is_retryable(e):
+                raise
+            delay = random.uniform(0, min(cfg.fetch_retry_max_delay, cfg.fetch_retry_base_delay * 2**attempt))
+            attempt += 1
+            logger.info(f"↻ {source_id}: {e or type(e).__name__}, retry {attempt}/{cfg.fetch_retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
@@ -1,6 +1,7 @@
+import json
 from typing import List
 
-import httpx
+from executor import run_blocking
 
 from .base import BaseFetcher
 from .models import Trend
@@ -16,10 +17,11 @@ class ToutiaoFetcher(BaseFetcher):
     async def fetch(self) -> List[Trend]:
         url = "https://www.toutiao.com/hot-event/hot-board/?origin=toutiao_pc"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            data = response.json()
+        response = await self.get(url)
+        return await run_blocking(self.parse, response.content)
+
+    def parse(self, content: bytes) -> List[Trend]:
+        data = json.loads(content)
 
         items = []
         for item in data.get("data", []):
@@ -1,6 +1,7 @@
+import json
 from typing import List
 
-import httpx
+from executor import run_blocking
 
 from .base import BaseFetcher
 from .models import Trend
@@ -9,6 +10,8 @@ from .models import Trend
 class WallstreetcnFetcher(BaseFetcher):
     """华尔街见闻"""
 
+    incremental = True
+
     @property
     def source_id(self) -> str:
         return "wallstreetcn"
@@ -16,10 +19,11 @@ class WallstreetcnFetcher(BaseFetcher):
     async def fetch(self) -> List[Trend]:
         url = "https://api-one.wallstcn.com/apiv1/content/information-flow?channel=global-channel&accept=article&limit=30"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            data = response.json()
+        response = await self.get(url)
+        return await run_blocking(self.parse, response.content)
+
+    def parse(self, content: bytes) -> List[Trend]:
+        data = json.loads(content)
 
         items_data = data.get("data", {}).get("items", [])
         if not items_data:
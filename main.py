@@ -3,21 +3,33 @@ import asyncio
 import json
 import logging
 from contextlib import asynccontextmanager
+from datetime import datetime
 
 import uvicorn
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
+from pydantic import BaseModel, Field
 
 from config import cfg
+from executor import BlockingExecutor, run_blocking
+from fetcher.http_client import HttpClientManager
+from fetcher.registry import FetcherRegistry
 from logger.logging import setup_logger
-from scheduler import scheduled_task
+from polling import AdaptivePoller
+from scheduler import scheduled_compaction, scheduled_task
+from storage.aggregator import MAX_ITEMS_PER_SOURCE
+from storage.monitor import MAX_PAGE_SIZE as MAX_MATCHES_PAGE_SIZE, KeywordMonitor
+from storage.rollup import aggregate_range
+from storage.search import MAX_PAGE_SIZE, SearchIndex
+from storage.timeseries import TopicTimeSeries
 from web.render import render_page
 
 setup_logger()
 logger = logging.getLogger(__name__)
 
 scheduler = AsyncIOScheduler()
+poller = AdaptivePoller(scheduler)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -31,22 +43,18 @@ async def lifespan(app: FastAPI):
     
     logger.info("Stopping scheduler...")
     scheduler.shutdown()
+    await HttpClientManager.aclose()
+    BlockingExecutor.shutdown()
 
 async def start_scheduler_and_initial_task():
     """将调度器启动和首次抓取放到后台执行"""
     # 给服务器一点时间完全启动（非必须，但安全）
     await asyncio.sleep(0.5)
     
-    # 添加定时任务
-    scheduler.add_job(
-        scheduled_task,
-        "interval",
-        minutes=30,
-        id="fetch_and_aggregate",
-        replace_existing=True,
-    )
+    # 每个源按自身变化频率轮询，聚合在抓取平静后防抖触发
     scheduler.start()
-    logger.info("Scheduler started: fetch and aggregate every 30 minutes")
+    poller.start(FetcherRegistry.list_source_ids())
+    scheduler.add_job(scheduled_compaction, "cron", hour=cfg.compact_hour, id="compaction", replace_existing=True)
     
     # 执行首次抓取（不等待完成，直接创建任务）
     asyncio.create_task(scheduled_task())
@@ -64,6 +72,15 @@ async def index(date: str | None = Query(None, description="日期，格式：YY
     except RuntimeError as e:
         raise HTTPException(status_code=503, detail=str(e))
 
+def check_dates(*values: str | None):
+    """日期参数格式校验，格式错误时返回 400"""
+    for value in values:
+        if value is not None:
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"日期格式错误: {value}")
+
 # ---------- API 接口 ----------
 @app.get("/api/summary/{date}")
 async def get_summary(date: str):
@@ -78,6 +95,105 @@ async def get_summary(date: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"读取摘要数据失败: {str(e)}")
 
+@app.get("/api/trends")
+async def get_trends(
+    date_from: str = Query(..., alias="from", description="起始日期，格式：YYYY-MM-DD"),
+    date_to: str = Query(..., alias="to", description="结束日期（含），格式：YYYY-MM-DD"),
+    source: list[str] | None = Query(None, description="只返回这些源，可重复"),
+    limit: int = Query(MAX_ITEMS_PER_SOURCE, ge=1, le=MAX_ITEMS_PER_SOURCE, description="每个源的条数"),
+):
+    """日期范围内各源的热搜排名（周榜、月榜），由每日统计合并而来"""
+    try:
+        data = await run_blocking(aggregate_range, date_from, date_to, source, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse(content=data)
+
+@app.get("/api/search")
+async def search(
+    q: str = Query(..., min_length=1, description="搜索词，空格分隔的多个词需同时出现"),
+    date_from: str | None = Query(None, alias="from", description="起始日期，格式：YYYY-MM-DD"),
+    date_to: str | None = Query(None, alias="to", description="结束日期（含），格式：YYYY-MM-DD"),
+    source: list[str] | None = Query(None, description="只搜索这些源，可重复"),
+    page: int = Query(1, ge=1, description="页码"),
+    page_size: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="每页条数"),
+):
+    """搜索历史热搜标题、描述与摘要，按相关度排序"""
+    check_dates(date_from, date_to)
+
+    try:
+        data = await run_blocking(SearchIndex.default().search, q, date_from, date_to, source, page, page_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse(content=data)
+
+class SubscriptionRequest(BaseModel):
+    name: str = Field("", description="订阅名称，默认取第一个关键词")
+    keywords: list[str] = Field(..., description="关键词，标题或描述包含任意一个即匹配，不区分大小写与全半角")
+    sources: list[str] | None = Field(None, description="只监控这些源，默认所有源")
+
+@app.get("/api/subscriptions")
+async def list_subscriptions():
+    """所有关键词订阅及其匹配数"""
+    return JSONResponse(content=await run_blocking(KeywordMonitor.default().subscriptions))
+
+@app.post("/api/subscriptions", status_code=201)
+async def create_subscription(request: SubscriptionRequest):
+    """新建关键词订阅，此后抓取到的热搜与快讯会与其匹配"""
+    try:
+        subscription = await run_blocking(KeywordMonitor.default().subscribe, request.name, request.keywords, request.sources)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse(status_code=201, content=subscription)
+
+@app.delete("/api/subscriptions/{subscription_id}", status_code=204)
+async def delete_subscription(subscription_id: int):
+    """删除订阅及其匹配记录"""
+    if not await run_blocking(KeywordMonitor.default().unsubscribe, subscription_id):
+        raise HTTPException(status_code=404, detail=f"未找到订阅 {subscription_id}")
+    return Response(status_code=204)
+
+@app.get("/api/subscriptions/{subscription_id}/matches")
+async def get_subscription_matches(
+    subscription_id: int,
+    date_from: str | None = Query(None, alias="from", description="起始日期，格式：YYYY-MM-DD"),
+    date_to: str | None = Query(None, alias="to", description="结束日期（含），格式：YYYY-MM-DD"),
+    page: int = Query(1, ge=1, description="页码"),
+    page_size: int = Query(20, ge=1, le=MAX_MATCHES_PAGE_SIZE, description="每页条数"),
+):
+    """订阅匹配到的热搜与快讯，最新的在前"""
+    check_dates(date_from, date_to)
+    monitor = KeywordMonitor.default()
+    if await run_blocking(monitor.subscription, subscription_id) is None:
+        raise HTTPException(status_code=404, detail=f"未找到订阅 {subscription_id}")
+    data = await run_blocking(monitor.matches, subscription_id, date_from, date_to, page, page_size)
+    return JSONResponse(content=data)
+
+@app.get("/api/topic/{source}/{topic_id:path}/history")
+async def get_topic_history(
+    source: str,
+    topic_id: str,
+    date_from: str | None = Query(None, alias="from", description="起始日期，格式：YYYY-MM-DD"),
+    date_to: str | None = Query(None, alias="to", description="结束日期（含），格式：YYYY-MM-DD"),
+    points: int = Query(200, ge=1, le=2000, description="最多返回的点数，超出时按时间分桶降采样"),
+):
+    """话题的排名与热度随时间的变化"""
+    check_dates(date_from, date_to)
+
+    history = await run_blocking(TopicTimeSeries().history, source, topic_id, date_from, date_to)
+    if not len(history):
+        raise HTTPException(status_code=404, detail=f"未找到 {source} 话题 {topic_id} 的历史数据")
+    return JSONResponse(
+        content={
+            "source": source,
+            "id": topic_id,
+            "samples": len(history),
+            "first_seen": history.first_seen(),
+            "last_seen": history.last_seen(),
+            "points": history.downsample(points),
+        }
+    )
+
 @app.get("/api/audio/{date}")
 async def get_audio(date: str):
     """获取指定日期的音频"""
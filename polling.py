@@ -0,0 +1,155 @@
+"""Adaptive per-source polling"""
+
+import logging
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from config import cfg
+from fetcher.models import Trend
+from fetcher.resilience import CircuitBreakerRegistry
+from scheduler import fetch_source, scheduled_aggregation
+from storage.base import TrendStorage, create_storage
+
+logger = logging.getLogger(__name__)
+
+# Churn is the share of the board that differs from the previous snapshot (Jaccard distance of item ids)
+HIGH_CHURN = 0.3
+LOW_CHURN = 0.05
+CHURN_SMOOTHING = 0.5
+
+SPEEDUP_FACTOR = 0.5
+BACKOFF_FACTOR = 1.5
+
+AGGREGATE_JOB_ID = "aggregate"
+
+
+def measure_churn(previous_ids: Set[str], current_ids: Set[str]) -> float:
+    """Jaccard distance between two consecutive boards"""
+    union = previous_ids | current_ids
+    if not union:
+        return 0.0
+    return 1 - len(previous_ids & current_ids) / len(union)
+
+
+@dataclass
+class PollState:
+    """Polling state of a single source"""
+
+    interval: float
+    """Current polling interval in seconds"""
+
+    churn: float = (HIGH_CHURN + LOW_CHURN) / 2
+    """Smoothed churn of recent snapshots, starts neutral"""
+
+    previous_ids: Optional[Set[str]] = None
+    """Item ids of the previous snapshot"""
+
+
+class AdaptivePoller:
+    """Polls each source at its own rate, adapting to how fast its board changes"""
+
+    def __init__(self, scheduler: AsyncIOScheduler, storage: TrendStorage | None = None):
+        self.scheduler = scheduler
+        self.storage = storage or create_storage()
+        self.states: Dict[str, PollState] = {}
+        self._aggregation_pending_since: Optional[datetime] = None
+
+    def start(self, source_ids: List[str]):
+        """Schedule the first poll of every source one base interval from now"""
+        for source_id in source_ids:
+            interval = cfg.poll_intervals.get(source_id, cfg.poll_default_interval)
+            state = PollState(interval=self._clamp(interval))
+            self.states[source_id] = state
+            self._schedule(source_id, state.interval)
+
+        logger.info(
+            "Adaptive polling started: "
+            + ", ".join(f"{source_id}={int(state.interval)}s" for source_id, state in self.states.items())
+        )
+
+    async def poll(self, source_id: str):
+        state = self.states[source_id]
+        if not CircuitBreakerRegistry.get(source_id).allow_request():
+            logger.debug(f"{source_id}: circuit open, poll skipped")
+            self._schedule(source_id, state.interval)
+            return
+
+        try:
+            items = await fetch_source(source_id, self.storage)
+        except Exception as e:
+            state.interval = self._clamp(state.interval * BACKOFF_FACTOR)
+            logger.error(f"❌ {source_id}: {e or type(e).__name__} (next poll in {int(state.interval)}s)")
+            self._schedule(source_id, state.interval)
+            return
+
+        # Every stored poll is a snapshot the daily aggregate counts, even an unchanged or reranked board
+        self.request_aggregation()
+
+        churn = self._observe(state, items)
+
+        if churn is not None:
+            if state.churn >= HIGH_CHURN:
+                state.interval = self._clamp(state.interval * SPEEDUP_FACTOR)
+            elif state.churn <= LOW_CHURN:
+                state.interval = self._clamp(state.interval * BACKOFF_FACTOR)
+
+        logger.debug(f"{source_id}: churn={churn} smoothed={state.churn:.2f} next={int(state.interval)}s")
+        self._schedule(source_id, state.interval)
+
+    def request_aggregation(self):
+        """Debounce aggregation: run once polls go quiet, but never later than the max delay"""
+        now = datetime.now()
+        if self._aggregation_pending_since is None:
+            self._aggregation_pending_since = now
+
+        run_date = min(
+            now + timedelta(seconds=cfg.aggregate_debounce),
+            self._aggregation_pending_since + timedelta(seconds=cfg.aggregate_max_delay),
+        )
+        self.scheduler.add_job(
+            self._run_aggregation,
+            "date",
+            run_date=run_date,
+            id=AGGREGATE_JOB_ID,
+            replace_existing=True,
+            misfire_grace_time=None,
+        )
+
+    async def _run_aggregation(self):
+        self._aggregation_pending_since = None
+        await scheduled_aggregation()
+
+    def _observe(self, state: PollState, items: Optional[List[Trend]]) -> Optional[float]:
+        """Update the smoothed churn, returns None while there is no baseline to compare with"""
+        if items is None:
+            churn = 0.0
+        else:
+            current_ids = {item.id for item in items}
+            previous_ids, state.previous_ids = state.previous_ids, current_ids
+            if previous_ids is None:
+                return None
+            churn = measure_churn(previous_ids, current_ids)
+
+        state.churn = CHURN_SMOOTHING * churn + (1 - CHURN_SMOOTHING) * state.churn
+        return churn
+
+    def _schedule(self, source_id: str, interval: float):
+        delay = interval * random.uniform(1 - cfg.poll_jitter, 1 + cfg.poll_jitter)
+        self.scheduler.add_job(
+            self.poll,
+            "date",
+            run_date=datetime.now() + timedelta(seconds=delay),
+            args=[source_id],
+            id=f"poll:{source_id}",
+            replace_existing=True,
+            # A skipped one-shot job would end the polling chain of that source
+            misfire_grace_time=None,
+        )
+
+    @staticmethod
+    def _clamp(interval: float) -> float:
+        return max(cfg.poll_min_interval, min(cfg.poll_max_interval, interval))
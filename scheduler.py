@@ -1,45 +1,181 @@
+import asyncio
 import logging
 from datetime import datetime
+from typing import List, Optional
 
-import fetcher  # noqa: F401 - Register all fetchers
 from config import cfg
+from executor import run_blocking
+from fetcher.base import BaseFetcher, NotModified
+from fetcher.models import Trend
 from fetcher.registry import FetcherRegistry
+from fetcher.resilience import CircuitBreakerRegistry, call_with_retry
 from storage.aggregator import DailyAggregator
-from storage.cache import CacheStorage
+from storage.archive import compact
+from storage.base import TrendStorage, create_storage
+from storage.monitor import KeywordMonitor
+from storage.search import SearchIndex
+from storage.stream import FlashStream
+from storage.timeseries import TopicTimeSeries
 
 logger = logging.getLogger(__name__)
 
 
+async def fetch_source(source_id: str, storage: TrendStorage) -> Optional[List[Trend]]:
+    """
+    Fetch and store a single source within its own deadline
+    Returns: the fetched items, or None if upstream reported no change
+    """
+    return await asyncio.wait_for(_fetch_and_store(source_id, storage), timeout=cfg.fetch_source_timeout)
+
+
+async def fetch_upstream(fetcher_instance: BaseFetcher, source_id: str) -> List[Trend]:
+    """Call the fetcher with retries, the source's circuit breaker records how upstream answered"""
+    try:
+        items = await call_with_retry(fetcher_instance.fetch, source_id)
+    except NotModified:
+        CircuitBreakerRegistry.record_success(source_id)
+        raise
+    except (Exception, asyncio.CancelledError):
+        # A deadline cancels the fetch, a source too slow to answer counts as failing
+        CircuitBreakerRegistry.record_failure(source_id)
+        raise
+
+    # Storing the items is not upstream's doing, a disk or database error leaves the breaker alone
+    CircuitBreakerRegistry.record_success(source_id)
+    return items
+
+
+def save_snapshot(storage: TrendStorage, source_id: str, items: List[Trend]) -> bool:
+    """Store a board, record the rank and score of its topics, index and match their titles, returns False if it repeats the previous one"""
+    now = datetime.now()
+    changed = storage.append(source_id, now, items)
+    # The snapshot is stored either way; the time series is rebuilt from it later
+    try:
+        TopicTimeSeries().record(source_id, now, items)
+    except Exception as e:
+        logger.error(f"❌ {source_id}: topic time series update failed: {e}")
+    if changed:
+        process_new_trends(source_id, now, items)
+    return changed
+
+
+def save_stream(storage: TrendStorage, source_id: str, items: List[Trend]) -> List[Trend]:
+    """Append the new items of a flash-news source to its stream, index and match them, returns the new items"""
+    new_items = FlashStream(storage.base_path).append(source_id, items)
+    if new_items:
+        process_new_trends(source_id, datetime.now(), new_items)
+    return new_items
+
+
+def process_new_trends(source_id: str, now: datetime, items: List[Trend]):
+    """Add the items to the search index and match them against the keyword subscriptions"""
+    # The snapshot is stored either way; the index is rebuilt and the matches rescanned from it later
+    try:
+        SearchIndex.default().add_trends(source_id, now.strftime("%Y-%m-%d"), items)
+    except Exception as e:
+        logger.error(f"❌ {source_id}: search index update failed: {e}")
+    try:
+        matched = KeywordMonitor.default().match(source_id, now, items)
+        if matched:
+            logger.info(f"🔔 {source_id}: {matched} new keyword matches")
+    except Exception as e:
+        logger.error(f"❌ {source_id}: keyword matching failed: {e}")
+
+
+def save_unchanged(storage: TrendStorage, source_id: str) -> bool:
+    """Record that the board is unchanged, returns False if there is no snapshot to repeat"""
+    if not storage.save_unchanged(source_id):
+        return False
+    try:
+        TopicTimeSeries().repeat(source_id, datetime.now())
+    except Exception as e:
+        logger.error(f"❌ {source_id}: topic time series update failed: {e}")
+    return True
+
+
+async def _fetch_and_store(source_id: str, storage: TrendStorage) -> Optional[List[Trend]]:
+    fetcher_instance = FetcherRegistry.get(source_id)
+    try:
+        items = await fetch_upstream(fetcher_instance, source_id)
+    except NotModified:
+        if fetcher_instance.incremental or await run_blocking(save_unchanged, storage, source_id):
+            logger.debug(f"{source_id}: not modified")
+            return None
+        # Nothing on disk to repeat, download the full board again
+        fetcher_instance.reset_validators()
+        items = await fetch_upstream(fetcher_instance, source_id)
+
+    if fetcher_instance.incremental:
+        new_items = await run_blocking(save_stream, storage, source_id, items)
+        logger.debug(f"{source_id}: {len(new_items)} new items appended to stream")
+    elif not await run_blocking(save_snapshot, storage, source_id, items):
+        logger.debug(f"{source_id}: unchanged since previous snapshot")
+    return items
+
+
 async def fetch_all_sources():
-    """Fetch all data sources"""
+    """Fetch all data sources concurrently"""
     source_ids = FetcherRegistry.list_source_ids()
     logger.info(f"Fetching {len(source_ids)} sources...")
 
-    storage = CacheStorage()
+    skipped = [source_id for source_id in source_ids if not CircuitBreakerRegistry.get(source_id).allow_request()]
+    for source_id in skipped:
+        logger.warning(f"⏸ {source_id}: circuit open, skipped")
+
+    storage = create_storage()
+    semaphore = asyncio.Semaphore(max(1, cfg.fetch_concurrency))
+
+    async def fetch_with_limit(source_id: str) -> Optional[List[Trend]]:
+        async with semaphore:
+            return await fetch_source(source_id, storage)
+
+    tasks = {
+        asyncio.create_task(fetch_with_limit(source_id)): source_id
+        for source_id in source_ids
+        if source_id not in skipped
+    }
+    done, pending = await asyncio.wait(tasks, timeout=cfg.fetch_run_timeout) if tasks else (set(), set())
+
+    # Sources still running at the run deadline are cancelled; snapshots that already arrived are kept
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
     success_count = 0
     total_items = 0
+    timed_out = [tasks[task] for task in pending]
 
-    for source_id in source_ids:
-        try:
-            fetcher_instance = FetcherRegistry.get(source_id)
-            items = await fetcher_instance.fetch()
-            storage.save(source_id, items)
-            total_items += len(items)
+    for task in done:
+        source_id = tasks[task]
+        error = task.exception()
+        if error is None:
+            total_items += len(task.result() or [])
             success_count += 1
-        except Exception as e:
-            logger.error(f"❌ {source_id}: {e}")
-
-    logger.info(f"Fetch completed: {success_count}/{len(source_ids)} succeeded, {total_items} items total")
+        elif isinstance(error, asyncio.TimeoutError):
+            timed_out.append(source_id)
+        else:
+            logger.error(f"❌ {source_id}: {error}")
+
+    for source_id in timed_out:
+        logger.warning(f"⏱ {source_id}: timed out")
+
+    logger.info(
+        f"Fetch completed: {success_count}/{len(source_ids)} succeeded, "
+        f"{len(timed_out)} timed out, {len(skipped)} skipped, {total_items} items total"
+    )
     return success_count > 0
 
 
-def aggregate_today():
+def aggregate_day(date: str):
+    DailyAggregator().generate(date)
+
+
+async def aggregate_today():
     today = datetime.now().strftime("%Y-%m-%d")
     logger.info(f"Aggregating data for {today}...")
 
     try:
-        aggregator = DailyAggregator()
-        aggregator.generate(today)
+        await run_blocking(aggregate_day, today)
         logger.info(f"✅ Aggregation completed for {today}")
         return True
     except Exception as e:
@@ -63,13 +199,40 @@ async def generate_summary():
         logger.error(f"Summary generation error: {e}")
 
 
+async def scheduled_aggregation():
+    """Aggregation triggered once per-source polls have settled"""
+    await aggregate_today()
+
+    if cfg.enable_summary:
+        await generate_summary()
+
+
+def close_days():
+    """Count the last snapshots of days that have ended, which finalizes their aggregates, rollups and time series"""
+    today = datetime.now().strftime("%Y-%m-%d")
+    aggregator = DailyAggregator()
+    for date in aggregator.unclosed_dates(today):
+        aggregator.generate(date)
+    TopicTimeSeries().close_days(today)
+
+
+async def scheduled_compaction():
+    """Close the ended days, then archive them and apply the retention policy"""
+    try:
+        # Compaction drops the checkpoints of ended days, so they are closed first
+        await run_blocking(close_days)
+        await run_blocking(compact)
+    except Exception as e:
+        logger.error(f"❌ Compaction failed: {e}")
+
+
 async def scheduled_task():
     logger.info("Scheduled task started")
 
     fetch_success = await fetch_all_sources()
 
     if fetch_success:
-        aggregate_today()
+        await aggregate_today()
 
         if cfg.enable_summary:
             await generate_summary()
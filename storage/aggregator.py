@@ -2,10 +2,22 @@
 
 import json
 import logging
+import os
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List, Optional
 
+from analysis.stories import build_stories
 from fetcher.models import Trend
+from storage.base import create_storage
+from storage.cache import omit_empty
+from storage.stream import FlashStream
+
+if TYPE_CHECKING:
+    from storage.delta import BoardChange
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +31,8 @@ CATEGORY_ORDER = ["news", "finance", "tech"]
 # 每个源返回的最大条数
 MAX_ITEMS_PER_SOURCE = 50
 
+CHECKPOINTS_DIRNAME = "aggregates"
+
 SOURCES_CONFIG = {
     "cailian": {
         "name": "财联社",
@@ -47,116 +61,359 @@ SOURCES_CONFIG = {
 }
 
 
+def write_atomic(path: Path, text: str):
+    """Write then rename, readers never see a half-written file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = path.with_name(path.name + ".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_file, path)
+
+
+def aggregate_path(date: str, data_dir: Path | None = None) -> Path:
+    """Structured daily aggregate, data/YYYY-MM-DD.json"""
+    if data_dir is None:
+        from config import cfg
+        data_dir = cfg.data_dir
+    return data_dir / f"{date}.json"
+
+
+def load_daily_aggregate(date: str, data_dir: Path | None = None) -> Optional[Dict]:
+    """
+    读取结构化的每日汇总，旧的日期只有 Markdown 时返回 None
+
+    {
+        "date": "2025-11-22",
+        "title": "2025-11-22 热门新闻汇总",
+        "generated_at": "2025-11-22 17:50:00",
+        "sources": [
+            {"source_id": "cailian", "name": "财联社", "order": 1,
+             "items": [{"rank": 1, "id": "...", "title": "...", "url": "...", "description": "...", "score": 123}]}
+        ],
+        "stories": [
+            {"title": "...", "url": "...", "score": 180, "sources": ["baidu", "ifeng"],
+             "items": [{"source_id": "baidu", "rank": 1, "title": "...", "url": "..."}]}
+        ]
+    }
+    """
+    json_file = aggregate_path(date, data_dir)
+    if not json_file.exists():
+        return None
+    with open(json_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def new_topic_stats(trend: Trend) -> Dict:
+    """Statistics of a topic not counted yet, titled as first seen"""
+    return {
+        "id": trend.id,
+        "title": trend.title,
+        "url": trend.url,
+        "description": trend.description,
+        "count": 0,
+        "total_rank": 0,
+        "score_sum": 0,
+        "score_count": 0,
+    }
+
+
+def accumulate_trends(topic_stats: Dict[str, Dict], items: List[Trend]):
+    """将一个快照计入各话题的累计统计（出现次数、排名之和、热度之和）"""
+    for rank, trend in enumerate(items, 1):
+        topic_id = trend.id
+        if topic_id not in topic_stats:
+            topic_stats[topic_id] = new_topic_stats(trend)
+
+        stats = topic_stats[topic_id]
+        stats["count"] += 1
+        stats["total_rank"] += rank
+        if trend.score is not None:
+            stats["score_sum"] += trend.score
+            stats["score_count"] += 1
+
+
+def accumulate_changes(topic_stats: Dict[str, Dict], board: List[Trend], changes: List["BoardChange"]) -> int:
+    """
+    Count snapshots given as changes to `board`, which is counted already, returns the number counted
+    Same statistics as accumulate_trends over the rebuilt boards, but an item is only touched
+    when it enters, leaves, moves or changes score: the snapshots it sat still through are
+    counted in one go.
+    """
+    # [topic id, rank, score, index of the first snapshot not counted for it yet]
+    slots = [[trend.id, rank, trend.score, 0] for rank, trend in enumerate(board, 1)]
+
+    def count(slot: List, index: int):
+        occurrences = index - slot[3]
+        if occurrences:
+            stats = topic_stats[slot[0]]
+            stats["count"] += occurrences
+            stats["total_rank"] += slot[1] * occurrences
+            if slot[2] is not None:
+                stats["score_sum"] += slot[2] * occurrences
+                stats["score_count"] += occurrences
+            slot[3] = index
+
+    def enter(trend: Trend, rank: int, index: int) -> List:
+        if trend.id not in topic_stats:
+            topic_stats[trend.id] = new_topic_stats(trend)
+        return [trend.id, rank, trend.score, index]
+
+    for index, change in enumerate(changes):
+        if change.keyframe is not None:
+            for slot in slots:
+                count(slot, index)
+            slots = [enter(trend, rank, index) for rank, trend in enumerate(change.keyframe, 1)]
+            continue
+        if change.runs is None:
+            continue
+
+        new_slots: List[List] = []
+        added = iter(change.added)
+        kept = []
+        for start, length in change.runs:
+            if start < 0:
+                for trend in islice(added, length):
+                    new_slots.append(enter(trend, len(new_slots) + 1, index))
+                continue
+            kept.append((start, start + length))
+            if start == len(new_slots):
+                # Same ranks as in the previous snapshot
+                new_slots.extend(slots[start : start + length])
+                continue
+            for slot in slots[start : start + length]:
+                count(slot, index)
+                slot[1] = len(new_slots) + 1
+                new_slots.append(slot)
+
+        # Items no run kept have left the board
+        position = 0
+        for start, end in sorted(kept):
+            for slot in slots[position:start]:
+                count(slot, index)
+            position = max(position, end)
+        for slot in slots[position:]:
+            count(slot, index)
+
+        for rank_index, score in change.scores:
+            slot = new_slots[rank_index]
+            count(slot, index)
+            slot[2] = score
+        slots = new_slots
+
+    for slot in slots:
+        count(slot, len(changes))
+    return len(changes)
+
+
+def topic_score(stats: Dict) -> int:
+    """话题的综合得分"""
+    # 优先使用原始 score，如果没有则计算
+    if stats["score_count"]:
+        # 使用原始 score 的平均值
+        return int(stats["score_sum"] / stats["score_count"])
+    # 计算综合得分：出现次数权重 + 排名权重
+    avg_rank = stats["total_rank"] / stats["count"]
+    calculated_score = stats["count"] * SCORE_COUNT_WEIGHT + (1 / avg_rank) * SCORE_RANK_WEIGHT
+    return int(round(calculated_score, 0))
+
+
+def rank_topic_stats(topic_stats: Dict[str, Dict]) -> List[Trend]:
+    """按综合得分排序累计统计"""
+    # Stable sort, ties keep first-seen order; only the kept topics become Trend objects
+    scored = sorted(((topic_score(stats), stats) for stats in topic_stats.values()), key=itemgetter(0), reverse=True)
+    return [
+        Trend(
+            id=stats["id"],
+            title=stats["title"],
+            url=stats["url"],
+            description=stats.get("description"),
+            score=final_score,
+        )
+        for final_score, stats in scored[:MAX_ITEMS_PER_SOURCE]
+    ]
+
+
 def aggregate_source_trends(items_list: List[List[Trend]]) -> List[Trend]:
     """
     聚合单源热搜数据
     items_list: 当天所有时间点的数据（每个元素是 Trend 对象列表）
     返回: 按综合得分排序的热搜列表
+    Counted with grouped array reductions, same result as accumulate_trends then rank_topic_stats
     """
-    topic_stats: Dict[str, Dict] = {}
-
-    for items in items_list:
-        for rank, trend in enumerate(items, 1):
-            topic_id = trend.id
-            if topic_id not in topic_stats:
-                topic_stats[topic_id] = {
-                    "id": topic_id,
-                    "title": trend.title,
-                    "url": trend.url,
-                    "description": trend.description,
-                    "count": 0,
-                    "total_rank": 0,
-                    "scores": [],
-                }
+    from storage.scoring import rank_snapshots
 
-            topic_stats[topic_id]["count"] += 1
-            topic_stats[topic_id]["total_rank"] += rank
-            if trend.score is not None:
-                topic_stats[topic_id]["scores"].append(trend.score)
-
-    result = []
-    for topic_id, stats in topic_stats.items():
-        # 优先使用原始 score，如果没有则计算
-        if stats["scores"]:
-            # 使用原始 score 的平均值
-            final_score = int(sum(stats["scores"]) / len(stats["scores"]))
-        else:
-            # 计算综合得分：出现次数权重 + 排名权重
-            avg_rank = stats["total_rank"] / stats["count"]
-            calculated_score = stats["count"] * SCORE_COUNT_WEIGHT + (1 / avg_rank) * SCORE_RANK_WEIGHT
-            final_score = int(round(calculated_score, 0))
-
-        result.append(
-            Trend(
-                id=stats["id"],
-                title=stats["title"],
-                url=stats["url"],
-                description=stats.get("description"),
-                score=final_score,
-            )
-        )
+    return rank_snapshots(items_list, MAX_ITEMS_PER_SOURCE)
+
+
+@dataclass
+class AggregateCheckpoint:
+    """Running topic statistics of one source and day, and how far into the day's snapshots they go"""
+
+    storage: str
+    """Backend and location the snapshots were read from, a checkpoint of another store is ignored"""
+
+    last_ts: Optional[str] = None
+    """Timestamp of the last applied snapshot"""
+
+    applied: int = 0
+    """Number of snapshots applied"""
 
-    return sorted(result, key=lambda x: x.score or 0, reverse=True)[:MAX_ITEMS_PER_SOURCE]
+    topics: Dict[str, Dict] = field(default_factory=dict)
+    """Per-topic statistics in first-seen order, as accumulate_trends keeps them"""
 
 
 class DailyAggregator:
     """每日热搜聚合器"""
 
-    def __init__(self, temp_path: Path | None = None, output_path: Path | None = None):
+    def __init__(self, temp_path: Path | None = None, output_path: Path | None = None, state_path: Path | None = None):
         from config import cfg
         self.temp_path = temp_path or cfg.temp_dir
         self.output_path = output_path or cfg.data_dir
+        self.state_path = state_path or cfg.state_dir / CHECKPOINTS_DIRNAME
+        self.storage = create_storage(self.temp_path)
+        self.stream = FlashStream(self.temp_path)
+        self.storage_key = f"{cfg.storage_backend}:{self.temp_path.resolve()}"
 
     def generate(self, date: str):
         """
-        生成指定日期的汇总文件
+        生成指定日期的汇总文件，每个源只计入上次运行以来新增的快照
         date: 日期字符串，格式：YYYY-MM-DD
         """
-        date_str = date.replace("-", "")
+        from storage.rollup import write_rollup
+
         all_data: Dict[str, Dict] = {}
+        topics: Dict[str, Dict[str, Dict]] = {}
 
-        for source_dir in self.temp_path.iterdir():
-            if not source_dir.is_dir():
+        for source_id in sorted(set(self.storage.sources(date)) | set(self.stream.sources(date))):
+            # Flash-news streams are already deduplicated and ordered, newest first
+            if self.stream.exists(source_id, date):
+                stream_items = self.stream.read(source_id, date)
+                all_data[source_id] = {"ranked_items": stream_items[:MAX_ITEMS_PER_SOURCE]}
                 continue
 
-            source_id = source_dir.name
-            items_list = []
-
-            for json_file in source_dir.glob(f"{date_str}_*.json"):
-                try:
-                    with open(json_file, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                        items_dict = data.get("items", [])
-                        items = [Trend(**item) for item in items_dict]
-                        items_list.append(items)
-                except Exception as e:
-                    logger.warning(f"读取文件失败 {json_file}: {e}")
-                    continue
-
-            if items_list:
-                ranked_items = aggregate_source_trends(items_list)
-                all_data[source_id] = {
-                    "items_list": items_list,
-                    "ranked_items": ranked_items,
-                }
+            checkpoint = self._accumulate(source_id, date)
+            ranked_items = rank_topic_stats(checkpoint.topics)
+            if ranked_items:
+                all_data[source_id] = {"ranked_items": ranked_items}
+                topics[source_id] = checkpoint.topics
 
         if not all_data:
             logger.warning(f"日期 {date} 没有数据")
             return
 
-        markdown = self._generate_markdown(date, all_data)
+        # Ranges of days are ranked from the per-day statistics instead of the raw snapshots
+        write_rollup(date, topics, self.output_path)
 
-        output_file = self.output_path / f"{date}.md"
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(markdown)
+        sources = self._build_sources(all_data)
+        aggregate = {
+            "date": date,
+            "title": f"{date} 热门新闻汇总",
+            "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "sources": [
+                {
+                    "source_id": source["source_id"],
+                    "name": source["name"],
+                    "order": source["order"],
+                    "items": [{"rank": rank, **omit_empty(asdict(item))} for rank, item in enumerate(source["ranked_items"], 1)],
+                }
+                for source in sources
+            ],
+            # The same event told by several sources, merged across them
+            "stories": [
+                asdict(story)
+                for story in build_stories({source_id: data["ranked_items"] for source_id, data in all_data.items()})
+            ],
+        }
+
+        # The structured aggregate is what the dashboard and the summary read, Markdown is an export of it
+        output_file = aggregate_path(date, self.output_path)
+        write_atomic(output_file, json.dumps(aggregate, ensure_ascii=False, separators=(",", ":")))
+        write_atomic(self.output_path / f"{date}.md", self._generate_markdown(date, sources))
 
         total_sources = len(all_data)
         total_items = sum(len(data["ranked_items"]) for data in all_data.values())
         logger.info(f"✅ Generated: {output_file} ({total_sources} sources, {total_items} items)")
 
-    def _generate_markdown(self, date: str, all_data: Dict[str, Dict]) -> str:
-        """生成 Markdown 内容"""
+    def aggregate_source(self, source_id: str, date: str) -> List[Trend]:
+        """Apply the snapshots added since the checkpoint and rank the running statistics"""
+        return rank_topic_stats(self._accumulate(source_id, date).topics)
+
+    def _accumulate(self, source_id: str, date: str) -> AggregateCheckpoint:
+        """The checkpoint of a source and day, brought up to date with its latest snapshots"""
+        checkpoint = self._load_checkpoint(source_id, date)
+        if hasattr(self.storage, "changes"):
+            # Delta records are counted as they are, without rebuilding every board
+            board, changes = self.storage.changes(source_id, date, after=checkpoint.last_ts)
+            applied = accumulate_changes(checkpoint.topics, board, changes)
+            last_ts = changes[-1].timestamp if changes else None
+        else:
+            snapshots = self.storage.snapshots(source_id, date, after=checkpoint.last_ts)
+            for _, items in snapshots:
+                accumulate_trends(checkpoint.topics, items)
+            applied = len(snapshots)
+            last_ts = snapshots[-1][0] if snapshots else None
+
+        if applied:
+            checkpoint.applied += applied
+            checkpoint.last_ts = last_ts
+            self._save_checkpoint(source_id, date, checkpoint)
+            logger.debug(f"{source_id}: applied {applied} new snapshots, {checkpoint.applied} in total")
+
+        return checkpoint
+
+    def verify(self, date: str) -> bool:
+        """Compare the incremental result of every source with a full recompute of the day"""
+        matched = True
+        for source_id in self.storage.sources(date):
+            if self.stream.exists(source_id, date):
+                continue
+            incremental = self.aggregate_source(source_id, date)
+            full = aggregate_source_trends(self.storage.load_day(source_id, date))
+            if incremental == full:
+                logger.info(f"✅ {source_id} {date}: incremental matches full recompute ({len(full)} items)")
+            else:
+                matched = False
+                differing = sum(a != b for a, b in zip(incremental, full)) + abs(len(incremental) - len(full))
+                logger.error(f"❌ {source_id} {date}: incremental differs from full recompute in {differing} positions")
+        return matched
+
+    def unclosed_dates(self, before: str) -> List[str]:
+        """Days before `before` that still have checkpoints, their last snapshots may not be counted yet"""
+        if not self.state_path.exists():
+            return []
+        return sorted(day_dir.name for day_dir in self.state_path.iterdir() if day_dir.is_dir() and day_dir.name < before)
+
+    def reset(self, date: str):
+        """Drop the checkpoints of a day, the next run recomputes it from all snapshots"""
+        for checkpoint_file in (self.state_path / date).glob("*.json"):
+            checkpoint_file.unlink()
+
+    def _checkpoint_path(self, source_id: str, date: str) -> Path:
+        return self.state_path / date / f"{source_id}.json"
+
+    def _load_checkpoint(self, source_id: str, date: str) -> AggregateCheckpoint:
+        checkpoint_file = self._checkpoint_path(source_id, date)
+        if checkpoint_file.exists():
+            try:
+                with open(checkpoint_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                topics = {stats["id"]: stats for stats in data.pop("topics")}
+                checkpoint = AggregateCheckpoint(topics=topics, **data)
+                if checkpoint.storage == self.storage_key:
+                    return checkpoint
+                logger.info(f"{source_id} {date}: checkpoint belongs to {checkpoint.storage}, recomputing")
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"读取聚合检查点失败 {checkpoint_file}: {e}")
+        return AggregateCheckpoint(storage=self.storage_key)
+
+    def _save_checkpoint(self, source_id: str, date: str, checkpoint: AggregateCheckpoint):
+        checkpoint_file = self._checkpoint_path(source_id, date)
+        data = asdict(checkpoint)
+        data["topics"] = list(checkpoint.topics.values())
+        write_atomic(checkpoint_file, json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+
+    def _build_sources(self, all_data: Dict[str, Dict]) -> List[Dict]:
+        """各源的名称、顺序与排名结果"""
         all_sources = []
 
         for source_id, data in all_data.items():
@@ -174,7 +431,10 @@ class DailyAggregator:
 
         # 按照全局 order 排序
         all_sources.sort(key=lambda x: x["order"])
+        return all_sources
 
+    def _generate_markdown(self, date: str, all_sources: List[Dict]) -> str:
+        """生成 Markdown 内容"""
         lines = [f"# {date} 热门新闻汇总\n"]
 
         for source_data in all_sources:
@@ -0,0 +1,297 @@
+"""
+Compaction of closed days into per-source daily archives, and retention of raw data
+
+A closed day of a source (its snapshot files and flash-news stream) is packed into
+temp/<source>/YYYYMMDD.zip, and temp/summaries/<date>/ into temp/summaries/<date>.zip.
+The zip central directory is the index: any snapshot is read back without
+decompressing the others, and CacheStorage / FlashStream read archived days
+through DayFiles as if the files were still loose.
+
+python -m storage.archive [--dry-run]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SUFFIX = ".zip"
+SUMMARIES_DIRNAME = "summaries"
+
+
+def archive_path(source_dir: Path, date_str: str) -> Path:
+    """date_str: YYYYMMDD"""
+    return source_dir / f"{date_str}{ARCHIVE_SUFFIX}"
+
+
+class DayFiles:
+    """Files of one source and day, loose in the source directory or packed in its archive"""
+
+    def __init__(self, source_dir: Path, date_str: str):
+        self.source_dir = source_dir
+        self.archive_file = archive_path(source_dir, date_str)
+        self._archive: Optional[zipfile.ZipFile] = None
+
+    def __enter__(self) -> "DayFiles":
+        if self.archive_file.exists():
+            self._archive = zipfile.ZipFile(self.archive_file)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    def names(self, pattern: str) -> List[str]:
+        """Sorted names matching a glob pattern, loose files and archive members alike"""
+        names = {path.name for path in self.source_dir.glob(pattern)}
+        if self._archive is not None:
+            names.update(name for name in self._archive.namelist() if Path(name).match(pattern))
+        return sorted(names)
+
+    def exists(self, name: str) -> bool:
+        if (self.source_dir / name).is_file():
+            return True
+        return self._archive is not None and name in self._archive.NameToInfo
+
+    def read(self, name: str) -> bytes:
+        # A loose file wins, it may be newer than an archive left by an interrupted compaction
+        loose_file = self.source_dir / name
+        if loose_file.is_file():
+            return loose_file.read_bytes()
+        if self._archive is None:
+            raise FileNotFoundError(loose_file)
+        return self._archive.read(name)
+
+
+def read_day_file(source_dir: Path, date_str: str, name: str) -> Optional[bytes]:
+    """Read one file of a day, returns None if it is neither loose nor archived"""
+    with DayFiles(source_dir, date_str) as day_files:
+        return day_files.read(name) if day_files.exists(name) else None
+
+
+def archived_dates(source_dir: Path) -> List[str]:
+    """YYYYMMDD of every archived day"""
+    return sorted(
+        archive_file.stem
+        for archive_file in source_dir.glob(f"*{ARCHIVE_SUFFIX}")
+        if len(archive_file.stem) == 8 and archive_file.stem.isdigit()
+    )
+
+
+@dataclass
+class CompactionReport:
+    days_archived: int = 0
+    days_expired: int = 0
+    bytes_reclaimed: int = 0
+    inodes_reclaimed: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"archived {self.days_archived} days, expired {self.days_expired} days, "
+            f"reclaimed {self.bytes_reclaimed / 1024 / 1024:.1f} MB and {self.inodes_reclaimed} inodes"
+        )
+
+
+def compact(temp_dir: Path | None = None, state_dir: Path | None = None, today: str | None = None, dry_run: bool = False) -> CompactionReport:
+    """
+    Archive every closed day and drop raw data older than the retention period
+    today: 日期字符串，格式：YYYY-MM-DD，默认今天
+    """
+    from config import cfg
+
+    temp_dir = temp_dir or cfg.temp_dir
+    state_dir = state_dir or cfg.state_dir
+    today = today or datetime.now().strftime("%Y-%m-%d")
+    today_str = today.replace("-", "")
+    cutoff = ""
+    if cfg.retention_days > 0:
+        cutoff = (datetime.strptime(today, "%Y-%m-%d") - timedelta(days=cfg.retention_days)).strftime("%Y%m%d")
+
+    report = CompactionReport()
+    if not temp_dir.exists():
+        return report
+
+    for source_dir in sorted(path for path in temp_dir.iterdir() if path.is_dir()):
+        if source_dir.name == SUMMARIES_DIRNAME:
+            _compact_summaries(source_dir, today_str, cutoff, report, dry_run)
+        else:
+            _compact_source(source_dir, today_str, cutoff, report, dry_run)
+
+    if cutoff:
+        _expire_backends(temp_dir, cutoff, report, dry_run)
+
+    # Checkpoints only serve the incremental aggregation of open days
+    checkpoints_dir = state_dir / "aggregates"
+    if checkpoints_dir.exists():
+        for day_dir in sorted(checkpoints_dir.iterdir()):
+            if day_dir.is_dir() and day_dir.name.replace("-", "") < today_str:
+                _remove(day_dir, report, dry_run)
+
+    logger.info(f"🗜 Compaction{' (dry run)' if dry_run else ''}: {report}")
+    return report
+
+
+def _compact_source(source_dir: Path, today_str: str, cutoff: str, report: CompactionReport, dry_run: bool):
+    loose_by_day: Dict[str, List[Path]] = {}
+    for path in source_dir.iterdir():
+        date_str = _file_date(path.name)
+        if date_str and date_str < today_str and path.suffix != ARCHIVE_SUFFIX:
+            loose_by_day.setdefault(date_str, []).append(path)
+
+    for date_str, files in sorted(loose_by_day.items()):
+        if cutoff and date_str < cutoff:
+            continue
+        _archive_day(source_dir, date_str, files, report, dry_run)
+
+    if cutoff:
+        for date_str in sorted(set(loose_by_day) | set(archived_dates(source_dir))):
+            if date_str >= cutoff:
+                continue
+            for path in loose_by_day.get(date_str, []) + [archive_path(source_dir, date_str)]:
+                if path.exists():
+                    _remove(path, report, dry_run)
+            report.days_expired += 1
+
+
+def _archive_day(source_dir: Path, date_str: str, files: List[Path], report: CompactionReport, dry_run: bool):
+    archive_file = archive_path(source_dir, date_str)
+    before = sum(path.stat().st_size for path in files)
+    if dry_run:
+        report.days_archived += 1
+        report.bytes_reclaimed += before
+        report.inodes_reclaimed += len(files) - (0 if archive_file.exists() else 1)
+        return
+
+    # Build next to the target and rename, so a crash never leaves a half-written archive
+    tmp_file = archive_file.with_name(archive_file.name + ".tmp")
+    with zipfile.ZipFile(tmp_file, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+        # An earlier run may have archived part of the day already
+        if archive_file.exists():
+            before += archive_file.stat().st_size
+            with zipfile.ZipFile(archive_file) as previous:
+                for info in previous.infolist():
+                    if not (source_dir / info.filename).exists():
+                        archive.writestr(info, previous.read(info.filename))
+        for path in sorted(files):
+            archive.write(path, path.name)
+
+    with zipfile.ZipFile(tmp_file) as archive:
+        if archive.testzip() is not None:
+            tmp_file.unlink()
+            raise ValueError(f"Archive verification failed: {archive_file}")
+
+    had_archive = archive_file.exists()
+    os.replace(tmp_file, archive_file)
+    for path in files:
+        path.unlink()
+
+    report.days_archived += 1
+    report.bytes_reclaimed += before - archive_file.stat().st_size
+    report.inodes_reclaimed += len(files) - (0 if had_archive else 1)
+    logger.debug(f"{archive_file}: {len(files)} files, {before} -> {archive_file.stat().st_size} bytes")
+
+
+def _compact_summaries(summaries_dir: Path, today_str: str, cutoff: str, report: CompactionReport, dry_run: bool):
+    for day_dir in sorted(path for path in summaries_dir.iterdir() if path.is_dir()):
+        date_str = day_dir.name.replace("-", "")
+        if not (len(date_str) == 8 and date_str.isdigit()) or date_str >= today_str:
+            continue
+        if cutoff and date_str < cutoff:
+            _remove(day_dir, report, dry_run)
+            report.days_expired += 1
+            continue
+
+        files = sorted(path for path in day_dir.rglob("*") if path.is_file())
+        archive_file = summaries_dir / f"{day_dir.name}{ARCHIVE_SUFFIX}"
+        before = sum(path.stat().st_size for path in files)
+        if not dry_run:
+            tmp_file = archive_file.with_name(archive_file.name + ".tmp")
+            with zipfile.ZipFile(tmp_file, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+                for path in files:
+                    archive.write(path, path.relative_to(day_dir).as_posix())
+            os.replace(tmp_file, archive_file)
+            shutil.rmtree(day_dir)
+        report.days_archived += 1
+        report.bytes_reclaimed += before - (archive_file.stat().st_size if archive_file.exists() else 0)
+        # The files and their directory go, the archive comes
+        report.inodes_reclaimed += len(files)
+
+    if cutoff:
+        for archive_file in sorted(summaries_dir.glob(f"*{ARCHIVE_SUFFIX}")):
+            if archive_file.stem.replace("-", "") < cutoff:
+                _remove(archive_file, report, dry_run)
+                report.days_expired += 1
+
+
+def _expire_backends(temp_dir: Path, cutoff: str, report: CompactionReport, dry_run: bool):
+    """Retention for the segment, delta and SQLite backends, which are compact already"""
+    from storage.delta import DELTAS_DIRNAME
+    from storage.segment import SEGMENTS_DIRNAME
+    from storage.sqlite import DATABASE_FILENAME, SqliteStorage
+
+    for dirname in (SEGMENTS_DIRNAME, DELTAS_DIRNAME):
+        days_dir = temp_dir / dirname
+        if not days_dir.exists():
+            continue
+        for day_dir in sorted(days_dir.iterdir()):
+            if day_dir.is_dir() and day_dir.name.replace("-", "") < cutoff:
+                _remove(day_dir, report, dry_run)
+                report.days_expired += 1
+
+    if (temp_dir / DATABASE_FILENAME).exists():
+        storage = SqliteStorage(temp_dir)
+        cutoff_date = f"{cutoff[:4]}-{cutoff[4:6]}-{cutoff[6:]}"
+        size_before = storage.db_path.stat().st_size
+        expired = storage.expire(cutoff_date, dry_run=dry_run)
+        report.days_expired += expired
+        if expired and not dry_run:
+            report.bytes_reclaimed += size_before - storage.db_path.stat().st_size
+        storage.close()
+
+
+def _remove(path: Path, report: CompactionReport, dry_run: bool):
+    if path.is_dir():
+        files = [child for child in path.rglob("*")]
+        report.bytes_reclaimed += sum(child.stat().st_size for child in files if child.is_file())
+        report.inodes_reclaimed += len(files) + 1
+        if not dry_run:
+            shutil.rmtree(path)
+    else:
+        report.bytes_reclaimed += path.stat().st_size
+        report.inodes_reclaimed += 1
+        if not dry_run:
+            path.unlink()
+
+
+def _file_date(name: str) -> Optional[str]:
+    """YYYYMMDD of a snapshot file (20251122_1750.json) or stream (stream_20251122.jsonl)"""
+    if name.startswith("stream_"):
+        date_str = name[len("stream_") : len("stream_") + 8]
+    else:
+        date_str = name[:8]
+        if name[8:9] != "_":
+            return None
+    return date_str if date_str.isdigit() and len(date_str) == 8 else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive closed days and apply RETENTION_DAYS")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be reclaimed without changing anything")
+    args = parser.parse_args()
+
+    from logger.logging import setup_logger
+
+    setup_logger()
+    compact(dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
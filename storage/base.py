@@ -0,0 +1,82 @@
+import importlib
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import List, Tuple
+
+from fetcher.models import Trend
+
+# Storage backends: STORAGE_BACKEND value -> "module:Class", imported only when selected
+STORAGE_BACKENDS = {
+    "files": "storage.cache:CacheStorage",
+    "segments": "storage.segment:SegmentStorage",
+    "delta": "storage.delta:DeltaStorage",
+    "sqlite": "storage.sqlite:SqliteStorage",
+}
+
+Snapshot = Tuple[str, List[Trend]]
+"""(timestamp, items), timestamp formatted as 2025-11-22 17:50:00"""
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class TrendStorage(ABC):
+    """Snapshot store for ranked boards"""
+
+    def __init__(self, base_path: Path | None = None):
+        from config import cfg
+
+        self.base_path = base_path or cfg.temp_dir
+
+    def save(self, source_id: str, items: List[Trend]) -> bool:
+        """Returns False if the items repeat the previous snapshot and only a marker was written"""
+        return self.append(source_id, datetime.now(), items)
+
+    @abstractmethod
+    def append(self, source_id: str, now: datetime, items: List[Trend]) -> bool:
+        """Store a snapshot taken at `now`, returns False if it repeats the previous one"""
+
+    @abstractmethod
+    def save_unchanged(self, source_id: str) -> bool:
+        """Record that upstream confirmed the board unchanged, returns False if there is no snapshot to repeat"""
+
+    @abstractmethod
+    def snapshots(self, source_id: str, date: str, after: str | None = None) -> List[Snapshot]:
+        """
+        All snapshots of a day in time order, markers expanded to the snapshot they repeat
+        date: 日期字符串，格式：YYYY-MM-DD
+        after: only snapshots with a later timestamp, the earlier ones are not read where possible
+        """
+
+    @abstractmethod
+    def sources(self, date: str) -> List[str]:
+        """Sources with at least one snapshot on the date"""
+
+    @abstractmethod
+    def source_ids(self) -> List[str]:
+        """Every source with stored snapshots"""
+
+    @abstractmethod
+    def dates(self, source_id: str) -> List[str]:
+        """Dates with snapshots of the source, oldest first"""
+
+    def load_day(self, source_id: str, date: str) -> List[List[Trend]]:
+        """读取指定日期的所有快照"""
+        return [items for _, items in self.snapshots(source_id, date)]
+
+    def import_day(self, source_id: str, snapshots: List[Snapshot]):
+        """Store the snapshots of one day read from another backend, in time order"""
+        for timestamp, items in snapshots:
+            self.append(source_id, datetime.strptime(timestamp, TIMESTAMP_FORMAT), items)
+
+
+def create_storage(base_path: Path | None = None, backend: str | None = None) -> TrendStorage:
+    """Instantiate the configured storage backend"""
+    from config import cfg
+
+    backend = backend or cfg.storage_backend
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend '{backend}', expected one of {', '.join(STORAGE_BACKENDS)}")
+
+    module_name, _, class_name = STORAGE_BACKENDS[backend].partition(":")
+    return getattr(importlib.import_module(module_name), class_name)(base_path)
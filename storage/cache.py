@@ -1,10 +1,24 @@
+import hashlib
 import json
+import logging
+import re
 from dataclasses import asdict, dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, List
+from typing import Any, Dict, List, Optional
 
-from fetcher.models import Trend
+from fetcher.models import Trend, TrendInterner
+from storage.archive import DayFiles, archive_path, archived_dates, read_day_file
+from storage.base import Snapshot, TrendStorage
+
+logger = logging.getLogger(__name__)
+
+# 记录最近一次完整快照的文件名与内容哈希
+LATEST_FILENAME = "_latest.json"
+
+# YYYYMMDD_HHMMSS.json, files written before snapshots were named by the second carry only the minute
+SNAPSHOT_FILENAME_FORMAT = "%Y%m%d_%H%M%S.json"
+SNAPSHOT_FILE_PATTERN = re.compile(r"(\d{8})_\d{4}(?:\d{2})?\.json")
 
 
 @dataclass
@@ -21,6 +35,23 @@ class CacheData:
     """热门内容列表"""
 
 
+@dataclass
+class UnchangedMarker:
+    """Stands in for a snapshot identical to an earlier full snapshot"""
+
+    source: str
+    """源ID"""
+
+    timestamp: str
+    """时间戳，格式：2025-11-22 17:50:00"""
+
+    same_as: str
+    """File name of the full snapshot this one repeats"""
+
+    hash: str
+    """Content hash of the repeated item list"""
+
+
 def omit_empty(data: Any) -> Any:
     """递归移除字典中的 None 值，实现类似 Go 的 omitempty 效果"""
     if isinstance(data, dict):
@@ -31,19 +62,39 @@ def omit_empty(data: Any) -> Any:
         return data
 
 
-class CacheStorage:
-    """缓存存储（保存到 temp 目录）"""
+def content_hash(items: List[Trend]) -> str:
+    """Hash of the normalized item list, stable across runs"""
+    normalized = json.dumps(
+        [omit_empty(asdict(item)) for item in items],
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class CacheStorage(TrendStorage):
+    """缓存存储（保存到 temp 目录，每个快照一个文件）"""
 
     def __init__(self, base_path: Path | None = None):
-        from config import cfg
+        super().__init__(base_path)
+        self.interner = TrendInterner()
 
-        self.base_path = base_path or cfg.temp_dir
+    def append(self, source_id: str, now: datetime, items: List[Trend]) -> bool:
+        """
+        保存缓存文件
+        Returns: False if the items repeat the previous snapshot and only a marker was written
+        """
+        digest = content_hash(items)
+        latest = self._read_latest(source_id, now)
+
+        if latest and latest["hash"] == digest:
+            self._write_marker(source_id, now, latest)
+            return False
 
-    def save(self, source_id: str, items: List[Trend]):
-        """保存缓存文件"""
-        now = datetime.now()
         timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
-        filename = now.strftime("%Y%m%d_%H%M") + ".json"
+        # Named by the second, a second save within the same minute must not replace a snapshot already aggregated
+        filename = now.strftime(SNAPSHOT_FILENAME_FORMAT)
         file_path = self.base_path / source_id / filename
 
         cache_data = CacheData(
@@ -57,3 +108,127 @@ class CacheStorage:
             # json.dump(asdict(cache_data), f, ensure_ascii=False, indent=2)
             data_dict = omit_empty(asdict(cache_data))
             json.dump(data_dict, f, ensure_ascii=False, indent=2)
+
+        self._write_latest(source_id, {"file": filename, "hash": digest})
+        return True
+
+    def save_unchanged(self, source_id: str) -> bool:
+        """Record that upstream confirmed the board unchanged, returns False if there is no snapshot to repeat"""
+        now = datetime.now()
+        latest = self._read_latest(source_id, now)
+        if not latest:
+            return False
+
+        self._write_marker(source_id, now, latest)
+        return True
+
+    def snapshots(self, source_id: str, date: str, after: str | None = None) -> List[Snapshot]:
+        """
+        读取指定日期的所有快照，标记文件会展开为其引用的完整快照
+        date: 日期字符串，格式：YYYY-MM-DD
+        """
+        source_dir = self.base_path / source_id
+        date_str = date.replace("-", "")
+        snapshots: Dict[str, List[Trend]] = {}
+        self.interner.scope(date)
+        result = []
+
+        # File names carry at least the minute, files of earlier minutes are skipped unopened
+        after_name = datetime.strptime(after, "%Y-%m-%d %H:%M:%S").strftime("%Y%m%d_%H%M") if after else ""
+
+        # Closed days may be packed into an archive, DayFiles reads either
+        with DayFiles(source_dir, date_str) as day_files:
+            for name in day_files.names(f"{date_str}_*.json"):
+                if name[: len(after_name)] < after_name:
+                    continue
+                try:
+                    data = json.loads(day_files.read(name))
+                    if after and data.get("timestamp", "") <= after:
+                        continue
+
+                    if "same_as" in data:
+                        items = self._load_snapshot(source_dir, data["same_as"], snapshots)
+                    else:
+                        items = [self.interner.trend(item) for item in data.get("items", [])]
+                        snapshots[name] = items
+                except Exception as e:
+                    logger.warning(f"读取文件失败 {source_dir / name}: {e}")
+                    continue
+
+                if items is not None:
+                    result.append((data.get("timestamp", ""), items))
+
+        return result
+
+    def sources(self, date: str) -> List[str]:
+        date_str = date.replace("-", "")
+        if not self.base_path.exists():
+            return []
+        return sorted(
+            source_dir.name
+            for source_dir in self.base_path.iterdir()
+            if source_dir.is_dir() and (any(source_dir.glob(f"{date_str}_*.json")) or archive_path(source_dir, date_str).exists())
+        )
+
+    def source_ids(self) -> List[str]:
+        if not self.base_path.exists():
+            return []
+        return sorted(source_dir.name for source_dir in self.base_path.iterdir() if source_dir.is_dir() and self.dates(source_dir.name))
+
+    def dates(self, source_id: str) -> List[str]:
+        source_dir = self.base_path / source_id
+        days = set(f"{day[:4]}-{day[4:6]}-{day[6:]}" for day in archived_dates(source_dir))
+        for json_file in source_dir.glob("*_*.json"):
+            match = SNAPSHOT_FILE_PATTERN.fullmatch(json_file.name)
+            if match:
+                day = match.group(1)
+                days.add(f"{day[:4]}-{day[4:6]}-{day[6:]}")
+        return sorted(days)
+
+    def _load_snapshot(self, source_dir: Path, filename: str, snapshots: Dict[str, List[Trend]]) -> Optional[List[Trend]]:
+        # The referenced snapshot may belong to an earlier day
+        if filename not in snapshots:
+            content = read_day_file(source_dir, filename[:8], filename)
+            if content is None:
+                logger.warning(f"Marker references missing snapshot {source_dir / filename}")
+                return None
+            data = json.loads(content)
+            snapshots[filename] = [self.interner.trend(item) for item in data.get("items", [])]
+        return snapshots[filename]
+
+    def _write_marker(self, source_id: str, now: datetime, latest: Dict[str, str]):
+        filename = now.strftime(SNAPSHOT_FILENAME_FORMAT)
+        # Never replace a full snapshot written earlier in the same second
+        if filename == latest["file"]:
+            return
+
+        marker = UnchangedMarker(
+            source=source_id,
+            timestamp=now.strftime("%Y-%m-%d %H:%M:%S"),
+            same_as=latest["file"],
+            hash=latest["hash"],
+        )
+        file_path = self.base_path / source_id / filename
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(marker), f, ensure_ascii=False)
+
+    def _read_latest(self, source_id: str, now: datetime) -> Optional[Dict[str, str]]:
+        """The latest full snapshot of the day `now` falls on"""
+        latest_file = self.base_path / source_id / LATEST_FILENAME
+        if not latest_file.exists():
+            return None
+        try:
+            with open(latest_file, "r", encoding="utf-8") as f:
+                latest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not (self.base_path / source_id / latest.get("file", "")).is_file():
+            return None
+        # Markers never reference an earlier day, so a closed day can be archived or expired on its own
+        if not latest["file"].startswith(now.strftime("%Y%m%d")):
+            return None
+        return latest
+
+    def _write_latest(self, source_id: str, latest: Dict[str, str]):
+        with open(self.base_path / source_id / LATEST_FILENAME, "w", encoding="utf-8") as f:
+            json.dump(latest, f)
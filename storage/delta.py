@@ -0,0 +1,271 @@
+"""
+Delta-encoded snapshot store for ranked boards
+
+Layout under the base path:
+    deltas/2025-11-22/baidu.jsonl   one record per snapshot
+
+Consecutive polls of a board return mostly the same items with a few rank moves, so
+only every DELTA_KEYFRAME_INTERVAL-th changed snapshot is written in full:
+    {"ts", "items": [...]}                              keyframe
+    {"ts", "runs": [[start, length], ...],              change to the previous snapshot
+     "add": [...], "score": [[index, score], ...]}
+    {"ts"}                                              board unchanged
+
+A run copies `length` items of the previous board from index `start`, start -1 takes
+the next `length` items of "add" instead. Items no run copies were removed, and
+"score" sets the new score of kept items by their index in the new board. The first
+snapshot of a day is always a keyframe, so each day decodes on its own.
+
+The aggregator consumes the records through changes() without rebuilding the boards.
+
+Import an existing temp/ directory: python -m storage.migrate --to delta
+"""
+
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fetcher.models import Trend, TrendInterner
+from storage.base import TIMESTAMP_FORMAT, Snapshot, TrendStorage
+from storage.cache import omit_empty
+from storage.segment import RECORD_PREFIX, TIMESTAMP_LENGTH, append_line, record_timestamp
+
+logger = logging.getLogger(__name__)
+
+DELTAS_DIRNAME = "deltas"
+DELTA_SUFFIX = ".jsonl"
+
+KEYFRAME_MARKER = b'","items"'
+
+
+def is_keyframe(line: bytes) -> bool:
+    """Whether a record is a keyframe, without parsing it"""
+    return line[len(RECORD_PREFIX) + TIMESTAMP_LENGTH :].startswith(KEYFRAME_MARKER)
+
+
+@dataclass
+class BoardChange:
+    """One snapshot, as a change to the board of the previous one"""
+
+    timestamp: str
+    """时间戳，格式：2025-11-22 17:50:00"""
+
+    keyframe: Optional[List[Trend]] = None
+    """The full board, replacing the previous one"""
+
+    runs: Optional[List[List[int]]] = None
+    """[start, length] slices of the previous board, start -1 for the next added items; None if unchanged"""
+
+    added: List[Trend] = field(default_factory=list)
+    """Items that were not on the previous board"""
+
+    scores: List[List[Optional[int]]] = field(default_factory=list)
+    """[index in the new board, new score] of kept items whose score changed"""
+
+    def apply(self, board: List[Trend], interner: TrendInterner) -> List[Trend]:
+        """The board after this change"""
+        if self.keyframe is not None:
+            return self.keyframe
+        if self.runs is None:
+            return board
+
+        added = iter(self.added)
+        result: List[Trend] = []
+        for start, length in self.runs:
+            if start < 0:
+                result.extend(islice(added, length))
+            else:
+                result.extend(board[start : start + length])
+        for index, score in self.scores:
+            result[index] = interner.trend({**asdict(result[index]), "score": score})
+        return result
+
+
+def encode_change(previous: List[Trend], items: List[Trend]) -> Optional[Dict]:
+    """Record body turning `previous` into `items`, None when a keyframe would be as small"""
+    # Kept means the same item apart from its score
+    positions: Dict[Tuple, List[int]] = {}
+    for index, item in enumerate(previous):
+        positions.setdefault((item.id, item.title, item.url, item.description), []).append(index)
+
+    runs: List[List[int]] = []
+    added: List[Trend] = []
+    scores: List[List[Optional[int]]] = []
+    for index, item in enumerate(items):
+        candidates = positions.get((item.id, item.title, item.url, item.description))
+        start = candidates.pop(0) if candidates else -1
+        if start < 0:
+            added.append(item)
+        elif previous[start].score != item.score:
+            scores.append([index, item.score])
+
+        if runs and (runs[-1][0] < 0 if start < 0 else runs[-1][0] >= 0 and sum(runs[-1]) == start):
+            runs[-1][1] += 1
+        else:
+            runs.append([start, 1])
+
+    if len(added) * 2 > len(items):
+        return None
+    body: Dict = {"runs": runs}
+    if added:
+        body["add"] = [omit_empty(asdict(item)) for item in added]
+    if scores:
+        body["score"] = scores
+    return body
+
+
+class DeltaStorage(TrendStorage):
+    """Snapshots stored as periodic keyframes and the changes between them, one file per source per day"""
+
+    def __init__(self, base_path: Path | None = None):
+        from config import cfg
+
+        super().__init__(base_path)
+        self.deltas_path = self.base_path / DELTAS_DIRNAME
+        self.keyframe_interval = cfg.delta_keyframe_interval
+        self.interner = TrendInterner()
+        # source_id -> (date, size of its file, latest board, changed records since the keyframe)
+        self._heads: Dict[str, Tuple[str, int, List[Trend], int]] = {}
+
+    def append(self, source_id: str, now: datetime, items: List[Trend]) -> bool:
+        head = self._read_head(source_id, now.strftime("%Y-%m-%d"))
+        if head is not None and head[2] == items:
+            self._append_record(source_id, now, {}, head[2], head[3])
+            return False
+
+        body = None
+        changed = 0
+        if head is not None and head[3] + 1 < self.keyframe_interval:
+            body = encode_change(head[2], items)
+            changed = head[3] + 1
+        if body is None:
+            body = {"items": [omit_empty(asdict(item)) for item in items]}
+            changed = 0
+        self._append_record(source_id, now, body, items, changed)
+        return True
+
+    def save_unchanged(self, source_id: str) -> bool:
+        now = datetime.now()
+        head = self._read_head(source_id, now.strftime("%Y-%m-%d"))
+        if head is None:
+            # Each day is self-contained, the first snapshot of a day is always a keyframe
+            return False
+
+        self._append_record(source_id, now, {}, head[2], head[3])
+        return True
+
+    def snapshots(self, source_id: str, date: str, after: str | None = None) -> List[Snapshot]:
+        board, changes = self.changes(source_id, date, after)
+        result = []
+        for change in changes:
+            board = change.apply(board, self.interner)
+            result.append((change.timestamp, board))
+        return result
+
+    def changes(self, source_id: str, date: str, after: str | None = None) -> Tuple[List[Trend], List[BoardChange]]:
+        """
+        The board as of `after` and the snapshots past it as changes to that board
+        Only records from the last keyframe up to `after` are decoded to rebuild the board.
+        """
+        delta_file = self._delta_path(source_id, date)
+        if not delta_file.exists():
+            return [], []
+        self.interner.scope(date)
+        with open(delta_file, "rb") as f:
+            lines = f.read().splitlines()
+
+        start = 0
+        if after:
+            for index, line in enumerate(lines):
+                if record_timestamp(line) > after:
+                    break
+                if is_keyframe(line):
+                    start = index
+
+        board: List[Trend] = []
+        changes = []
+        for index in range(start, len(lines)):
+            change = self._parse(lines[index], delta_file)
+            if change is None:
+                continue
+            if after and change.timestamp <= after:
+                board = change.apply(board, self.interner)
+            else:
+                changes.append(change)
+        return board, changes
+
+    def sources(self, date: str) -> List[str]:
+        day_dir = self.deltas_path / date
+        if not day_dir.exists():
+            return []
+        return sorted(delta_file.stem for delta_file in day_dir.glob(f"*{DELTA_SUFFIX}"))
+
+    def source_ids(self) -> List[str]:
+        return sorted({delta_file.stem for delta_file in self.deltas_path.glob(f"*/*{DELTA_SUFFIX}")})
+
+    def dates(self, source_id: str) -> List[str]:
+        if not self.deltas_path.exists():
+            return []
+        return sorted(day_dir.name for day_dir in self.deltas_path.iterdir() if (day_dir / f"{source_id}{DELTA_SUFFIX}").exists())
+
+    def _parse(self, line: bytes, delta_file: Path) -> Optional[BoardChange]:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # A crash mid-append can leave a truncated last line, the writer skipped it as well
+            logger.warning(f"Skipping malformed record in {delta_file}")
+            return None
+
+        if "items" in record:
+            return BoardChange(record["ts"], keyframe=[self.interner.trend(item) for item in record["items"]])
+        if "runs" not in record:
+            return BoardChange(record["ts"])
+        return BoardChange(
+            record["ts"],
+            runs=record["runs"],
+            added=[self.interner.trend(item) for item in record.get("add", [])],
+            scores=record.get("score", []),
+        )
+
+    def _delta_path(self, source_id: str, date: str) -> Path:
+        return self.deltas_path / date / f"{source_id}{DELTA_SUFFIX}"
+
+    def _append_record(self, source_id: str, now: datetime, body: Dict, board: List[Trend], changed: int):
+        date = now.strftime("%Y-%m-%d")
+        delta_file = self._delta_path(source_id, date)
+        delta_file.parent.mkdir(parents=True, exist_ok=True)
+        record = {"ts": now.strftime(TIMESTAMP_FORMAT), **body}
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+        offset = append_line(delta_file, line)
+        self._heads[source_id] = (date, offset + len(line), board, changed)
+
+    def _read_head(self, source_id: str, date: str) -> Optional[Tuple[str, int, List[Trend], int]]:
+        """The latest board of the day, decoded from its last keyframe unless this instance wrote it"""
+        delta_file = self._delta_path(source_id, date)
+        if not delta_file.exists():
+            return None
+        size = delta_file.stat().st_size
+        head = self._heads.get(source_id)
+        if head is not None and head[0] == date and head[1] == size:
+            return head
+
+        self.interner.scope(date)
+        with open(delta_file, "rb") as f:
+            lines = f.read().splitlines()
+        start = max((index for index, line in enumerate(lines) if is_keyframe(line)), default=0)
+        board: List[Trend] = []
+        changed = 0
+        for line in lines[start:]:
+            change = self._parse(line, delta_file)
+            if change is None:
+                continue
+            board = change.apply(board, self.interner)
+            changed = 0 if change.keyframe is not None else changed + (change.runs is not None)
+
+        self._heads[source_id] = (date, size, board, changed)
+        return self._heads[source_id]
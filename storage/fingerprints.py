@@ -0,0 +1,217 @@
+"""
+Fingerprints of the stories already summarized, so a story that stays hot is not summarized every day
+
+Every summarized item is kept with its date, URL and the MinHash signature of its title's
+character bigrams. Before a day's news is selected, the stories summarized in the lookback
+window before it are loaded: a candidate with the URL of one of them is the same article and
+is skipped, a candidate telling the same story under another URL is skipped too, or kept and
+marked as a follow-up of the earlier one. Titles tell the same story as they do across
+sources in analysis.stories: LSH proposes, the exact bigram Jaccard similarity decides.
+
+Stories are kept in state/fingerprints.db.
+
+Backfill from the summaries written so far: python -m storage.fingerprints --rebuild
+"""
+
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from analysis.minhash import LSHIndex, jaccard
+from analysis.stories import LSH_BANDS, LSH_ROWS, SIMILARITY_THRESHOLD, fingerprint, hasher
+
+logger = logging.getLogger(__name__)
+
+DATABASE_FILENAME = "fingerprints.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stories (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    url_key TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    signature BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_stories_date ON stories(date);
+"""
+
+def url_key(url: str) -> str:
+    """The URL without scheme, fragment and trailing slash, host lowercased"""
+    parts = urlsplit(url.strip())
+    key = f"{parts.netloc.lower()}{parts.path.rstrip('/')}"
+    return f"{key}?{parts.query}" if parts.query else key
+
+
+@dataclass
+class Repeat:
+    """A story summarized before that a candidate repeats"""
+
+    date: str
+    title: str
+    url: str
+
+    same_url: bool
+    """The very article, not only the same story"""
+
+
+class RecentStories:
+    """The stories summarized within a window of days, looked up by URL and by title"""
+
+    def __init__(self, rows: List[Tuple[str, str, str, str, bytes]]):
+        """rows: (date, url_key, url, title, signature), oldest first"""
+        self._stories: List[Tuple[str, str, str]] = []
+        self._by_url: Dict[str, int] = {}
+        self._index = LSHIndex(LSH_BANDS, LSH_ROWS)
+        for date, key, url, title, packed in rows:
+            signature = tuple(array("I", packed))
+            if len(signature) != hasher.num_perm:
+                # Recorded with other MinHash parameters
+                signature = fingerprint(title)[1]
+            position = len(self._stories)
+            self._stories.append((date, url, title))
+            if key:
+                # The latest day wins
+                self._by_url[key] = position
+            self._index.insert(position, signature)
+
+    def __len__(self) -> int:
+        return len(self._stories)
+
+    def match(self, title: str, url: str) -> Optional[Repeat]:
+        """The story this one repeats, by URL first, then the most similar title, the latest on ties"""
+        position = self._by_url.get(url_key(url)) if url else None
+        if position is not None:
+            date, stored_url, stored_title = self._stories[position]
+            return Repeat(date, stored_title, stored_url, same_url=True)
+
+        title_shingles, signature = fingerprint(title)
+        if not title_shingles:
+            return None
+        best: Optional[Tuple[float, int]] = None
+        for position in self._index.query(signature):
+            similarity = jaccard(title_shingles, fingerprint(self._stories[position][2])[0])
+            if similarity >= SIMILARITY_THRESHOLD and (best is None or (similarity, position) > best):
+                best = (similarity, position)
+        if best is None:
+            return None
+        date, stored_url, stored_title = self._stories[best[1]]
+        return Repeat(date, stored_title, stored_url, same_url=False)
+
+
+class StoryFingerprints:
+    """Summarized stories in an SQLite database in WAL mode, one connection per thread"""
+
+    _instances: Dict[Path, "StoryFingerprints"] = {}
+
+    def __init__(self, db_path: Path | None = None):
+        from config import cfg
+
+        self.db_path = db_path or cfg.state_dir / DATABASE_FILENAME
+        self._local = threading.local()
+
+    @classmethod
+    def default(cls) -> "StoryFingerprints":
+        """The store of the configured state directory, shared within the process"""
+        from config import cfg
+
+        db_path = cfg.state_dir / DATABASE_FILENAME
+        if db_path not in cls._instances:
+            cls._instances[db_path] = cls(db_path)
+        return cls._instances[db_path]
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def record(self, date: str, news: List[Dict]) -> int:
+        """
+        Keep the stories summarized on a date, replacing what an earlier run of that date kept
+        news: the summarized items, with title and url, as the summary lists them
+        """
+        rows = [
+            (date, url_key(item["url"]), item["url"], item["title"], array("I", fingerprint(item["title"])[1]).tobytes())
+            for item in news
+        ]
+        with self.connection as connection:
+            connection.execute("DELETE FROM stories WHERE date = ?", (date,))
+            connection.executemany("INSERT INTO stories (date, url_key, url, title, signature) VALUES (?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def recent(self, date: str, lookback_days: int) -> RecentStories:
+        """
+        The stories summarized in the lookback_days days before `date`, the date itself excluded
+        so that generating a day again does not find its own stories
+        """
+        start = (datetime.strptime(date, "%Y-%m-%d") - timedelta(days=lookback_days)).strftime("%Y-%m-%d")
+        rows = self.connection.execute(
+            "SELECT date, url_key, url, title, signature FROM stories WHERE date >= ? AND date < ? ORDER BY date, id",
+            (start, date),
+        ).fetchall()
+        return RecentStories(rows)
+
+    def clear(self):
+        with self.connection as connection:
+            connection.execute("DELETE FROM stories")
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+def rebuild() -> int:
+    """Record the summarized stories of every summary file again, returns the number of stories"""
+    from config import cfg
+
+    fingerprints = StoryFingerprints.default()
+    fingerprints.clear()
+    recorded = 0
+    for summary_file in sorted(cfg.summaries_dir.glob("????-??-??.json")):
+        with open(summary_file, "r", encoding="utf-8") as f:
+            news = json.load(f).get("news", [])
+        # Items whose fetch or summary failed were never summarized
+        recorded += fingerprints.record(summary_file.stem, [item for item in news if item.get("summary")])
+    return recorded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fingerprints of the stories already summarized")
+    parser.add_argument("--rebuild", action="store_true", help="record the stories of every summary file again")
+    parser.add_argument("--date", default=datetime.now().strftime("%Y-%m-%d"), help="list the stories before this date, 格式：YYYY-MM-DD")
+    parser.add_argument("--days", type=int, default=7, help="回看天数")
+    args = parser.parse_args()
+
+    from logger.logging import setup_logger
+
+    setup_logger()
+    if args.rebuild:
+        recorded = rebuild()
+        logger.info(f"✅ Recorded {recorded} stories")
+    rows = StoryFingerprints.default().connection.execute(
+        "SELECT date, title, url FROM stories WHERE date >= ? AND date < ? ORDER BY date, id",
+        ((datetime.strptime(args.date, "%Y-%m-%d") - timedelta(days=args.days)).strftime("%Y-%m-%d"), args.date),
+    )
+    for date, title, url in rows:
+        print(f"{date}  {title}  {url}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Copy snapshots between storage backends
+
+python -m storage.migrate --to segments             # temp/ files -> segments
+python -m storage.migrate --to delta                # temp/ files -> keyframes and deltas
+python -m storage.migrate --from files --to sqlite  # temp/ files -> SQLite
+"""
+
+import argparse
+import logging
+from pathlib import Path
+from typing import List
+
+from storage.base import STORAGE_BACKENDS, TrendStorage, create_storage
+
+logger = logging.getLogger(__name__)
+
+
+def migrate(source: TrendStorage, target: TrendStorage, source_ids: List[str] | None = None) -> int:
+    """Copy every day of every source that the target does not have yet, returns the number of snapshots copied"""
+    copied = 0
+    for source_id in source.source_ids():
+        if source_ids and source_id not in source_ids:
+            continue
+        existing = set(target.dates(source_id))
+        for date in source.dates(source_id):
+            if date in existing:
+                logger.warning(f"⏭ {source_id} {date}: already in target")
+                continue
+            snapshots = source.snapshots(source_id, date)
+            target.import_day(source_id, snapshots)
+            copied += len(snapshots)
+            logger.info(f"✅ {source_id} {date}: {len(snapshots)} snapshots")
+
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy snapshots between storage backends")
+    parser.add_argument("--from", dest="source", choices=list(STORAGE_BACKENDS), default="files")
+    parser.add_argument("--to", dest="target", choices=list(STORAGE_BACKENDS), required=True)
+    parser.add_argument("--temp-dir", type=Path, default=None)
+    parser.add_argument("--source-id", action="append", help="only this source, repeatable")
+    args = parser.parse_args()
+
+    from logger.logging import setup_logger
+
+    setup_logger()
+    if args.source == args.target:
+        parser.error("--from and --to must differ")
+
+    source = create_storage(args.temp_dir, args.source)
+    target = create_storage(args.temp_dir, args.target)
+    copied = migrate(source, target, args.source_id)
+    logger.info(f"Copied {copied} snapshots from {args.source} to {args.target}, set STORAGE_BACKEND={args.target} to use them")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+Keyword monitoring: subscriptions to sets of keywords, and the trends that matched them
+
+Every new board and every new flash item is matched against the keywords of all
+subscriptions at once with one Aho-Corasick automaton, rebuilt only when a subscription
+is added or removed. A topic matches a subscription at most once per source and day, the
+first time it is seen.
+
+Subscriptions and matches are kept in state/monitor.db.
+
+Match the stored snapshots again, e.g. for a new subscription: python -m storage.monitor --rescan [--from 2025-11-01]
+"""
+
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from analysis.keywords import AhoCorasick, fold
+from fetcher.models import Trend
+from storage.aggregator import SOURCES_CONFIG
+
+logger = logging.getLogger(__name__)
+
+DATABASE_FILENAME = "monitor.db"
+
+MAX_KEYWORDS = 1000
+MAX_PAGE_SIZE = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscriptions (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    keywords TEXT NOT NULL,
+    sources TEXT,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    subscription_id INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    date TEXT NOT NULL,
+    topic_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    url TEXT NOT NULL,
+    keywords TEXT NOT NULL,
+    ts TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_matches_topic ON matches(subscription_id, source, date, topic_id);
+CREATE INDEX IF NOT EXISTS idx_matches_subscription_ts ON matches(subscription_id, ts);
+
+-- Bumped on every subscription change, processes rebuild their automaton when it moves
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+"""
+
+
+@dataclass
+class Matcher:
+    """The automaton over the keywords of every subscription, as of one subscriptions version"""
+
+    version: int
+    automaton: AhoCorasick
+    subscriptions: List[List[Tuple[int, str]]]
+    """Per automaton keyword: (subscription id, the keyword as the subscription wrote it)"""
+
+    sources: Dict[int, Optional[frozenset]]
+    """subscription id -> the sources it watches, None for every source"""
+
+
+class KeywordMonitor:
+    """Subscriptions and matches in an SQLite database in WAL mode, one connection per thread"""
+
+    _instances: Dict[Path, "KeywordMonitor"] = {}
+
+    def __init__(self, db_path: Path | None = None):
+        from config import cfg
+
+        self.db_path = db_path or cfg.state_dir / DATABASE_FILENAME
+        self._local = threading.local()
+        self._matcher: Optional[Matcher] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> "KeywordMonitor":
+        """The monitor of the configured state directory, shared within the process so the automaton is built once"""
+        from config import cfg
+
+        db_path = cfg.state_dir / DATABASE_FILENAME
+        if db_path not in cls._instances:
+            cls._instances[db_path] = cls(db_path)
+        return cls._instances[db_path]
+
+    def __getstate__(self):
+        # Connections and the automaton stay in the process that made them
+        state = self.__dict__.copy()
+        del state["_local"], state["_lock"]
+        state["_matcher"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def subscribe(self, name: str, keywords: List[str], source_ids: List[str] | None = None) -> Dict:
+        """
+        Register a keyword set, returns the new subscription
+        source_ids: 只监控这些源，默认所有源
+        Raises ValueError if no keyword is left after trimming, or there are more than MAX_KEYWORDS.
+        """
+        keywords = list(dict.fromkeys(keyword.strip() for keyword in keywords if fold(keyword).strip()))
+        if not keywords:
+            raise ValueError("At least one non-empty keyword is required")
+        if len(keywords) > MAX_KEYWORDS:
+            raise ValueError(f"{len(keywords)} keywords exceed the limit of {MAX_KEYWORDS}")
+        unknown = sorted(set(source_ids or []) - set(SOURCES_CONFIG))
+        if unknown:
+            raise ValueError(f"Unknown sources: {', '.join(unknown)}")
+
+        created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self.connection as connection:
+            subscription_id = connection.execute(
+                "INSERT INTO subscriptions (name, keywords, sources, created_at) VALUES (?, ?, ?, ?)",
+                (name.strip() or keywords[0], _dumps(keywords), _dumps(sorted(set(source_ids))) if source_ids else None, created_at),
+            ).lastrowid
+            connection.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        return self.subscription(subscription_id)
+
+    def unsubscribe(self, subscription_id: int) -> bool:
+        """Remove a subscription and its matches, returns False if it does not exist"""
+        with self.connection as connection:
+            deleted = connection.execute("DELETE FROM subscriptions WHERE id = ?", (subscription_id,)).rowcount
+            if not deleted:
+                return False
+            connection.execute("DELETE FROM matches WHERE subscription_id = ?", (subscription_id,))
+            connection.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        return True
+
+    def subscription(self, subscription_id: int) -> Optional[Dict]:
+        row = self.connection.execute(
+            f"SELECT {SUBSCRIPTION_COLUMNS} FROM subscriptions s WHERE s.id = ?", (subscription_id,)
+        ).fetchone()
+        return _subscription(*row) if row else None
+
+    def subscriptions(self) -> List[Dict]:
+        rows = self.connection.execute(f"SELECT {SUBSCRIPTION_COLUMNS} FROM subscriptions s ORDER BY s.id")
+        return [_subscription(*row) for row in rows]
+
+    def match(self, source_id: str, now: datetime, items: List[Trend]) -> int:
+        """Record the items matching any subscription, returns the number of new matches"""
+        matcher = self.matcher()
+        if not len(matcher.automaton):
+            return 0
+
+        rows = []
+        date = now.strftime("%Y-%m-%d")
+        timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
+        for item in items:
+            found = matcher.automaton.search(f"{item.title}\n{item.description}" if item.description else item.title)
+            if not found:
+                continue
+            matched: Dict[int, List[str]] = {}
+            for index in sorted(found):
+                for subscription_id, keyword in matcher.subscriptions[index]:
+                    sources = matcher.sources[subscription_id]
+                    if sources is None or source_id in sources:
+                        matched.setdefault(subscription_id, []).append(keyword)
+            rows.extend(
+                (subscription_id, source_id, date, item.id, item.title, item.url, _dumps(keywords), timestamp)
+                for subscription_id, keywords in matched.items()
+            )
+        if not rows:
+            return 0
+
+        with self.connection as connection:
+            before = connection.total_changes
+            connection.executemany(
+                "INSERT OR IGNORE INTO matches (subscription_id, source, date, topic_id, title, url, keywords, ts) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            return connection.total_changes - before
+
+    def matches(self, subscription_id: int, date_from: str | None = None, date_to: str | None = None, page: int = 1, page_size: int = 20) -> Dict:
+        """
+        Matches of a subscription, newest first
+        date_from, date_to: 日期字符串，格式：YYYY-MM-DD，包含两端
+        """
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        page = max(1, page)
+        # ts starts with the date, so the range is a range of the (subscription_id, ts) index
+        parameters = (subscription_id, date_from or "", f"{date_to}~" if date_to else "~")
+        (total,) = self.connection.execute(
+            "SELECT COUNT(*) FROM matches WHERE subscription_id = ? AND ts >= ? AND ts < ?", parameters
+        ).fetchone()
+        rows = self.connection.execute(
+            """
+            SELECT source, date, topic_id, title, url, keywords, ts FROM matches
+            WHERE subscription_id = ? AND ts >= ? AND ts < ?
+            ORDER BY ts DESC, id DESC
+            LIMIT ? OFFSET ?
+            """,
+            (*parameters, page_size, (page - 1) * page_size),
+        )
+        return {
+            "subscription_id": subscription_id,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "matches": [
+                {
+                    "source_id": source,
+                    "source_name": SOURCES_CONFIG.get(source, {}).get("name", source),
+                    "date": date,
+                    "id": topic_id,
+                    "title": title,
+                    "url": url,
+                    "keywords": json.loads(keywords),
+                    "first_seen": timestamp,
+                }
+                for source, date, topic_id, title, url, keywords, timestamp in rows
+            ],
+        }
+
+    def matcher(self) -> Matcher:
+        """The automaton of the current subscriptions, built again only when they changed"""
+        (version,) = self.connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        matcher = self._matcher
+        if matcher is not None and matcher.version == version:
+            return matcher
+
+        with self._lock:
+            if self._matcher is not None and self._matcher.version == version:
+                return self._matcher
+            rows = self.connection.execute("SELECT id, keywords, sources FROM subscriptions").fetchall()
+            by_keyword: Dict[str, List[Tuple[int, str]]] = {}
+            sources: Dict[int, Optional[frozenset]] = {}
+            for subscription_id, keywords, source_ids in rows:
+                sources[subscription_id] = frozenset(json.loads(source_ids)) if source_ids else None
+                for keyword in json.loads(keywords):
+                    by_keyword.setdefault(fold(keyword), []).append((subscription_id, keyword))
+            automaton = AhoCorasick(by_keyword)
+            self._matcher = Matcher(version, automaton, [by_keyword[keyword] for keyword in automaton.keywords], sources)
+            logger.debug(f"Keyword automaton rebuilt: {len(rows)} subscriptions, {len(automaton)} keywords")
+            return self._matcher
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+SUBSCRIPTION_COLUMNS = "s.id, s.name, s.keywords, s.sources, s.created_at, (SELECT COUNT(*) FROM matches m WHERE m.subscription_id = s.id)"
+
+
+def _subscription(subscription_id: int, name: str, keywords: str, source_ids: Optional[str], created_at: str, match_count: int) -> Dict:
+    return {
+        "id": subscription_id,
+        "name": name,
+        "keywords": json.loads(keywords),
+        "sources": json.loads(source_ids) if source_ids else None,
+        "created_at": created_at,
+        "matches": match_count,
+    }
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def rescan(date_from: str | None = None, date_to: str | None = None) -> int:
+    """Match every stored snapshot and flash stream in the range again, returns the number of new matches"""
+    from storage.base import TIMESTAMP_FORMAT, create_storage
+    from storage.stream import FlashStream
+
+    monitor = KeywordMonitor.default()
+    storage = create_storage()
+    stream = FlashStream(storage.base_path)
+    found = 0
+    dates = set()
+    for source_id in storage.source_ids():
+        for date in storage.dates(source_id):
+            if (date_from and date < date_from) or (date_to and date > date_to):
+                continue
+            dates.add(date)
+            for timestamp, items in storage.snapshots(source_id, date):
+                found += monitor.match(source_id, datetime.strptime(timestamp, TIMESTAMP_FORMAT), items)
+    for date in sorted(dates):
+        for source_id in stream.sources(date):
+            found += monitor.match(source_id, datetime.strptime(date, "%Y-%m-%d"), stream.read(source_id, date))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyword monitoring")
+    parser.add_argument("--rescan", action="store_true", help="match the stored snapshots again")
+    parser.add_argument("--from", dest="date_from", help="日期，格式：YYYY-MM-DD")
+    parser.add_argument("--to", dest="date_to", help="日期，格式：YYYY-MM-DD")
+    args = parser.parse_args()
+
+    from logger.logging import setup_logger
+
+    setup_logger()
+    if args.rescan:
+        found = rescan(args.date_from, args.date_to)
+        logger.info(f"✅ Found {found} new matches")
+    for subscription in KeywordMonitor.default().subscriptions():
+        print(f"{subscription['id']:>4}  {subscription['name']}  {subscription['matches']} matches  {', '.join(subscription['keywords'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Per-day topic statistics of every ranked source, and rankings over ranges of days
+
+DailyAggregator.generate(date) writes data/rollups/YYYY-MM-DD.json next to the daily
+aggregate. The statistics are additive, so a week or month is ranked by summing the
+rollups of its days, with the same result as aggregating every raw snapshot of the range.
+Flash-news streams have no ranking and are left out.
+
+Backfill days aggregated before rollups existed:
+python -m storage.rollup [--from 2025-11-01] [--to 2025-11-30]
+"""
+
+import argparse
+import json
+import logging
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from storage.aggregator import MAX_ITEMS_PER_SOURCE, SOURCES_CONFIG, DailyAggregator, rank_topic_stats, write_atomic
+from storage.cache import omit_empty
+
+logger = logging.getLogger(__name__)
+
+ROLLUPS_DIRNAME = "rollups"
+
+# Longest range /api/trends accepts
+MAX_RANGE_DAYS = 366
+
+# Column order of a topic row in a rollup file
+ROLLUP_FIELDS = ("id", "title", "url", "description", "count", "total_rank", "score_sum", "score_count")
+
+
+def rollup_path(date: str, data_dir: Path | None = None) -> Path:
+    if data_dir is None:
+        from config import cfg
+        data_dir = cfg.data_dir
+    return data_dir / ROLLUPS_DIRNAME / f"{date}.json"
+
+
+def write_rollup(date: str, topics: Dict[str, Dict[str, Dict]], data_dir: Path | None = None):
+    """
+    topics: source_id -> topic statistics in first-seen order, as accumulate_trends keeps them
+    {"date": "2025-11-22", "sources": {"baidu": [[id, title, url, description, count, total_rank, score_sum, score_count], ...]}}
+    """
+    rollup = {
+        "date": date,
+        "sources": {
+            source_id: [[stats[name] for name in ROLLUP_FIELDS] for stats in source_topics.values()]
+            for source_id, source_topics in topics.items()
+        },
+    }
+    write_atomic(rollup_path(date, data_dir), json.dumps(rollup, ensure_ascii=False, separators=(",", ":")))
+
+
+def load_rollup(date: str, data_dir: Path | None = None) -> Optional[Dict]:
+    """The rollup of a day, None if the day was never aggregated"""
+    rollup_file = rollup_path(date, data_dir)
+    try:
+        mtime = rollup_file.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return _read_rollup(rollup_file, mtime)
+
+
+@lru_cache(maxsize=MAX_RANGE_DAYS)
+def _read_rollup(rollup_file: Path, mtime: int) -> Dict:
+    # Keyed by mtime, a rewritten rollup is read again; callers must not modify the result
+    with open(rollup_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def date_range(date_from: str, date_to: str) -> List[str]:
+    """Every date from date_from to date_to inclusive, YYYY-MM-DD"""
+    start = datetime.strptime(date_from, "%Y-%m-%d")
+    end = datetime.strptime(date_to, "%Y-%m-%d")
+    return [(start + timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range((end - start).days + 1)]
+
+
+def merge_rollups(dates: List[str], source_ids: List[str] | None = None, data_dir: Path | None = None) -> Tuple[Dict[str, Dict[str, Dict]], List[str]]:
+    """
+    Sum the topic statistics of the given days
+    Returns (source_id -> topic statistics in first-seen order, the dates that had a rollup)
+    """
+    merged: Dict[str, Dict[str, Dict]] = {}
+    found = []
+    for date in sorted(dates):
+        rollup = load_rollup(date, data_dir)
+        if rollup is None:
+            continue
+        found.append(date)
+
+        for source_id, rows in rollup["sources"].items():
+            if source_ids and source_id not in source_ids:
+                continue
+            topics = merged.setdefault(source_id, {})
+            for row in rows:
+                stats = topics.get(row[0])
+                if stats is None:
+                    topics[row[0]] = dict(zip(ROLLUP_FIELDS, row))
+                    continue
+                stats["count"] += row[4]
+                stats["total_rank"] += row[5]
+                stats["score_sum"] += row[6]
+                stats["score_count"] += row[7]
+    return merged, found
+
+
+def aggregate_range(date_from: str, date_to: str, source_ids: List[str] | None = None, limit: int = MAX_ITEMS_PER_SOURCE, data_dir: Path | None = None) -> Dict:
+    """
+    各源在日期范围内的综合排名，结构同每日汇总
+    date_from, date_to: 日期字符串，格式：YYYY-MM-DD，包含两端
+    """
+    dates = date_range(date_from, date_to)
+    if not dates:
+        raise ValueError(f"Empty range: {date_from} is after {date_to}")
+    if len(dates) > MAX_RANGE_DAYS:
+        raise ValueError(f"Range of {len(dates)} days exceeds {MAX_RANGE_DAYS}")
+
+    # Past days do not change, so the same range is only merged again once one of its rollups is rewritten
+    signature = tuple(_rollup_mtime(date, data_dir) for date in dates)
+    return _aggregate_range(date_from, date_to, tuple(source_ids or ()), limit, data_dir, signature)
+
+
+def _rollup_mtime(date: str, data_dir: Path | None) -> Optional[int]:
+    try:
+        return rollup_path(date, data_dir).stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+@lru_cache(maxsize=64)
+def _aggregate_range(date_from: str, date_to: str, source_ids: Tuple[str, ...], limit: int, data_dir: Path | None, signature: Tuple) -> Dict:
+    dates = date_range(date_from, date_to)
+    merged, found = merge_rollups(dates, list(source_ids), data_dir)
+    sources = []
+    for source_id, topics in merged.items():
+        config = SOURCES_CONFIG.get(source_id, {})
+        ranked_items = rank_topic_stats(topics)[:limit]
+        sources.append(
+            {
+                "source_id": source_id,
+                "name": config.get("name", source_id),
+                "order": config.get("order", 999),
+                "items": [{"rank": rank, **omit_empty(asdict(item))} for rank, item in enumerate(ranked_items, 1)],
+            }
+        )
+    sources.sort(key=lambda source: source["order"])
+
+    return {
+        "from": date_from,
+        "to": date_to,
+        "days": len(dates),
+        "days_with_data": len(found),
+        "sources": sources,
+    }
+
+
+def backfill(date_from: str | None = None, date_to: str | None = None) -> int:
+    """Aggregate every stored day in the range that has no rollup yet, returns the number of days written"""
+    aggregator = DailyAggregator()
+    dates = sorted({date for source_id in aggregator.storage.source_ids() for date in aggregator.storage.dates(source_id)})
+    written = 0
+    for date in dates:
+        if (date_from and date < date_from) or (date_to and date > date_to):
+            continue
+        if rollup_path(date, aggregator.output_path).exists():
+            continue
+        aggregator.generate(date)
+        written += 1
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the rollups of days aggregated before rollups existed")
+    parser.add_argument("--from", dest="date_from", help="日期，格式：YYYY-MM-DD")
+    parser.add_argument("--to", dest="date_to", help="日期，格式：YYYY-MM-DD")
+    args = parser.parse_args()
+
+    from logger.logging import setup_logger
+
+    setup_logger()
+    written = backfill(args.date_from, args.date_to)
+    logger.info(f"✅ Wrote {written} rollups")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Vectorized ranking of a source's snapshots, same result as accumulating them topic by topic
+
+The snapshots are encoded once into flat arrays with one entry per item: the topic's index in
+first-seen order, its rank and its score. Counts, rank sums and score sums are then grouped
+reductions over the topic indexes, and the final scores are computed for every topic at once.
+aggregate_source_trends ranks through here; accumulate_trends and rank_topic_stats stay the
+reference, and the running statistics the checkpoints and rollups keep.
+"""
+
+from dataclasses import dataclass
+from itertools import chain
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from fetcher.models import Trend
+
+# float64 holds every integer below this exactly, larger score sums are divided in Python
+EXACT_FLOAT_INT = 2**53
+
+
+@dataclass
+class EncodedSnapshots:
+    """Snapshots flattened into one entry per item, in snapshot order"""
+
+    topics: List[Trend]
+    """First-seen item of every topic, a topic's index is its position here"""
+
+    topic_index: np.ndarray
+    rank: np.ndarray
+    score: np.ndarray
+    """Score of the item, 0 where it has none"""
+
+    has_score: np.ndarray
+
+
+def first_seen(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Dense ids of the keys numbered in first-seen order, and the position of each id's first key"""
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    renumber = np.empty_like(order)
+    renumber[order] = np.arange(len(order))
+    return renumber[inverse], first[order]
+
+
+def encode_snapshots(items_list: Sequence[List[Trend]]) -> EncodedSnapshots:
+    """
+    Storage backends share one Trend object for every repeat of an item across polls, so items
+    are told apart by identity, and the topic and score of each distinct object are read once
+    """
+    flat = list(chain.from_iterable(items_list))
+    lengths = np.fromiter(map(len, items_list), dtype=np.int64, count=len(items_list))
+    item_object, object_positions = first_seen(np.fromiter(map(id, flat), dtype=np.uintp, count=len(flat)))
+    distinct = [flat[position] for position in object_positions.tolist()]
+
+    topic_of: Dict[str, int] = {}
+    topics: List[Trend] = []
+    for trend in distinct:
+        if trend.id not in topic_of:
+            topic_of[trend.id] = len(topics)
+            topics.append(trend)
+    object_topic = np.array([topic_of[trend.id] for trend in distinct], dtype=np.intp)
+    object_score = np.array([trend.score or 0 for trend in distinct], dtype=np.int64)
+    object_has_score = np.array([trend.score is not None for trend in distinct], dtype=bool)
+
+    # Ranks restart at 1 with every snapshot
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return EncodedSnapshots(
+        topics=topics,
+        topic_index=object_topic[item_object],
+        rank=np.arange(1, len(flat) + 1, dtype=np.int64) - starts,
+        score=object_score[item_object],
+        has_score=object_has_score[item_object],
+    )
+
+
+def score_topics(encoded: EncodedSnapshots) -> np.ndarray:
+    """topic_score of every topic, indexed like encoded.topics"""
+    from storage.aggregator import SCORE_COUNT_WEIGHT, SCORE_RANK_WEIGHT
+
+    size = len(encoded.topics)
+    count = np.bincount(encoded.topic_index, minlength=size)
+    total_rank = np.bincount(encoded.topic_index, weights=encoded.rank, minlength=size)
+    score_count = np.bincount(encoded.topic_index, weights=encoded.has_score, minlength=size).astype(np.int64)
+    # Integer sums, as Python adds the scores up
+    score_sum = np.zeros(size, dtype=np.int64)
+    np.add.at(score_sum, encoded.topic_index, encoded.score)
+
+    # Same float operations in the same order as topic_score, and round() also ties to even
+    avg_rank = total_rank / count
+    calculated = np.round(count * SCORE_COUNT_WEIGHT + (1 / avg_rank) * SCORE_RANK_WEIGHT)
+    scored = score_count > 0
+    mean_score = np.trunc(score_sum / np.maximum(score_count, 1))
+    final = np.where(scored, mean_score, calculated).astype(np.int64)
+
+    for position in np.flatnonzero(scored & (np.abs(score_sum) >= EXACT_FLOAT_INT)):
+        final[position] = int(int(score_sum[position]) / int(score_count[position]))
+    return final
+
+
+def rank_snapshots(items_list: Sequence[List[Trend]], limit: int) -> List[Trend]:
+    """The `limit` best topics, by score then first seen, as rank_topic_stats orders them"""
+    encoded = encode_snapshots(items_list)
+    if not encoded.topics:
+        return []
+    final = score_topics(encoded)
+    order = np.argsort(-final, kind="stable")[:limit]
+    return [
+        Trend(
+            id=encoded.topics[position].id,
+            title=encoded.topics[position].title,
+            url=encoded.topics[position].url,
+            description=encoded.topics[position].description,
+            score=int(final[position]),
+        )
+        for position in order.tolist()
+    ]
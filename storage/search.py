@@ -0,0 +1,389 @@
+"""
+Full-text search over stored trends and generated summaries
+
+Titles, descriptions and summaries are cut into tokens, character bigrams for Chinese and
+whole words for Latin script and digits, and kept in an SQLite FTS5 inverted index at
+state/search.db, ranked with BM25. A query term matches as a phrase of its bigrams, so
+央行降准 finds the titles containing that string, not ones merely sharing characters with it.
+
+One entry per topic, source and day: entries are added as snapshots are stored and
+summaries written, and updated when a title or description changes during the day.
+Document ids grow with the date, so a date range is a rowid range of the index, and a
+query ranks only its newest matches, which keeps frequent words as fast as rare ones.
+
+Rebuild from the stored snapshots, flash streams and summaries: python -m storage.search --rebuild
+"""
+
+import argparse
+import json
+import logging
+import re
+import sqlite3
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fetcher.models import Trend
+from storage.aggregator import SOURCES_CONFIG
+
+logger = logging.getLogger(__name__)
+
+DATABASE_FILENAME = "search.db"
+
+TREND = "trend"
+SUMMARY = "summary"
+
+MAX_PAGE_SIZE = 100
+
+# Matches ranked per query, the newest ones; a word in every tenth headline of a year
+# would otherwise have tens of thousands of matches scored for one page of results
+MAX_CANDIDATES = 2000
+
+# Title matches weigh twice body matches, the source column only filters
+TITLE_WEIGHT = 2.0
+BODY_WEIGHT = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    source TEXT NOT NULL,
+    date TEXT NOT NULL,
+    key TEXT NOT NULL,
+    title TEXT NOT NULL,
+    url TEXT NOT NULL,
+    body TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_documents_key ON documents(kind, source, date, key);
+
+-- Range of document ids per date, a date range is searched as a rowid range of the index
+CREATE TABLE IF NOT EXISTS days (
+    date TEXT PRIMARY KEY,
+    min_id INTEGER NOT NULL,
+    max_id INTEGER NOT NULL
+);
+
+-- Contentless: the text lives in documents, the index keeps only the postings
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(title, body, source, content = '', tokenize = 'unicode61 remove_diacritics 0');
+"""
+
+# Kana, CJK ideographs and Hangul, written without spaces between words
+CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+TOKEN_RUN_PATTERN = re.compile(f"[{CJK}]+|[^\\W_{CJK}]+")
+CJK_RUN_PATTERN = re.compile(f"[{CJK}]")
+
+
+def tokenize(text: str, query: bool = False) -> List[str]:
+    """
+    Bigrams of every CJK run and whole Latin words and numbers, lowercased
+    Indexed runs also end with their last character alone, so that every character
+    starts a token and a one-character query is a prefix search.
+    """
+    tokens = []
+    for run in TOKEN_RUN_PATTERN.findall(unicodedata.normalize("NFKC", text).lower()):
+        if not CJK_RUN_PATTERN.match(run):
+            tokens.append(run)
+            continue
+        tokens.extend(run[start : start + 2] for start in range(len(run) - 1))
+        if len(run) == 1 or not query:
+            tokens.append(run[-1])
+    return tokens
+
+
+def match_expression(query: str) -> str:
+    """
+    FTS5 query: every whitespace-separated term must match, as a phrase of its tokens
+    Raises ValueError if the query has nothing to search for.
+    """
+    phrases = []
+    for term in query.split():
+        tokens = tokenize(term, query=True)
+        if not tokens:
+            continue
+        phrase = '"' + " ".join(tokens) + '"'
+        # A lone character only exists as the start of a bigram, or alone at the end of a run
+        if len(tokens) == 1 and len(tokens[0]) == 1 and CJK_RUN_PATTERN.match(tokens[0]):
+            phrase += "*"
+        phrases.append(phrase)
+    if not phrases:
+        raise ValueError(f"Nothing to search for in '{query}'")
+    return " AND ".join(phrases)
+
+
+class SearchIndex:
+    """Inverted index of trends and summaries in an SQLite database in WAL mode, one connection per thread"""
+
+    _instances: Dict[Path, "SearchIndex"] = {}
+
+    def __init__(self, db_path: Path | None = None):
+        from config import cfg
+
+        self.db_path = db_path or cfg.state_dir / DATABASE_FILENAME
+        self._local = threading.local()
+
+    @classmethod
+    def default(cls) -> "SearchIndex":
+        """The index of the configured state directory, shared within the process so connections are reused"""
+        from config import cfg
+
+        db_path = cfg.state_dir / DATABASE_FILENAME
+        if db_path not in cls._instances:
+            cls._instances[db_path] = cls(db_path)
+        return cls._instances[db_path]
+
+    def __getstate__(self):
+        # Connections stay in the process that opened them
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def add_trends(self, source_id: str, date: str, items: List[Trend]) -> int:
+        """Index the items of a snapshot or stream, returns the number of entries added or updated"""
+        return self._upsert(TREND, source_id, date, ((item.id, item.title, item.url, item.description) for item in items))
+
+    def add_summary(self, date: str, news: List[Dict]) -> int:
+        """
+        Index the summarized news of a day, returns the number of entries added or updated
+        news: 摘要中的新闻，包含 title、url、summary，以及 source_id 或 source_name
+        """
+        source_ids = {config["name"]: source_id for source_id, config in SOURCES_CONFIG.items()}
+        added = 0
+        for item in news:
+            source_id = item.get("source_id") or source_ids.get(item.get("source_name", ""), item.get("source_name", ""))
+            added += self._upsert(SUMMARY, source_id, date, [(item["url"], item["title"], item["url"], item.get("summary") or None)])
+        return added
+
+    def search(
+        self,
+        query: str,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        source_ids: List[str] | None = None,
+        page: int = 1,
+        page_size: int = 20,
+    ) -> Dict:
+        """
+        Entries matching every term of the query, best BM25 score first, newest first among equals
+        Only the newest MAX_CANDIDATES matches are ranked; "capped" tells when there were more.
+        date_from, date_to: 日期字符串，格式：YYYY-MM-DD，包含两端
+        Raises ValueError for a query without searchable text.
+        """
+        expression = match_expression(query)
+        source_phrases = [" ".join(tokenize(source_id)) for source_id in source_ids or []]
+        if source_phrases and all(source_phrases):
+            source_filter = " OR ".join(f'source : "{phrase}"' for phrase in source_phrases)
+            expression = f"({expression}) AND ({source_filter})"
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        page = max(1, page)
+
+        min_id, max_id = self.connection.execute(
+            "SELECT MIN(min_id), MAX(max_id) FROM days WHERE date >= ? AND date <= ?", (date_from or "", date_to or "9999")
+        ).fetchone()
+        if min_id is None:
+            return {"q": query, "total": 0, "capped": False, "page": page, "page_size": page_size, "results": []}
+
+        # The rowid range and the source column narrow the candidates, the join then filters exactly
+        conditions = ["d.date >= ?", "d.date <= ?"]
+        parameters: List = [expression, min_id, max_id, date_from or "", date_to or "9999"]
+        if source_ids:
+            conditions.append(f"d.source IN ({','.join('?' * len(source_ids))})")
+            parameters.extend(source_ids)
+        # Walking the index newest first stops after MAX_CANDIDATES matches, only those are scored
+        candidates = f"""
+            WITH candidates AS MATERIALIZED (
+                SELECT rowid, bm25(documents_fts, {TITLE_WEIGHT}, {BODY_WEIGHT}, 0.0) AS rank
+                FROM documents_fts
+                WHERE documents_fts MATCH ? AND rowid BETWEEN ? AND ?
+                ORDER BY rowid DESC
+                LIMIT {MAX_CANDIDATES}
+            )
+        """
+        where = " AND ".join(conditions)
+        rows = self.connection.execute(
+            f"""
+            {candidates}
+            SELECT d.kind, d.source, d.date, d.key, d.title, d.url, d.body, c.rank,
+                   COUNT(*) OVER () AS total, (SELECT COUNT(*) FROM candidates) AS candidate_count
+            FROM candidates c JOIN documents d ON d.id = c.rowid
+            WHERE {where}
+            ORDER BY c.rank, d.date DESC, d.id DESC
+            LIMIT ? OFFSET ?
+            """,
+            [*parameters, page_size, (page - 1) * page_size],
+        ).fetchall()
+        if rows:
+            total, candidate_count = rows[0][-2:]
+        else:
+            # Past the last page, the counts come without the rows
+            total, candidate_count = self.connection.execute(
+                f"{candidates} SELECT COUNT(*), (SELECT COUNT(*) FROM candidates) FROM candidates c JOIN documents d ON d.id = c.rowid WHERE {where}",
+                parameters,
+            ).fetchone()
+
+        return {
+            "q": query,
+            "total": total,
+            "capped": candidate_count >= MAX_CANDIDATES,
+            "page": page,
+            "page_size": page_size,
+            "results": [_result(*row[:-2]) for row in rows],
+        }
+
+    def clear(self):
+        with self.connection as connection:
+            connection.execute("DELETE FROM documents")
+            connection.execute("DELETE FROM days")
+            connection.execute("INSERT INTO documents_fts (documents_fts) VALUES ('delete-all')")
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _upsert(self, kind: str, source_id: str, date: str, entries: Iterable[Tuple[str, str, str, Optional[str]]]) -> int:
+        """entries: (key, title, url, body)"""
+        with self.connection as connection:
+            # A board is mostly the topics already indexed for the day, compare before writing
+            existing = {
+                key: (document_id, title, url, body)
+                for document_id, key, title, url, body in connection.execute(
+                    "SELECT id, key, title, url, body FROM documents WHERE kind = ? AND source = ? AND date = ?",
+                    (kind, source_id, date),
+                )
+            }
+            changed = 0
+            added_ids = []
+            for key, title, url, body in entries:
+                current = existing.get(key)
+                if current is not None and current[1:] == (title, url, body):
+                    continue
+                if current is None:
+                    document_id = connection.execute(
+                        "INSERT INTO documents (kind, source, date, key, title, url, body) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (kind, source_id, date, key, title, url, body),
+                    ).lastrowid
+                    added_ids.append(document_id)
+                else:
+                    document_id = current[0]
+                    connection.execute("UPDATE documents SET title = ?, url = ?, body = ? WHERE id = ?", (title, url, body, document_id))
+                    # A contentless index removes postings given the text they were made from
+                    connection.execute(
+                        "INSERT INTO documents_fts (documents_fts, rowid, title, body, source) VALUES ('delete', ?, ?, ?, ?)",
+                        (document_id, *_indexed_text(current[1], current[3], source_id)),
+                    )
+                connection.execute(
+                    "INSERT INTO documents_fts (rowid, title, body, source) VALUES (?, ?, ?, ?)",
+                    (document_id, *_indexed_text(title, body, source_id)),
+                )
+                existing[key] = (document_id, title, url, body)
+                changed += 1
+
+            if added_ids:
+                connection.execute(
+                    """
+                    INSERT INTO days (date, min_id, max_id) VALUES (?, ?, ?)
+                    ON CONFLICT (date) DO UPDATE SET min_id = MIN(min_id, excluded.min_id), max_id = MAX(max_id, excluded.max_id)
+                    """,
+                    (date, min(added_ids), max(added_ids)),
+                )
+        return changed
+
+
+def _indexed_text(title: str, body: Optional[str], source_id: str) -> Tuple[str, str, str]:
+    return " ".join(tokenize(title)), " ".join(tokenize(body or "")), " ".join(tokenize(source_id))
+
+
+def _result(kind: str, source_id: str, date: str, key: str, title: str, url: str, body: Optional[str], rank: float) -> Dict:
+    result = {
+        "kind": kind,
+        "source_id": source_id,
+        "source_name": SOURCES_CONFIG.get(source_id, {}).get("name", source_id),
+        "date": date,
+        "title": title,
+        "url": url,
+        # bm25() is lower for better matches
+        "score": round(-rank, 3),
+    }
+    if kind == TREND:
+        result["id"] = key
+        if body:
+            result["description"] = body
+    elif body:
+        result["summary"] = body
+    return result
+
+
+def rebuild() -> int:
+    """Index every stored snapshot, flash stream and summary again, returns the number of entries"""
+    from config import cfg
+    from storage.base import create_storage
+    from storage.stream import FlashStream
+
+    index = SearchIndex.default()
+    index.clear()
+    storage = create_storage()
+    stream = FlashStream(storage.base_path)
+
+    ranked: Dict[str, List[str]] = {}
+    for source_id in storage.source_ids():
+        for date in storage.dates(source_id):
+            ranked.setdefault(date, []).append(source_id)
+    # Every day with stored data has a daily aggregate, streams are looked up for those days too
+    dates = set(ranked) | {path.stem for path in cfg.data_dir.glob("????-??-??.json")}
+
+    # Day by day, so document ids grow with the date as they do when indexed live
+    indexed = 0
+    for date in sorted(dates):
+        for source_id in ranked.get(date, []):
+            # Later snapshots win, as they would have when indexed live
+            latest: Dict[str, Trend] = {}
+            for _, items in storage.snapshots(source_id, date):
+                latest.update((item.id, item) for item in items)
+            indexed += index.add_trends(source_id, date, list(latest.values()))
+        for source_id in stream.sources(date):
+            indexed += index.add_trends(source_id, date, stream.read(source_id, date))
+
+        summary_file = cfg.summaries_dir / f"{date}.json"
+        if summary_file.exists():
+            with open(summary_file, "r", encoding="utf-8") as f:
+                indexed += index.add_summary(date, json.load(f).get("news", []))
+    return indexed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text search index")
+    parser.add_argument("--rebuild", action="store_true", help="index every stored snapshot, stream and summary again")
+    parser.add_argument("query", nargs="?", help="search the index")
+    args = parser.parse_args()
+
+    from logger.logging import setup_logger
+
+    setup_logger()
+    if args.rebuild:
+        indexed = rebuild()
+        logger.info(f"✅ Indexed {indexed} entries")
+    if args.query:
+        for result in SearchIndex.default().search(args.query)["results"]:
+            print(f"{result['date']}  {result['source_name']}  {result['title']}  {result['url']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Append-only segment store: one JSON Lines file per source per day
+
+Layout under the base path:
+    segments/2025-11-22/baidu.jsonl   one compact record per snapshot
+    segments/2025-11-22/baidu.idx     one "offset same_as hash" line per record
+
+A record is either {"ts", "items"} or, when the board repeats an earlier snapshot
+of the same day, {"ts", "same_as"} holding the byte offset of that full record.
+A day is read back with one sequential read of its segment; the index keeps the
+latest hash at hand for the unchanged check without touching the segment.
+
+Import an existing temp/ directory: python -m storage.migrate --to segments
+"""
+
+import json
+import logging
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fetcher.models import Trend, TrendInterner
+from storage.base import Snapshot, TrendStorage
+from storage.cache import content_hash, omit_empty
+
+logger = logging.getLogger(__name__)
+
+SEGMENTS_DIRNAME = "segments"
+SEGMENT_SUFFIX = ".jsonl"
+INDEX_SUFFIX = ".idx"
+
+RECORD_PREFIX = b'{"ts":"'
+TIMESTAMP_LENGTH = len("2025-11-22 17:50:00")
+
+
+def record_timestamp(line: bytes) -> str:
+    """Timestamp of a record without parsing the whole line, records always start with it"""
+    if line.startswith(RECORD_PREFIX):
+        return line[len(RECORD_PREFIX) : len(RECORD_PREFIX) + TIMESTAMP_LENGTH].decode("ascii", "replace")
+    try:
+        return json.loads(line).get("ts", "")
+    except ValueError:
+        return ""
+
+
+def append_line(path: Path, line: bytes) -> int:
+    """Append a newline-terminated record, returns the offset it was written at"""
+    with open(path, "a+b") as f:
+        offset = f.seek(0, 2)
+        if offset:
+            # Terminate a line left truncated by a crash so it does not swallow this record
+            f.seek(offset - 1)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+                offset += 1
+        f.write(line)
+    return offset
+
+
+class SegmentStorage(TrendStorage):
+    """Snapshots appended as compact records to a per-day segment of each source"""
+
+    def __init__(self, base_path: Path | None = None):
+        super().__init__(base_path)
+        self.segments_path = self.base_path / SEGMENTS_DIRNAME
+        self.interner = TrendInterner()
+
+    def save_unchanged(self, source_id: str) -> bool:
+        now = datetime.now()
+        latest = self._read_latest(source_id, now.strftime("%Y-%m-%d"))
+        if latest is None:
+            # Each day is self-contained, the first snapshot of a day is always written in full
+            return False
+
+        self._append_record(source_id, now, {"same_as": latest[0]}, latest)
+        return True
+
+    def append(self, source_id: str, now: datetime, items: List[Trend]) -> bool:
+        digest = content_hash(items)
+        latest = self._read_latest(source_id, now.strftime("%Y-%m-%d"))
+
+        if latest and latest[1] == digest:
+            self._append_record(source_id, now, {"same_as": latest[0]}, latest)
+            return False
+
+        self._append_record(source_id, now, {"items": [omit_empty(asdict(item)) for item in items]}, (None, digest))
+        return True
+
+    def snapshots(self, source_id: str, date: str, after: str | None = None) -> List[Snapshot]:
+        segment_file = self._segment_path(source_id, date)
+        if not segment_file.exists():
+            return []
+        self.interner.scope(date)
+
+        full_records: Dict[int, List[Trend]] = {}
+        # Records up to `after` are kept unparsed in case a later record repeats one of them
+        skipped: Dict[int, bytes] = {}
+        result = []
+        offset = 0
+
+        with open(segment_file, "rb") as f:
+            for line in f:
+                record_offset = offset
+                offset += len(line)
+                if after and record_timestamp(line) <= after:
+                    skipped[record_offset] = line
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A crash mid-append can leave a truncated last line
+                    logger.warning(f"Skipping malformed record at {record_offset} in {segment_file}")
+                    continue
+
+                if "same_as" in record:
+                    same_as = record["same_as"]
+                    if same_as not in full_records and same_as in skipped:
+                        full_records[same_as] = self._parse_items(json.loads(skipped[same_as]))
+                    items = full_records.get(same_as)
+                    if items is None:
+                        logger.warning(f"Record at {record_offset} in {segment_file} references missing offset {same_as}")
+                        continue
+                else:
+                    items = self._parse_items(record)
+                    full_records[record_offset] = items
+                result.append((record.get("ts", ""), items))
+
+        return result
+
+    def sources(self, date: str) -> List[str]:
+        day_dir = self.segments_path / date
+        if not day_dir.exists():
+            return []
+        return sorted(segment_file.stem for segment_file in day_dir.glob(f"*{SEGMENT_SUFFIX}"))
+
+    def source_ids(self) -> List[str]:
+        return sorted({segment_file.stem for segment_file in self.segments_path.glob(f"*/*{SEGMENT_SUFFIX}")})
+
+    def dates(self, source_id: str) -> List[str]:
+        if not self.segments_path.exists():
+            return []
+        return sorted(day_dir.name for day_dir in self.segments_path.iterdir() if (day_dir / f"{source_id}{SEGMENT_SUFFIX}").exists())
+
+    def _parse_items(self, record: Dict) -> List[Trend]:
+        return [self.interner.trend(item) for item in record.get("items", [])]
+
+    def _segment_path(self, source_id: str, date: str) -> Path:
+        return self.segments_path / date / f"{source_id}{SEGMENT_SUFFIX}"
+
+    def _append_record(self, source_id: str, now: datetime, body: Dict, latest: Tuple[Optional[int], str]):
+        segment_file = self._segment_path(source_id, now.strftime("%Y-%m-%d"))
+        segment_file.parent.mkdir(parents=True, exist_ok=True)
+        record = {"ts": now.strftime("%Y-%m-%d %H:%M:%S"), **body}
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+        offset = append_line(segment_file, line)
+
+        # The segment is written first, a crash in between leaves a record the index does not know
+        # about, which only costs an unchanged check against an older snapshot
+        same_as = latest[0] if latest[0] is not None else offset
+        with open(segment_file.with_suffix(INDEX_SUFFIX), "a", encoding="utf-8") as f:
+            f.write(f"{offset} {same_as} {latest[1]}\n")
+
+    def _read_latest(self, source_id: str, date: str) -> Optional[Tuple[int, str]]:
+        """(offset of the latest full record, its content hash) for the day"""
+        index_file = self._segment_path(source_id, date).with_suffix(INDEX_SUFFIX)
+        if not index_file.exists():
+            return None
+        with open(index_file, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        for line in reversed(lines):
+            parts = line.split()
+            if len(parts) == 3:
+                return int(parts[1]), parts[2]
+        return None
@@ -0,0 +1,208 @@
+"""
+SQLite snapshot store
+
+Snapshots and their ranked items are normalized into two tables, so day loads, source
+and date listings and per-topic history are index lookups rather than directory scans.
+A repeated board is a snapshot row pointing at the full snapshot it repeats.
+
+Import an existing temp/ directory: python -m storage.migrate --to sqlite
+"""
+
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fetcher.models import Trend, TrendInterner
+from storage.base import TIMESTAMP_FORMAT, Snapshot, TrendStorage
+from storage.cache import content_hash
+
+logger = logging.getLogger(__name__)
+
+DATABASE_FILENAME = "trends.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    date TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    same_as INTEGER REFERENCES snapshots(id)
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_source_ts ON snapshots(source, ts);
+CREATE INDEX IF NOT EXISTS idx_snapshots_date ON snapshots(date, source);
+
+CREATE TABLE IF NOT EXISTS items (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id),
+    rank INTEGER NOT NULL,
+    topic_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    url TEXT NOT NULL,
+    description TEXT,
+    score INTEGER,
+    PRIMARY KEY (snapshot_id, rank)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_items_topic ON items(topic_id);
+"""
+
+
+class SqliteStorage(TrendStorage):
+    """Snapshots in an embedded SQLite database in WAL mode, one connection per thread"""
+
+    def __init__(self, base_path: Path | None = None):
+        super().__init__(base_path)
+        self.db_path = self.base_path / DATABASE_FILENAME
+        self.interner = TrendInterner()
+        self._local = threading.local()
+
+    def __getstate__(self):
+        # Connections stay in the process that opened them
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def append(self, source_id: str, now: datetime, items: List[Trend]) -> bool:
+        with self.connection as connection:
+            return self._insert(connection, source_id, now.strftime(TIMESTAMP_FORMAT), items)
+
+    def save_unchanged(self, source_id: str) -> bool:
+        with self.connection as connection:
+            timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
+            latest = self._latest(connection, source_id, timestamp[:10])
+            if latest is None:
+                return False
+            self._insert_row(connection, source_id, timestamp, latest[1], latest[0])
+        return True
+
+    def import_day(self, source_id: str, snapshots: List[Snapshot]):
+        """Bulk insert a day in one transaction"""
+        with self.connection as connection:
+            for timestamp, items in snapshots:
+                self._insert(connection, source_id, timestamp, items)
+
+    def snapshots(self, source_id: str, date: str, after: str | None = None) -> List[Snapshot]:
+        rows = self.connection.execute(
+            "SELECT ts, COALESCE(same_as, id) FROM snapshots WHERE date = ? AND source = ? AND ts > ? ORDER BY ts, id",
+            (date, source_id, after or ""),
+        ).fetchall()
+        self.interner.scope(date)
+        full_items = self._load_items(sorted({full_id for _, full_id in rows}))
+        return [(timestamp, full_items.get(full_id, [])) for timestamp, full_id in rows]
+
+    def sources(self, date: str) -> List[str]:
+        rows = self.connection.execute("SELECT DISTINCT source FROM snapshots WHERE date = ? ORDER BY source", (date,))
+        return [source_id for (source_id,) in rows]
+
+    def source_ids(self) -> List[str]:
+        rows = self.connection.execute("SELECT DISTINCT source FROM snapshots ORDER BY source")
+        return [source_id for (source_id,) in rows]
+
+    def dates(self, source_id: str) -> List[str]:
+        rows = self.connection.execute("SELECT DISTINCT date FROM snapshots WHERE source = ? ORDER BY date", (source_id,))
+        return [date for (date,) in rows]
+
+    def all_dates(self) -> List[str]:
+        """Dates with snapshots of any source, newest first"""
+        rows = self.connection.execute("SELECT DISTINCT date FROM snapshots ORDER BY date DESC")
+        return [date for (date,) in rows]
+
+    def history(self, source_id: str, topic_id: str, since: Optional[str] = None) -> List[Tuple[str, int, Optional[int]]]:
+        """(timestamp, rank, score) of every snapshot the topic appeared in, oldest first"""
+        rows = self.connection.execute(
+            """
+            SELECT s.ts, i.rank, i.score
+            FROM items i
+            JOIN snapshots s ON COALESCE(s.same_as, s.id) = i.snapshot_id
+            WHERE i.topic_id = ? AND s.source = ? AND s.ts >= ?
+            ORDER BY s.ts, s.id
+            """,
+            (topic_id, source_id, since or ""),
+        )
+        return rows.fetchall()
+
+    def expire(self, before: str, dry_run: bool = False) -> int:
+        """Delete every snapshot dated before `before` (YYYY-MM-DD), returns the number of days removed"""
+        (days,) = self.connection.execute("SELECT COUNT(DISTINCT date) FROM snapshots WHERE date < ?", (before,)).fetchone()
+        if not days or dry_run:
+            return days
+        with self.connection as connection:
+            connection.execute("DELETE FROM items WHERE snapshot_id IN (SELECT id FROM snapshots WHERE date < ?)", (before,))
+            connection.execute("DELETE FROM snapshots WHERE date < ?", (before,))
+        self.connection.execute("VACUUM")
+        return days
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _insert(self, connection: sqlite3.Connection, source_id: str, timestamp: str, items: List[Trend]) -> bool:
+        digest = content_hash(items)
+        latest = self._latest(connection, source_id, timestamp[:10])
+        if latest and latest[1] == digest:
+            self._insert_row(connection, source_id, timestamp, digest, latest[0])
+            return False
+
+        snapshot_id = self._insert_row(connection, source_id, timestamp, digest, None)
+        connection.executemany(
+            "INSERT INTO items (snapshot_id, rank, topic_id, title, url, description, score) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (snapshot_id, rank, item.id, item.title, item.url, item.description, item.score)
+                for rank, item in enumerate(items, 1)
+            ],
+        )
+        return True
+
+    @staticmethod
+    def _insert_row(connection: sqlite3.Connection, source_id: str, timestamp: str, digest: str, same_as: Optional[int]) -> int:
+        cursor = connection.execute(
+            "INSERT INTO snapshots (source, ts, date, hash, same_as) VALUES (?, ?, ?, ?, ?)",
+            (source_id, timestamp, timestamp[:10], digest, same_as),
+        )
+        return cursor.lastrowid
+
+    @staticmethod
+    def _latest(connection: sqlite3.Connection, source_id: str, date: str) -> Optional[Tuple[int, str]]:
+        """(id of the latest full snapshot of the day, its content hash)"""
+        # Repeats never point into an earlier day, so expiring old days cannot orphan them
+        row = connection.execute(
+            "SELECT COALESCE(same_as, id), hash FROM snapshots WHERE source = ? AND ts >= ? AND date = ? ORDER BY ts DESC, id DESC LIMIT 1",
+            (source_id, date, date),
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _load_items(self, snapshot_ids: List[int]) -> Dict[int, List[Trend]]:
+        items: Dict[int, List[Trend]] = {snapshot_id: [] for snapshot_id in snapshot_ids}
+        # Stay below SQLite's bound parameter limit
+        for start in range(0, len(snapshot_ids), 500):
+            chunk = snapshot_ids[start : start + 500]
+            rows = self.connection.execute(
+                f"SELECT snapshot_id, topic_id, title, url, description, score FROM items "
+                f"WHERE snapshot_id IN ({','.join('?' * len(chunk))}) ORDER BY snapshot_id, rank",
+                chunk,
+            )
+            for snapshot_id, topic_id, title, url, description, score in rows:
+                items[snapshot_id].append(
+                    self.interner.trend({"id": topic_id, "title": title, "url": url, "description": description, "score": score})
+                )
+        return items
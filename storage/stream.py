@@ -0,0 +1,113 @@
+"""Append-only per-day streams for flash-news sources with monotonically increasing ids"""
+
+import json
+import logging
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+from fetcher.models import Trend
+from storage.archive import DayFiles, read_day_file
+from storage.cache import omit_empty
+
+logger = logging.getLogger(__name__)
+
+STATE_FILENAME = "_stream.json"
+
+
+def stream_filename(date: str) -> str:
+    """date: 日期字符串，格式：YYYY-MM-DD"""
+    return f"stream_{date.replace('-', '')}.jsonl"
+
+
+class FlashStream:
+    """Keeps only items above the per-source high-water mark, one JSON line per item"""
+
+    def __init__(self, base_path: Path | None = None):
+        from config import cfg
+
+        self.base_path = base_path or cfg.temp_dir
+
+    def append(self, source_id: str, items: List[Trend]) -> List[Trend]:
+        """Append items newer than the high-water mark, returns the newly stored items"""
+        high_water_mark = self.high_water_mark(source_id)
+        numbered = []
+        for item in items:
+            try:
+                item_id = int(item.id)
+            except (TypeError, ValueError):
+                # Ids are compared with the high-water mark, an item without a numeric one cannot be placed
+                logger.warning(f"{source_id}: skipping flash item with non-numeric id {item.id!r}: {item.title}")
+                continue
+            if item_id > high_water_mark:
+                numbered.append((item_id, item))
+        if not numbered:
+            return []
+        numbered.sort(key=lambda pair: pair[0])
+        new_items = [item for _, item in numbered]
+
+        now = datetime.now()
+        timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
+        stream_file = self.base_path / source_id / stream_filename(now.strftime("%Y-%m-%d"))
+        stream_file.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(stream_file, "a", encoding="utf-8") as f:
+            for item in new_items:
+                record = {"timestamp": timestamp, **omit_empty(asdict(item))}
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+        self._write_high_water_mark(source_id, numbered[-1][0])
+        return new_items
+
+    def read(self, source_id: str, date: str) -> List[Trend]:
+        """
+        读取指定日期的流，最新的条目在前
+        date: 日期字符串，格式：YYYY-MM-DD
+        """
+        source_dir = self.base_path / source_id
+        content = read_day_file(source_dir, date.replace("-", ""), stream_filename(date))
+        if content is None:
+            return []
+
+        items = []
+        for line in content.decode("utf-8").splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A crash mid-append can leave a truncated last line
+                logger.warning(f"Skipping malformed line in {source_dir / stream_filename(date)}")
+                continue
+            record.pop("timestamp", None)
+            items.append(Trend(**record))
+
+        items.reverse()
+        return items
+
+    def sources(self, date: str) -> List[str]:
+        """Sources with a stream for the date"""
+        if not self.base_path.exists():
+            return []
+        return sorted(
+            source_dir.name
+            for source_dir in self.base_path.iterdir()
+            if source_dir.is_dir() and self.exists(source_dir.name, date)
+        )
+
+    def exists(self, source_id: str, date: str) -> bool:
+        with DayFiles(self.base_path / source_id, date.replace("-", "")) as day_files:
+            return day_files.exists(stream_filename(date))
+
+    def high_water_mark(self, source_id: str) -> int:
+        state_file = self.base_path / source_id / STATE_FILENAME
+        if not state_file.exists():
+            return 0
+        try:
+            with open(state_file, "r", encoding="utf-8") as f:
+                return int(json.load(f)["high_water_mark"])
+        except (OSError, ValueError, KeyError):
+            return 0
+
+    def _write_high_water_mark(self, source_id: str, high_water_mark: int):
+        with open(self.base_path / source_id / STATE_FILENAME, "w", encoding="utf-8") as f:
+            json.dump({"high_water_mark": high_water_mark}, f)
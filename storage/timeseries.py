@@ -0,0 +1,310 @@
+"""
+Rank and score of every topic over time, per source
+
+Layout under state/timeseries/<source>/:
+    2025-11-22.topics   topic ids of the day, one JSON string per line, line number = topic number
+    2025-11-22.log      open day: fixed-size (second of day, topic number, rank, score) records,
+                        appended as each snapshot is stored
+    2025-11-22.bin      closed day: the same records grouped by topic behind an offset table,
+                        so one topic is read with two seeks
+
+A topic's history over months reads only its own records of the days it appeared on.
+
+Rebuild from the stored snapshots: python -m storage.timeseries --rebuild
+"""
+
+import argparse
+import json
+import logging
+import os
+import struct
+from array import array
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fetcher.models import Trend
+
+logger = logging.getLogger(__name__)
+
+TIMESERIES_DIRNAME = "timeseries"
+TOPICS_SUFFIX = ".topics"
+LOG_SUFFIX = ".log"
+CLOSED_SUFFIX = ".bin"
+
+# second of day, topic number, rank, score
+LOG_RECORD = struct.Struct("<IIHq")
+# second of day, rank, score; the topic is implied by the offset table
+CLOSED_RECORD = struct.Struct("<IHq")
+CLOSED_HEADER = struct.Struct("<4sI")
+CLOSED_MAGIC = b"TSv1"
+
+NO_SCORE = -(2**63)
+
+# Topic dictionaries of closed days kept in memory, a year of one source
+TOPICS_CACHE_SIZE = 400
+
+# Samples are stamped with wall-clock time like the snapshots; counting from a naive epoch
+# instead of through local epoch seconds keeps the samples after a DST switch on their hour
+EPOCH = datetime(1970, 1, 1)
+
+
+class TopicHistory:
+    """Samples of one topic in time order, in flat arrays"""
+
+    def __init__(self):
+        self.timestamps = array("q")
+        """Wall-clock seconds since EPOCH, local time without DST shifts"""
+
+        self.ranks = array("H")
+        self.scores = array("q")
+        """NO_SCORE where the source has none"""
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def first_seen(self) -> str:
+        return _format_timestamp(self.timestamps[0])
+
+    def last_seen(self) -> str:
+        return _format_timestamp(self.timestamps[-1])
+
+    def extend(self, day_start: int, records: List[Tuple[int, int, int]]):
+        for second, rank, score in records:
+            self.timestamps.append(day_start + second)
+            self.ranks.append(rank)
+            self.scores.append(score)
+
+    def downsample(self, max_points: int) -> List[Dict]:
+        """
+        At most max_points points over equal time buckets
+        Each point is the first sample of its bucket with the best rank and highest score in it.
+        """
+        if not self.timestamps:
+            return []
+        first, last = self.timestamps[0], self.timestamps[-1]
+        span = max(1, last - first + 1)
+
+        points: List[Dict] = []
+        bucket = -1
+        for timestamp, rank, score in zip(self.timestamps, self.ranks, self.scores):
+            index = (timestamp - first) * max_points // span if len(self) > max_points else len(points)
+            if index != bucket:
+                bucket = index
+                points.append({"ts": _format_timestamp(timestamp), "rank": rank, "score": None, "samples": 0})
+            point = points[-1]
+            point["rank"] = min(point["rank"], rank)
+            if score != NO_SCORE and (point["score"] is None or score > point["score"]):
+                point["score"] = score
+            point["samples"] += 1
+        return points
+
+
+class TopicTimeSeries:
+    """Append-only per-day topic samples of every ranked source"""
+
+    def __init__(self, base_path: Path | None = None):
+        from config import cfg
+
+        self.base_path = base_path or cfg.state_dir / TIMESERIES_DIRNAME
+
+    def record(self, source_id: str, now: datetime, items: List[Trend]):
+        """Append the rank and score of every item of a stored snapshot"""
+        source_dir = self.base_path / source_id
+        source_dir.mkdir(parents=True, exist_ok=True)
+        date = now.strftime("%Y-%m-%d")
+        second = now.hour * 3600 + now.minute * 60 + now.second
+
+        topics = _read_topics(source_dir / f"{date}{TOPICS_SUFFIX}")
+        new_ids = []
+        records = bytearray()
+        for rank, item in enumerate(items, 1):
+            number = topics.get(item.id)
+            if number is None:
+                number = len(topics)
+                topics[item.id] = number
+                new_ids.append(item.id)
+            records += LOG_RECORD.pack(second, number, min(rank, 0xFFFF), NO_SCORE if item.score is None else item.score)
+
+        # Topic ids first, a record never references a topic number the dictionary lacks
+        if new_ids:
+            with open(source_dir / f"{date}{TOPICS_SUFFIX}", "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(topic_id, ensure_ascii=False) + "\n" for topic_id in new_ids))
+        with open(source_dir / f"{date}{LOG_SUFFIX}", "ab") as f:
+            f.write(records)
+
+    def repeat(self, source_id: str, now: datetime) -> bool:
+        """Record the latest snapshot of the day again at `now`, returns False if the day has none"""
+        log_file = self.base_path / source_id / f"{now.strftime('%Y-%m-%d')}{LOG_SUFFIX}"
+        if not log_file.exists():
+            return False
+        data = log_file.read_bytes()
+        data = data[: len(data) - len(data) % LOG_RECORD.size]
+        if not data:
+            return False
+
+        last_second = LOG_RECORD.unpack_from(data, len(data) - LOG_RECORD.size)[0]
+        second = now.hour * 3600 + now.minute * 60 + now.second
+        records = bytearray()
+        for offset in range(len(data) - LOG_RECORD.size, -1, -LOG_RECORD.size):
+            record = LOG_RECORD.unpack_from(data, offset)
+            if record[0] != last_second:
+                break
+            records[:0] = LOG_RECORD.pack(second, *record[1:])
+        with open(log_file, "ab") as f:
+            f.write(records)
+        return True
+
+    def history(self, source_id: str, topic_id: str, date_from: str | None = None, date_to: str | None = None) -> TopicHistory:
+        """
+        Samples of a topic between two dates, both included
+        date_from, date_to: 日期字符串，格式：YYYY-MM-DD
+        """
+        result = TopicHistory()
+        source_dir = self.base_path / source_id
+        if not source_dir.exists():
+            return result
+
+        # One directory listing, no per-day stat calls: a month of misses costs next to nothing
+        names = set(os.listdir(source_dir))
+        for date in sorted(name[: -len(TOPICS_SUFFIX)] for name in names if name.endswith(TOPICS_SUFFIX)):
+            if (date_from and date < date_from) or (date_to and date > date_to):
+                continue
+            records = self._read_day(source_dir, date, topic_id, f"{date}{CLOSED_SUFFIX}" in names)
+            if records:
+                result.extend(_day_start(date), records)
+        return result
+
+    def dates(self, source_id: str) -> List[str]:
+        source_dir = self.base_path / source_id
+        if not source_dir.exists():
+            return []
+        return sorted(topics_file.stem for topics_file in source_dir.glob(f"*{TOPICS_SUFFIX}"))
+
+    def close_days(self, before: str) -> int:
+        """Regroup the logs of days before `before` by topic, returns the number of days closed"""
+        closed = 0
+        if not self.base_path.exists():
+            return closed
+        for log_file in sorted(self.base_path.glob(f"*/*{LOG_SUFFIX}")):
+            if log_file.stem < before:
+                self._close_day(log_file)
+                closed += 1
+        return closed
+
+    def _read_day(self, source_dir: Path, date: str, topic_id: str, closed: bool) -> List[Tuple[int, int, int]]:
+        """(second of day, rank, score) of the topic on one day"""
+        topics_file = source_dir / f"{date}{TOPICS_SUFFIX}"
+
+        if closed:
+            number = _read_closed_topics(str(topics_file)).get(topic_id)
+            if number is None:
+                return []
+            with open(source_dir / f"{date}{CLOSED_SUFFIX}", "rb") as f:
+                _, topic_count = CLOSED_HEADER.unpack(f.read(CLOSED_HEADER.size))
+                f.seek(CLOSED_HEADER.size + 4 * number)
+                start, end = struct.unpack("<II", f.read(8))
+                f.seek(CLOSED_HEADER.size + 4 * (topic_count + 1) + CLOSED_RECORD.size * start)
+                data = f.read(CLOSED_RECORD.size * (end - start))
+            return list(CLOSED_RECORD.iter_unpack(data))
+
+        number = _read_topics(topics_file).get(topic_id)
+        log_file = source_dir / f"{date}{LOG_SUFFIX}"
+        if number is None or not log_file.exists():
+            return []
+        data = log_file.read_bytes()
+        # A crash mid-append can leave a partial record at the end
+        data = data[: len(data) - len(data) % LOG_RECORD.size]
+        return [(second, rank, score) for second, record_number, rank, score in LOG_RECORD.iter_unpack(data) if record_number == number]
+
+    def _close_day(self, log_file: Path):
+        topics = _read_topics(log_file.with_suffix(TOPICS_SUFFIX))
+        data = log_file.read_bytes()
+        data = data[: len(data) - len(data) % LOG_RECORD.size]
+
+        by_topic: List[List[bytes]] = [[] for _ in range(len(topics))]
+        for second, number, rank, score in LOG_RECORD.iter_unpack(data):
+            if number < len(by_topic):
+                by_topic[number].append(CLOSED_RECORD.pack(second, rank, score))
+
+        offsets = [0]
+        for records in by_topic:
+            offsets.append(offsets[-1] + len(records))
+
+        closed_file = log_file.with_suffix(CLOSED_SUFFIX)
+        tmp_file = closed_file.with_name(closed_file.name + ".tmp")
+        with open(tmp_file, "wb") as f:
+            f.write(CLOSED_HEADER.pack(CLOSED_MAGIC, len(by_topic)))
+            f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+            for records in by_topic:
+                f.write(b"".join(records))
+        os.replace(tmp_file, closed_file)
+        log_file.unlink()
+        logger.debug(f"Closed {log_file}: {len(topics)} topics, {offsets[-1]} samples")
+
+
+def _read_topics(topics_file: Path) -> Dict[str, int]:
+    """topic id -> topic number"""
+    if not topics_file.exists():
+        return {}
+    with open(topics_file, "r", encoding="utf-8") as f:
+        return {json.loads(line): number for number, line in enumerate(f) if line.strip()}
+
+
+@lru_cache(maxsize=TOPICS_CACHE_SIZE)
+def _read_closed_topics(topics_file: str) -> Dict[str, int]:
+    # A closed day no longer changes; a rebuild numbers the same snapshots' topics the same way
+    return _read_topics(Path(topics_file))
+
+
+def _day_start(date: str) -> int:
+    """date: 日期字符串，格式：YYYY-MM-DD"""
+    return (datetime.fromisoformat(date) - EPOCH) // timedelta(seconds=1)
+
+
+def _format_timestamp(timestamp: int) -> str:
+    return (EPOCH + timedelta(seconds=timestamp)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def rebuild(source_ids: List[str] | None = None) -> int:
+    """Replace the time series with one recorded from every stored snapshot, returns the number of snapshots"""
+    from storage.base import TIMESTAMP_FORMAT, create_storage
+
+    storage = create_storage()
+    timeseries = TopicTimeSeries()
+    recorded = 0
+    for source_id in storage.source_ids():
+        if source_ids and source_id not in source_ids:
+            continue
+        for date in storage.dates(source_id):
+            source_dir = timeseries.base_path / source_id
+            for suffix in (TOPICS_SUFFIX, LOG_SUFFIX, CLOSED_SUFFIX):
+                (source_dir / f"{date}{suffix}").unlink(missing_ok=True)
+            for timestamp, items in storage.snapshots(source_id, date):
+                timeseries.record(source_id, datetime.strptime(timestamp, TIMESTAMP_FORMAT), items)
+                recorded += 1
+    timeseries.close_days(datetime.now().strftime("%Y-%m-%d"))
+    _read_closed_topics.cache_clear()
+    return recorded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Topic time series")
+    parser.add_argument("--rebuild", action="store_true", help="record every stored snapshot again")
+    parser.add_argument("--source-id", action="append", help="only this source, repeatable")
+    args = parser.parse_args()
+
+    from logger.logging import setup_logger
+
+    setup_logger()
+    if args.rebuild:
+        recorded = rebuild(args.source_id)
+        logger.info(f"✅ Recorded {recorded} snapshots")
+    else:
+        closed = TopicTimeSeries().close_days(datetime.now().strftime("%Y-%m-%d"))
+        logger.info(f"✅ Closed {closed} days")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ from datetime import datetime
 from typing import Dict
 
 from config import cfg
+from storage.fingerprints import StoryFingerprints
+from storage.search import SearchIndex
 from summary.client import generate_summaries
 from summary.reader import fetch_contents_batch
 from summary.selector import select_top_news
@@ -72,6 +74,7 @@ async def generate_daily_summary(date: str, top_n: int = 10) -> Dict:
                 "rank": item["rank"],
                 "summary": item.get("summary", ""),
                 "content_file": item.get("content_file"),
+                **({"follow_up": item["follow_up"]} if item.get("follow_up") else {}),
             }
             for item in news_with_summaries
         ],
@@ -99,6 +102,7 @@ async def generate_daily_summary(date: str, top_n: int = 10) -> Dict:
                 "source_name": item["source_name"],
                 "rank": item["rank"],
                 "summary": item.get("summary", ""),
+                **({"follow_up": item["follow_up"]} if item.get("follow_up") else {}),
             }
             for item in news_with_summaries
         ],
@@ -110,6 +114,17 @@ async def generate_daily_summary(date: str, top_n: int = 10) -> Dict:
         json.dump(final_data, f, ensure_ascii=False, indent=2)
     logger.info(f"Summary saved: {output_file}")
 
+    try:
+        SearchIndex.default().add_summary(date, news_with_summaries)
+    except Exception as e:
+        logger.error(f"Failed to index summaries: {e}")
+
+    # 记录已摘要的新闻，之后几天不再重复摘要；抓取或摘要失败的新闻不记录，之后仍可入选
+    try:
+        StoryFingerprints.default().record(date, [item for item in news_with_summaries if item.get("summary")])
+    except Exception as e:
+        logger.error(f"Failed to record summarized stories: {e}")
+
     # 生成音频
     try:
         text = format_text(final_data)
@@ -148,7 +163,8 @@ def format_text(data: Dict) -> str:
     for index, item in enumerate(data["news"], 1):
         source_name = item.get("source_name", "")
         title = item["title"]
-        lines.append(f"{index}、【{source_name}新闻】{title}。\n\n")
+        label = "后续" if item.get("follow_up") else "新闻"
+        lines.append(f"{index}、【{source_name}{label}】{title}。\n\n")
         if item.get("summary"):
             lines.append(f" {item['summary']}\n\n")
 
@@ -6,11 +6,14 @@ from typing import List, Optional
 import httpx
 
 from config import cfg
+from fetcher.http_client import HttpClientManager
 
 logger = logging.getLogger(__name__)
 
 MAX_CONCURRENT = 5
 
+READER_TIMEOUT = 30.0
+
 
 async def fetch_content(url: str) -> Optional[str]:
     """
@@ -27,15 +30,15 @@ async def fetch_content(url: str) -> Optional[str]:
         return None
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                cfg.reader_api_endpoint,
-                headers={
-                    "Authorization": f"Bearer {cfg.reader_api_key}",
-                    "Content-Type": "application/json",
-                },
-                json={"url": url},
-            )
+        client = HttpClientManager.get("reader", timeout=READER_TIMEOUT)
+        response = await client.post(
+            cfg.reader_api_endpoint,
+            headers={
+                "Authorization": f"Bearer {cfg.reader_api_key}",
+                "Content-Type": "application/json",
+            },
+            json={"url": url},
+        )
         response.raise_for_status()
         data = response.json()
 
@@ -1,10 +1,15 @@
-"""新闻选择模块 - 从 markdown 文件中选出热门且不重复的新闻"""
+"""新闻选择模块 - 从每日汇总中选出热门且不重复的新闻"""
 
 import logging
+import math
 import re
+from collections import Counter
 from difflib import SequenceMatcher
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from storage.aggregator import load_daily_aggregate
+from storage.fingerprints import RecentStories, StoryFingerprints
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +24,86 @@ def calculate_similarity(title1: str, title2: str) -> float:
     return SequenceMatcher(None, title1.lower(), title2.lower()).ratio()
 
 
+class TitleIndex:
+    """
+    Titles indexed for near-duplicate lookups, finding the same titles as comparing with each
+
+    SequenceMatcher.ratio() never exceeds quick_ratio(), the Dice coefficient of the two titles'
+    character multisets. With the characters of every title ordered the same way, rarest first,
+    two titles at Dice t or more share a character among the first |x| - ⌈t·|x| / (2 - t)⌉ + 1
+    of either one (prefix filtering), so only that prefix is indexed and looked up. The titles
+    it proposes are checked with the quick ratios, then ratio(), as calculate_similarity does.
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD, corpus: Iterable[str] = ()):
+        """corpus: titles whose character frequencies order the characters, typically all the candidates"""
+        if not 0 < threshold <= 1:
+            raise ValueError(f"Similarity threshold must be in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self.titles: List[str] = []
+        self._frequencies = Counter(char for title in corpus for char in set(title.lower()))
+        # (character, occurrence) -> keys of the titles with it in their prefix
+        self._postings: Dict[Tuple[str, int], List[int]] = {}
+        self._lowered: List[str] = []
+        self._tokens: List[FrozenSet[Tuple[str, int]]] = []
+        self._last: Optional[Tuple[str, Tuple]] = None
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def _tokenize(self, lowered: str) -> Tuple[FrozenSet[Tuple[str, int]], List[Tuple[str, int]]]:
+        """The title's characters numbered by occurrence, so the multiset is a set, and its prefix"""
+        if self._last is not None and self._last[0] == lowered:
+            # A title looked up, then added
+            return self._last[1]
+        occurrences: Dict[str, int] = {}
+        tokens = []
+        for char in lowered:
+            occurrence = occurrences.get(char, 0)
+            tokens.append((char, occurrence))
+            occurrences[char] = occurrence + 1
+        frequencies = self._frequencies
+        tokens.sort(key=lambda token: (frequencies[token[0]], token))
+        # Rounded down by a hair against float error, a smaller overlap bound only lengthens the prefix
+        overlap = math.ceil(self.threshold * len(tokens) / (2 - self.threshold) - 1e-9)
+        tokenized = frozenset(tokens), tokens[: len(tokens) - max(overlap, 1) + 1]
+        self._last = (lowered, tokenized)
+        return tokenized
+
+    def add(self, title: str):
+        lowered = title.lower()
+        tokens, prefix = self._tokenize(lowered)
+        for token in prefix:
+            self._postings.setdefault(token, []).append(len(self.titles))
+        self.titles.append(title)
+        self._lowered.append(lowered)
+        self._tokens.append(tokens)
+
+    def find_similar(self, title: str) -> Optional[Tuple[str, float]]:
+        """The earliest added title at least `threshold` similar to this one, and its similarity"""
+        lowered = title.lower()
+        tokens, prefix = self._tokenize(lowered)
+        candidates = set()
+        for token in prefix:
+            candidates.update(self._postings.get(token, ()))
+        if not lowered:
+            # Two empty titles are equal, and share no character
+            candidates.update(key for key, other in enumerate(self._lowered) if not other)
+
+        for key in sorted(candidates):
+            other = self._lowered[key]
+            total = len(lowered) + len(other)
+            # real_quick_ratio() then quick_ratio(), computed the same way
+            if total and 2.0 * min(len(lowered), len(other)) / total < self.threshold:
+                continue
+            if total and 2.0 * len(tokens & self._tokens[key]) / total < self.threshold:
+                continue
+            similarity = SequenceMatcher(None, lowered, other).ratio()
+            if similarity >= self.threshold:
+                return self.titles[key], similarity
+        return None
+
+
 def extract_news_from_markdown(markdown_path: Path) -> Dict[str, List[Dict]]:
     """
     从 Markdown 文件中提取指定源的新闻
@@ -71,41 +156,81 @@ def extract_news_from_markdown(markdown_path: Path) -> Dict[str, List[Dict]]:
     return result
 
 
+def extract_news_from_aggregate(aggregate: Dict, selected_sources: set) -> Dict[str, List[Dict]]:
+    """
+    从结构化的每日汇总中提取指定源的新闻
+
+    Returns:
+        {source_name: [{"title": "...", "url": "...", "rank": 1, "source_id": "...", "score": 123}, ...]}
+    """
+    return {
+        source["name"]: [
+            {
+                "title": item["title"],
+                "url": item["url"],
+                "rank": item["rank"],
+                "source_id": source["source_id"],
+                "score": item.get("score"),
+            }
+            for item in source["items"]
+        ]
+        for source in aggregate["sources"]
+        if source["name"] in selected_sources
+    }
+
+
 def select_top_news(
     date: str,
     markdown_path: Optional[Path] = None,
     top_n: int = 20,
     selected_sources: Optional[set] = None,
+    similarity_threshold: float = SIMILARITY_THRESHOLD,
+    lookback_days: Optional[int] = None,
+    follow_ups: Optional[bool] = None,
 ) -> List[Dict]:
     """
     从 markdown 文件中选出热门且不重复的前 N 条新闻
 
     Args:
         date: 日期字符串，格式：YYYY-MM-DD
-        markdown_path: markdown 文件路径，默认 data/YYYY-MM-DD.md
+        markdown_path: 指定时从该 markdown 文件读取，默认读取 data/YYYY-MM-DD.json，没有时退回 data/YYYY-MM-DD.md
         top_n: 返回的新闻数量
         selected_sources: 要选择的源名称集合
+        similarity_threshold: 与已选标题的相似度达到该值即视为重复
+        lookback_days: 跳过此前这么多天内已摘要过的新闻，0 不检查，默认 cfg.summary_lookback_days
+        follow_ups: 同一事件换了链接时保留并标记为后续报道，而不是跳过，默认 cfg.summary_follow_ups
 
     Returns:
         选出的新闻列表，每个元素包含：
         - title: 标题
         - url: 链接
         - source_name: 源名称
+        - source_id: 源ID（仅结构化汇总中有）
         - rank: 在该源中的排名
         - weighted_score: 加权分数（暂时用排名，排名越小分数越高）
+        - follow_up: 后续报道时，此前摘要过的 {"date", "title", "url"}
     """
+    from config import cfg
+
     if selected_sources is None:
         selected_sources = SELECTED_SOURCES
+    if lookback_days is None:
+        lookback_days = cfg.summary_lookback_days
+    if follow_ups is None:
+        follow_ups = cfg.summary_follow_ups
 
-    if markdown_path is None:
-        from config import cfg
-        markdown_path = cfg.data_dir / f"{date}.md"
+    aggregate = load_daily_aggregate(date) if markdown_path is None else None
+    if aggregate is not None:
+        parsed_data = extract_news_from_aggregate(aggregate, selected_sources)
+    else:
+        if markdown_path is None:
+            markdown_path = cfg.data_dir / f"{date}.md"
 
-    # 从 Markdown 文件提取新闻
-    parsed_data = extract_news_from_markdown(markdown_path)
+        # 旧的日期只有 Markdown 文件
+        parsed_data = extract_news_from_markdown(markdown_path)
 
     if not parsed_data:
-        logger.warning(f"未找到数据或文件不存在: {markdown_path}")
+        logger.warning(f"未找到 {date} 的数据")
         return []
 
     # 收集所有候选新闻（带源信息）
@@ -119,15 +244,16 @@ def select_top_news(
             # 加权分数：排名越小分数越高（用 1000 - rank 作为分数，保证排名靠前的分数高）
             weighted_score = 1000 - news["rank"]
 
-            candidates.append(
-                {
-                    "title": news["title"],
-                    "url": news["url"],
-                    "source_name": source_name,
-                    "rank": news["rank"],
-                    "weighted_score": weighted_score,
-                }
-            )
+            candidate = {
+                "title": news["title"],
+                "url": news["url"],
+                "source_name": source_name,
+                "rank": news["rank"],
+                "weighted_score": weighted_score,
+            }
+            if "source_id" in news:
+                candidate["source_id"] = news["source_id"]
+            candidates.append(candidate)
 
     if not candidates:
         logger.warning("没有找到候选新闻")
@@ -136,28 +262,61 @@ def select_top_news(
     # 按加权分数排序
     candidates.sort(key=lambda x: x["weighted_score"], reverse=True)
 
-    # 相似度去重
+    # 跳过前几天已经摘要过的新闻
+    if lookback_days > 0:
+        try:
+            recent = StoryFingerprints.default().recent(date, lookback_days)
+            candidates = drop_repeats(candidates, recent, follow_ups)
+        except Exception as e:
+            logger.error(f"Failed to check summarized stories: {e}")
+
+    selected = select_distinct(candidates, top_n, similarity_threshold)
+    logger.info(f"从 {len(candidates)} 条候选新闻中选出 {len(selected)} 条新闻")
+    return selected
+
+
+def select_distinct(candidates: List[Dict], top_n: int, threshold: float = SIMILARITY_THRESHOLD) -> List[Dict]:
+    """按顺序选出前 top_n 条与已选标题都不相似的候选新闻"""
     selected = []
-    selected_titles = []
+    index = TitleIndex(threshold, (candidate["title"] for candidate in candidates))
 
     for candidate in candidates:
         title = candidate["title"]
 
         # 检查是否与已选新闻相似
-        is_similar = False
-        for selected_title in selected_titles:
-            similarity = calculate_similarity(title, selected_title)
-            if similarity >= SIMILARITY_THRESHOLD:
-                is_similar = True
-                logger.debug(f"跳过相似新闻: {title} (与 {selected_title} 相似度 {similarity:.2f})")
-                break
-
-        if not is_similar:
-            selected.append(candidate)
-            selected_titles.append(title)
+        similar = index.find_similar(title)
+        if similar is not None:
+            logger.debug(f"跳过相似新闻: {title} (与 {similar[0]} 相似度 {similar[1]:.2f})")
+            continue
 
-            if len(selected) >= top_n:
-                break
+        selected.append(candidate)
+        index.add(title)
+        if len(selected) >= top_n:
+            break
 
-    logger.info(f"从 {len(candidates)} 条候选新闻中选出 {len(selected)} 条新闻")
     return selected
+
+
+def drop_repeats(candidates: List[Dict], recent: RecentStories, follow_ups: bool = False) -> List[Dict]:
+    """
+    去掉已经摘要过的候选新闻
+    同一链接总是跳过；同一事件换了链接时，follow_ups 为真则保留并标记 follow_up，否则跳过
+    """
+    if not len(recent):
+        return candidates
+
+    kept = []
+    for candidate in candidates:
+        repeat = recent.match(candidate["title"], candidate["url"])
+        if repeat is None:
+            kept.append(candidate)
+        elif follow_ups and not repeat.same_url:
+            kept.append({**candidate, "follow_up": {"date": repeat.date, "title": repeat.title, "url": repeat.url}})
+        else:
+            logger.debug(f"跳过已摘要新闻: {candidate['title']} ({repeat.date}: {repeat.title})")
+
+    skipped = len(candidates) - len(kept)
+    follow_up_count = sum(1 for candidate in kept if "follow_up" in candidate)
+    if skipped or follow_up_count:
+        logger.info(f"跳过 {skipped} 条已摘要的新闻，{follow_up_count} 条标记为后续报道")
+    return kept
@@ -1,8 +1,17 @@
-"""测试汇总功能"""
+"""测试汇总功能
 
+uv run test-aggregator.py [--date 2025-11-22] [--verify] [--rebuild] [--same-minute]
+"""
+
+import argparse
 import logging
+import sys
+import tempfile
 from datetime import datetime
+from pathlib import Path
 
+from config import cfg
+from fetcher.models import Trend
 from logger.logging import setup_logger
 from storage.aggregator import DailyAggregator
 
@@ -10,12 +19,44 @@ setup_logger()
 logger = logging.getLogger(__name__)
 
 
+def check_same_minute() -> bool:
+    """
+    两次完整快照落在同一分钟，第一次已计入检查点后，增量结果仍与全量重算一致
+    Files backend, snapshots [a, b] at 12:00:05, aggregated, then [b, c] at 12:00:55
+    """
+    cfg.storage_backend = "files"
+    a, b, c = (Trend(id=topic_id, title=topic_id, url=f"https://www.example.com/{topic_id}") for topic_id in "abc")
+    date = "2025-11-22"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        generator = DailyAggregator(tmp_path / "temp", tmp_path / "data", tmp_path / "state")
+        generator.storage.append("baidu", datetime(2025, 11, 22, 12, 0, 5), [a, b])
+        generator.aggregate_source("baidu", date)
+        generator.storage.append("baidu", datetime(2025, 11, 22, 12, 0, 55), [b, c])
+        return generator.verify(date)
+
+
 def main():
     """测试生成汇总文件"""
-    today = datetime.now().strftime("%Y-%m-%d")
-    logger.info(f"开始生成 {today} 的汇总文件...")
+    parser = argparse.ArgumentParser(description="生成汇总文件")
+    parser.add_argument("--date", default=datetime.now().strftime("%Y-%m-%d"), help="日期，格式：YYYY-MM-DD")
+    parser.add_argument("--verify", action="store_true", help="校验增量聚合结果与全量重算一致")
+    parser.add_argument("--rebuild", action="store_true", help="丢弃检查点，从全部快照重算")
+    parser.add_argument("--same-minute", action="store_true", help="检查同一分钟内两次保存后增量结果与全量重算一致")
+    args = parser.parse_args()
+
+    if args.same_minute:
+        sys.exit(0 if check_same_minute() else 1)
+
     generator = DailyAggregator()
-    generator.generate(today)
+    if args.rebuild:
+        generator.reset(args.date)
+    if args.verify:
+        sys.exit(0 if generator.verify(args.date) else 1)
+
+    logger.info(f"开始生成 {args.date} 的汇总文件...")
+    generator.generate(args.date)
 
 
 if __name__ == "__main__":
@@ -3,10 +3,9 @@
 import asyncio
 import logging
 
-import fetcher  # noqa: F401 自动注册所有源
 from fetcher.registry import FetcherRegistry
 from logger.logging import setup_logger
-from storage.cache import CacheStorage
+from storage.base import create_storage
 
 setup_logger()
 logger = logging.getLogger(__name__)
@@ -26,8 +25,8 @@ async def fetch_source(source_id: str):
             if item.description:
                 logger.info(f"     {item.description[:50]}...")
 
-        storage = CacheStorage()
-        storage.save(source_id, items
+        storage = create_storage()
+        storage.save(source_id, items)
         logger.info(f"✅ {source_id} - 成功")
         return True
     except Exception as e:
@@ -0,0 +1,45 @@
+"""离线回放已录制的上游响应，校验各源解析结果
+
+录制：FETCH_MODE=record uv run test-fetch.py
+回放：uv run test-replay.py
+"""
+
+import asyncio
+import logging
+
+from config import cfg
+from fetcher.http_client import HttpClientManager
+from fetcher.registry import FetcherRegistry
+from fetcher.replay import load_fixtures
+from logger.logging import setup_logger
+
+setup_logger()
+logger = logging.getLogger(__name__)
+
+
+async def replay_source(source_id: str) -> bool:
+    if not load_fixtures(cfg.fixtures_dir, source_id):
+        logger.warning(f"⏭ {source_id} - no fixtures in {cfg.fixtures_dir / source_id}")
+        return True
+
+    try:
+        items = await FetcherRegistry.get(source_id).fetch()
+        assert items, "parsed no items"
+        assert all(item.id and item.title and item.url for item in items), "item missing id/title/url"
+        logger.info(f"✅ {source_id} - {len(items)} items, first: {items[0].title}")
+        return True
+    except Exception as e:
+        logger.error(f"❌ {source_id} - {e}")
+        return False
+
+
+async def main():
+    cfg.fetch_mode = "replay"
+    results = [await replay_source(source_id) for source_id in FetcherRegistry.list_source_ids()]
+    await HttpClientManager.aclose()
+    assert all(results), "replay failed"
+    logger.info("所有源回放通过！✅")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,10 +3,14 @@ from __future__ import annotations
 import argparse
 import json
 import re
+from dataclasses import asdict
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Sequence
 
+from storage.aggregator import MAX_ITEMS_PER_SOURCE, SOURCES_CONFIG, load_daily_aggregate
+from storage.stream import FlashStream
+
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data"
 TEMPLATE_PATH = Path(__file__).parent / "templates" / "trending.html"
@@ -26,13 +30,44 @@ SOURCE_PRESENTATION: Dict[str, Dict[str, str]] = {
 
 
 def get_available_dates() -> List[str]:
-    dates: List[str] = []
-    for md_file in DATA_DIR.glob("*.md"):
-        if DATE_FILE_PATTERN.fullmatch(md_file.stem):
-            dates.append(md_file.stem)
+    dates = set()
+    for data_file in [*DATA_DIR.glob("*.json"), *DATA_DIR.glob("*.md")]:
+        if DATE_FILE_PATTERN.fullmatch(data_file.stem):
+            dates.add(data_file.stem)
     return sorted(dates, reverse=True)
 
 
+def render_item(rank: int, item: Dict[str, object]) -> Dict[str, object]:
+    """Item as the template expects it, a Trend dict with the url as link"""
+    rendered = {"rank": rank, "title": item["title"], "link": item["url"]}
+    for key in ("id", "description", "score"):
+        if item.get(key) is not None:
+            rendered[key] = item[key]
+    return rendered
+
+
+def load_aggregate(date_str: str) -> Dict[str, object]:
+    """Sources of a day from the structured aggregate, days from before it existed fall back to the Markdown"""
+    aggregate = load_daily_aggregate(date_str, DATA_DIR)
+    if aggregate is None:
+        return parse_markdown(date_str)
+
+    sources = [
+        {
+            "source_id": source["source_id"],
+            "name": source["name"],
+            "meta": SOURCE_PRESENTATION.get(source["name"], {"icon": "💎", "color_class": "green"}),
+            "items": [render_item(item["rank"], item) for item in source["items"]],
+        }
+        for source in aggregate["sources"]
+    ]
+    stories = [
+        {**story, "source_names": [SOURCES_CONFIG.get(source_id, {}).get("name", source_id) for source_id in story["sources"]]}
+        for story in aggregate.get("stories", [])
+    ]
+    return {"title": aggregate["title"], "sources": sources, "stories": stories}
+
+
 def parse_markdown(date_str: str) -> Dict[str, object]:
     md_path = DATA_DIR / f"{date_str}.md"
     if not md_path.exists():
@@ -72,6 +107,29 @@ def parse_markdown(date_str: str) -> Dict[str, object]:
     }
 
 
+def merge_live_streams(date_str: str, sources: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    """Flash-news sources are read straight from their streams, so they are as fresh as the last poll"""
+    stream = FlashStream()
+    by_name = {source["name"]: source for source in sources}
+
+    for source_id, config in SOURCES_CONFIG.items():
+        items = stream.read(source_id, date_str)[:MAX_ITEMS_PER_SOURCE]
+        if not items:
+            continue
+
+        source_name = config["name"]
+        current = by_name.get(source_name)
+        if current is None:
+            meta = SOURCE_PRESENTATION.get(source_name, {"icon": "💎", "color_class": "green"})
+            current = {"source_id": source_id, "name": source_name, "meta": meta, "items": []}
+            sources.append(current)
+        current["items"] = [render_item(rank, asdict(item)) for rank, item in enumerate(items, 1)]
+
+    order = {config["name"]: config["order"] for config in SOURCES_CONFIG.values()}
+    sources.sort(key=lambda source: order.get(source["name"], 999))  # type: ignore[arg-type]
+    return sources
+
+
 def render_page(selected_date: str | None = None) -> str:
     available_dates = get_available_dates()
     if not available_dates:
@@ -80,11 +138,15 @@ def render_page(selected_date: str | None = None) -> str:
     date_to_use = selected_date or available_dates[0]
 
     # 如果日期不存在，返回空数据
+    stories: Sequence[Dict[str, object]] = []
     if date_to_use not in available_dates:
         sources: Sequence[Dict[str, object]] = []
     else:
-        parsed = parse_markdown(date_to_use)
+        parsed = load_aggregate(date_to_use)
         sources = parsed["sources"]  # type: ignore[assignment]
+        stories = parsed.get("stories", [])  # type: ignore[assignment]
+
+    sources = merge_live_streams(date_to_use, list(sources))
 
     total_items = sum(len(s["items"]) for s in sources)  # type: ignore[index]
 
@@ -93,6 +155,7 @@ def render_page(selected_date: str | None = None) -> str:
         "selected_date": date_to_use,
         "selected_date_display": date_to_use,
         "sources": sources,
+        "stories": stories,
         "source_count": len(sources),
         "item_count": total_items,
         "build_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),